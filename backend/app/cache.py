@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from dotenv import load_dotenv
+
+from app.invalidation import invalidation_bus, TASKS_TOPIC, USERS_TOPIC
+
+load_dotenv()
+
+TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND", "memory") # "memory", "redis" or "off"
+TASK_CACHE_REDIS_URL = os.getenv("TASK_CACHE_REDIS_URL", "redis://localhost:6379/0")
+TASK_CACHE_TTL_SECONDS = int(os.getenv("TASK_CACHE_TTL_SECONDS", "60"))
+TASK_CACHE_MAX_ENTRIES = int(os.getenv("TASK_CACHE_MAX_ENTRIES", "10000"))
+
+
+# --- Backends ---
+class LRUCacheBackend:
+    """
+    In-process LRU cache with per-entry TTL. Generation counters are kept apart from the
+    entries, in an LRU of their own. Every increment takes the next value of one process-wide
+    sequence, and a counter that is not held reads as the highest value ever evicted, so an
+    eviction can never roll a user's generation back and resurrect stale data.
+    """
+
+    def __init__(self, max_entries: int = TASK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._counters: OrderedDict[str, int] = OrderedDict()
+        self._sequence = 0 # last value handed out by incr()
+        self._evicted_max = 0 # highest counter value evicted so far
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key)
+            if value is None:
+                return self._evicted_max
+            self._counters.move_to_end(key)
+            return value
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._sequence += 1
+            self._counters[key] = self._sequence
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_entries:
+                _, value = self._counters.popitem(last=False)
+                self._evicted_max = max(self._evicted_max, value)
+            return self._sequence
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Shared cache backend so every worker sees the same entries and generations."""
+
+    def __init__(self, url: str = TASK_CACHE_REDIS_URL):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("TASK_CACHE_BACKEND=redis requires the 'redis' package to be installed.") from e
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: int):
+        self._client.set(key, value, ex=ttl)
+
+    def get_counter(self, key: str) -> int:
+        return int(self._client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self._client.incr(key)
+
+    def clear(self):
+        # Entries and generations live in Redis and are shared by every worker,
+        # so a worker that missed invalidations has nothing local to drop.
+        pass
+
+
+# --- Task view cache ---
+class TaskViewCache:
+    """
+    Caches per-user task views (list_user_tasks, get_user_task_counts) keyed by their query
+    parameters. Every key embeds the user's generation number, so invalidating a user is a
+    single counter bump that orphans all of their entries and leaves other users untouched.
+    """
+
+    def __init__(self, backend, ttl: int = TASK_CACHE_TTL_SECONDS, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def set_backend(self, backend):
+        """Swaps the storage backend (e.g. an LRUCacheBackend stand-in for Redis in tests)."""
+        self.backend = backend
+
+    def generation(self, user_id: UUID) -> int:
+        """Current generation for a user. Read it before querying and pass it to set()."""
+        return self.backend.get_counter(f"taskview:gen:{user_id}")
+
+    def _key(self, user_id: UUID, generation: int, view: str, params: dict) -> str:
+        encoded_params = json.dumps(jsonable_encoder(params), sort_keys=True)
+        return f"taskview:{user_id}:{generation}:{view}:{encoded_params}"
+
+    def get(self, user_id: UUID, view: str, params: dict) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        cached = self.backend.get(self._key(user_id, self.generation(user_id), view, params))
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(cached)
+
+    def set(self, user_id: UUID, generation: int, view: str, params: dict, value: Any):
+        """
+        Stores a computed view under the generation read before the query ran. If a write
+        invalidated the user meanwhile, the entry lands in a dead generation and is never served.
+        """
+        if not self.enabled:
+            return
+        self.backend.set(self._key(user_id, generation, view, params), json.dumps(jsonable_encoder(value)), self.ttl)
+
+    def invalidate_user(self, user_id: UUID):
+        """
+        Drops every cached view for a user. Driven by the invalidation bus, so routers
+        publish to TASKS_TOPIC instead of calling this directly.
+        """
+        if not self.enabled:
+            return
+        self.backend.incr(f"taskview:gen:{user_id}")
+        self.invalidations += 1
+
+    def reset(self):
+        """Drops all locally held entries, used when invalidations may have been missed."""
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _build_task_view_cache() -> TaskViewCache:
+    if TASK_CACHE_BACKEND == "redis":
+        return TaskViewCache(RedisCacheBackend())
+    return TaskViewCache(LRUCacheBackend(), enabled=TASK_CACHE_BACKEND != "off")
+
+task_view_cache = _build_task_view_cache()
+
+# Writes in any worker reach this worker's cache through the invalidation bus
+invalidation_bus.subscribe(TASKS_TOPIC, task_view_cache.invalidate_user)
+invalidation_bus.subscribe(USERS_TOPIC, task_view_cache.invalidate_user)
+invalidation_bus.subscribe_reset(task_view_cache.reset)
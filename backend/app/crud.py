@@ -1,7 +1,13 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlmodel import Session, select
 from uuid import UUID
-from app.models import ChatMessage # Assuming models are defined
+from sqlalchemy import func
+from app.models import ChatMessage, User # Assuming models are defined
+
+def get_user_by_username(session: Session, username: str) -> Optional[User]:
+    # Case-insensitive match, written exactly as the ix_users_username_lower expression so the
+    # lookup is an index probe instead of a scan of users
+    return session.exec(select(User).where(func.lower(User.username) == func.lower(username))).first()
 
 async def store_chat_message_in_db(message: ChatMessage, session: Session):
     session.add(message)
@@ -9,5 +15,19 @@ async def store_chat_message_in_db(message: ChatMessage, session: Session):
     session.refresh(message)
     return message
 
+async def store_chat_turn(user_messages: List[ChatMessage], agent_message: ChatMessage, session: Session) -> List[UUID]:
+    # The turn's user messages and the reply in one transaction. Ids and timestamps are
+    # generated client-side, so there is nothing to refresh; read them before the commit
+    # expires the instances.
+    messages = [*user_messages, agent_message]
+    message_ids = [message.message_id for message in messages]
+    session.add_all(messages)
+    session.commit()
+    return message_ids
+
 async def get_chat_history_from_db(chat_id: UUID, session: Session, limit: int = 10) -> List[ChatMessage]:
-    return session.query(ChatMessage).filter(ChatMessage.chat_id == chat_id).order_by(ChatMessage.timestamp.asc()).limit(limit).all()
\ No newline at end of file
+    # The most recent `limit` messages, returned oldest first
+    latest = session.exec(
+        select(ChatMessage).where(ChatMessage.chat_id == chat_id).order_by(ChatMessage.timestamp.desc()).limit(limit)
+    ).all()
+    return latest[::-1]
\ No newline at end of file
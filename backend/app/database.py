@@ -1,6 +1,13 @@
 from sqlmodel import create_engine, Session, SQLModel
+from sqlalchemy import event, inspect
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateIndex
+import itertools
 import os
+import time
+from typing import Optional
+from uuid import UUID
 from dotenv import load_dotenv
+from app.invalidation import invalidation_bus, CHATS_TOPIC, TASKS_TOPIC, USERS_TOPIC
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,15 +18,92 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set. Please create a .env file.")
 
+# Optional comma-separated list of read replica URLs. When unset, reads go to the primary.
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+
+# How long (in seconds) a user's reads stay on the primary after one of their own writes,
+# so they never read a replica that hasn't caught up with their change yet.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
 # Create the engine
 engine = create_engine(DATABASE_URL, echo=True) # echo=True for logging SQL queries
 
+# One engine per replica, handed out round-robin
+read_engines = [create_engine(url, echo=True) for url in DATABASE_READ_URLS]
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless enabled per connection
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+for _engine in [engine, *read_engines]:
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enable_sqlite_foreign_keys)
+_read_engine_cycle = itertools.cycle(read_engines) if read_engines else None
+
+# user_id -> monotonic timestamp of that user's last committed write
+_last_write_at: dict[str, float] = {}
+_MAX_TRACKED_WRITERS = 10000
+
 def create_db_and_tables():
     """
     Creates all database tables defined by SQLModel metadata.
     (This function is called by init_db.py, not main.py directly now)
     """
+    from app.search import ensure_search_index
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
+    upgrade_foreign_keys(engine)
+    create_missing_indexes(engine)
+    ensure_search_index(engine)
+
+def add_missing_columns(engine):
+    """
+    Adds columns declared on models after their table was created. Only columns that are
+    nullable or have a server default can be added this way, which new columns should be.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+
+def upgrade_foreign_keys(engine):
+    """
+    Recreates foreign keys whose ON DELETE action differs from the models' (e.g. the CASCADE
+    from users to their tasks and messages) on databases created before the change.
+    PostgreSQL only: SQLite can't alter constraints, so older SQLite files keep theirs.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_keys = inspector.get_foreign_keys(table.name)
+            for foreign_key in table.foreign_key_constraints:
+                for existing_key in existing_keys:
+                    if (existing_key["constrained_columns"] == [column.name for column in foreign_key.columns] and
+                            (existing_key["options"].get("ondelete") or "").upper() != (foreign_key.ondelete or "").upper()):
+                        connection.exec_driver_sql(f'ALTER TABLE {table.name} DROP CONSTRAINT "{existing_key["name"]}"')
+                        connection.execute(AddConstraint(foreign_key))
+
+def create_missing_indexes(engine):
+    """
+    create_all only creates indexes together with their table, so indexes added to a model
+    later are created here on databases whose tables already exist.
+    """
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes such as
+    # ix_users_username_lower, so checkfirst would try to create them again
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
 
 def get_session():
     """
@@ -27,4 +111,45 @@ def get_session():
     The session is automatically closed after the request.
     """
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def mark_user_write(user_id: UUID):
+    """
+    Records that a user just committed a write, pinning their reads to the primary
+    for READ_YOUR_WRITES_SECONDS. Task, user and chat writes reach this through the
+    invalidation bus, so every worker sees them.
+    """
+    if not read_engines:
+        return
+    now = time.monotonic()
+    if len(_last_write_at) >= _MAX_TRACKED_WRITERS:
+        # Drop entries whose stickiness window has already passed
+        for key, written_at in list(_last_write_at.items()):
+            if now - written_at >= READ_YOUR_WRITES_SECONDS:
+                del _last_write_at[key]
+    _last_write_at[str(user_id)] = now
+
+# Keep read-your-writes stickiness consistent across workers as well
+invalidation_bus.subscribe(TASKS_TOPIC, mark_user_write)
+invalidation_bus.subscribe(USERS_TOPIC, mark_user_write)
+invalidation_bus.subscribe(CHATS_TOPIC, mark_user_write)
+
+def get_read_engine(user_id: Optional[UUID] = None):
+    """
+    Picks the engine a read-only request should use: the primary if there are no replicas
+    or the user wrote recently, otherwise the next replica in round-robin order.
+    """
+    if not read_engines:
+        return engine
+    if user_id is not None:
+        written_at = _last_write_at.get(str(user_id))
+        if written_at is not None and time.monotonic() - written_at < READ_YOUR_WRITES_SECONDS:
+            return engine
+    return next(_read_engine_cycle)
+
+def get_read_session_for_user(user_id: Optional[UUID] = None):
+    """
+    Yields a session routed by get_read_engine. Only use it for endpoints that don't write.
+    """
+    with Session(get_read_engine(user_id)) as session:
+        yield session
@@ -0,0 +1,167 @@
+"""
+Idempotency-Key support for POST endpoints whose retries must not repeat work.
+
+The first request with a given key claims it by inserting a pending row in idempotency_keys,
+runs, and stores its response there. A retry with the same key gets that response back
+instead of running again, for IDEMPOTENCY_TTL_SECONDS. Duplicates that arrive while the first
+request is still running wait for its result: in-process through an asyncio.Event, across
+workers by polling the row. Failed requests release their claim, so they can be retried, and
+so do responses the endpoint marks as not worth replaying (see `should_store`). Reusing a key
+with a different request body is rejected.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+from uuid import UUID
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+import app.models as models
+from app.database import engine
+
+load_dotenv()
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a duplicate waits for the first request, and after how long an unfinished claim
+# (its worker died) is considered abandoned
+IDEMPOTENCY_WAIT_SECONDS = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+IDEMPOTENCY_POLL_SECONDS = 0.2
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 3600
+
+Scope = Tuple[UUID, str, str] # (user_id, endpoint, key)
+
+_in_flight: Dict[Scope, asyncio.Event] = {}
+
+def request_fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(jsonable_encoder(payload), sort_keys=True).encode()).hexdigest()
+
+def _claim(scope: Scope, fingerprint: str) -> Optional[models.IdempotencyRecord]:
+    """Claims the key. Returns None when claimed, or the existing record for it."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        record = session.get(models.IdempotencyRecord, scope)
+        if record is not None and (
+            record.created_at < now - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS) or
+            (record.response_body is None and record.created_at < now - timedelta(seconds=IDEMPOTENCY_WAIT_SECONDS))
+        ):
+            # Expired, or abandoned by a worker that died mid-request
+            session.delete(record)
+            session.commit()
+            record = None
+        if record is not None:
+            return record
+        user_id, endpoint, key = scope
+        session.add(models.IdempotencyRecord(user_id=user_id, endpoint=endpoint, key=key, request_hash=fingerprint))
+        try:
+            session.commit()
+            return None
+        except IntegrityError:
+            # Another worker claimed it first
+            session.rollback()
+            return session.get(models.IdempotencyRecord, scope)
+
+def _load(scope: Scope) -> Optional[models.IdempotencyRecord]:
+    with Session(engine) as session:
+        return session.get(models.IdempotencyRecord, scope)
+
+def _store_response(scope: Scope, response: Any):
+    with Session(engine) as session:
+        record = session.get(models.IdempotencyRecord, scope)
+        if record is not None:
+            record.response_body = json.dumps(jsonable_encoder(response))
+            session.add(record)
+            session.commit()
+
+def _release(scope: Scope):
+    with Session(engine) as session:
+        session.exec(delete(models.IdempotencyRecord).where(
+            (models.IdempotencyRecord.user_id == scope[0]) &
+            (models.IdempotencyRecord.endpoint == scope[1]) &
+            (models.IdempotencyRecord.key == scope[2])
+        ))
+        session.commit()
+
+async def run_once(
+    user_id: UUID,
+    endpoint: str,
+    key: Optional[str],
+    payload: Any,
+    response_model: Type[BaseModel],
+    handler: Callable[[], Awaitable[Any]],
+    should_store: Callable[[Any], bool] = lambda response: True,
+):
+    """
+    Runs `handler` once per (user, endpoint, Idempotency-Key) and returns its response, or
+    the stored response of the first run. Without a key, just runs `handler`. A response for
+    which `should_store` is false (e.g. a fallback reply) is returned but not kept, so a retry
+    runs `handler` again.
+    """
+    if key is None:
+        return await handler()
+    scope = (user_id, endpoint, key)
+
+    running = _in_flight.get(scope)
+    if running is not None:
+        await running.wait()
+        return await run_once(user_id, endpoint, key, payload, response_model, handler, should_store)
+
+    fingerprint = request_fingerprint(payload)
+    running = _in_flight[scope] = asyncio.Event()
+    try:
+        record = _claim(scope, fingerprint)
+        if record is None:
+            try:
+                response = await handler()
+            except BaseException:
+                _release(scope)
+                raise
+            if should_store(response):
+                _store_response(scope, response)
+            else:
+                _release(scope)
+            return response
+
+        if record.request_hash != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request.")
+        deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT_SECONDS
+        while record is not None and record.response_body is None:
+            # Still running in another worker
+            if asyncio.get_running_loop().time() > deadline:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed.")
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+            record = _load(scope)
+        if record is None:
+            # The other worker's request failed and released the key; run it here
+            running.set()
+            _in_flight.pop(scope, None)
+            return await run_once(user_id, endpoint, key, payload, response_model, handler, should_store)
+        return response_model.model_validate(json.loads(record.response_body))
+    finally:
+        running.set()
+        if _in_flight.get(scope) is running:
+            del _in_flight[scope]
+
+def purge_expired_keys(engine) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    with Session(engine) as session:
+        result = session.exec(delete(models.IdempotencyRecord).where(models.IdempotencyRecord.created_at < cutoff))
+        session.commit()
+        return result.rowcount
+
+async def run_purge_periodically(engine):
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            await asyncio.to_thread(purge_expired_keys, engine)
+        except Exception as e:
+            print(f"Idempotency key purge failed: {e}")
+        await asyncio.sleep(IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
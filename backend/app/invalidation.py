@@ -0,0 +1,171 @@
+import json
+import os
+import queue
+import re
+import threading
+from collections import defaultdict
+from typing import Callable
+from uuid import uuid4
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "local") # "local" or "postgres"
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "tapyou_invalidation")
+
+# Topics published by the routers. The key is always the affected user_id.
+TASKS_TOPIC = "tasks"
+USERS_TOPIC = "users"
+CHATS_TOPIC = "chats"
+
+
+class LocalInvalidationBus:
+    """
+    In-memory bus for single-process runs: publish() calls every subscriber of the topic
+    synchronously. Subscribers must be idempotent, as a key may be delivered more than once.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, list[Callable]] = defaultdict(list)
+        self._reset_subscribers: list[Callable] = []
+
+    def subscribe(self, topic: str, handler: Callable):
+        """Registers handler(key) to run whenever `topic` is published."""
+        self._subscribers[topic].append(handler)
+
+    def subscribe_reset(self, handler: Callable):
+        """Registers handler() to run when invalidations may have been missed (e.g. after a reconnect)."""
+        self._reset_subscribers.append(handler)
+
+    def publish(self, topic: str, key):
+        self._deliver(topic, str(key))
+
+    def _deliver(self, topic: str, key: str):
+        for handler in self._subscribers.get(topic, []):
+            try:
+                handler(key)
+            except Exception as e:
+                print(f"Invalidation handler for '{topic}' failed: {e}")
+
+    def _reset(self):
+        for handler in self._reset_subscribers:
+            try:
+                handler()
+            except Exception as e:
+                print(f"Invalidation reset handler failed: {e}")
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PostgresInvalidationBus(LocalInvalidationBus):
+    """
+    Fans invalidations out to every worker with Postgres LISTEN/NOTIFY. Local subscribers are
+    still called synchronously on publish; the NOTIFY itself is sent by a publisher thread, so
+    publish() never blocks the event loop on the database. The notification echoed back to
+    this process is skipped by its origin id, while other workers apply it from their
+    listener thread.
+    """
+
+    def __init__(self, database_url: str, channel: str = INVALIDATION_CHANNEL):
+        super().__init__()
+        # psycopg wants a plain libpq URL, not SQLAlchemy's "postgresql+psycopg://"
+        self._conninfo = re.sub(r"^postgresql\+\w+://", "postgresql://", database_url)
+        self.channel = channel
+        self._origin = uuid4().hex
+        self._outbox: queue.Queue = queue.Queue()
+        self._publisher = None
+        self._publisher_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._listener = None
+
+    def publish(self, topic: str, key):
+        super().publish(topic, key)
+        self._outbox.put(json.dumps({"topic": topic, "key": str(key), "origin": self._origin}))
+        self._ensure_publisher()
+
+    def _ensure_publisher(self):
+        # Started on first publish too, for scripts that never call start()
+        with self._publisher_lock:
+            if self._publisher is None or not self._publisher.is_alive():
+                self._publisher = threading.Thread(target=self._publish_queued, name="invalidation-publisher", daemon=True)
+                self._publisher.start()
+
+    def _publish_queued(self):
+        import psycopg
+        conn = None
+        while True:
+            payload = self._outbox.get()
+            if payload is None: # stop() was called
+                break
+            for attempt in range(2):
+                try:
+                    if conn is None or conn.closed:
+                        conn = psycopg.connect(self._conninfo, autocommit=True)
+                    conn.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    break
+                except Exception as e:
+                    conn = None
+                    if attempt == 1:
+                        print(f"Failed to publish invalidation {payload}: {e}")
+        if conn is not None:
+            conn.close()
+
+    def start(self):
+        self._ensure_publisher()
+        if self._listener is not None:
+            return
+        self._stopped.clear()
+        self._listener = threading.Thread(target=self._listen, name="invalidation-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+            self._listener = None
+        with self._publisher_lock:
+            if self._publisher is not None:
+                # Sends whatever is still queued, then exits
+                self._outbox.put(None)
+                self._publisher.join(timeout=5)
+                self._publisher = None
+
+    def _listen(self):
+        import psycopg
+        first_connect = True
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(self._conninfo, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{self.channel}"')
+                    if not first_connect:
+                        # Anything published while we were disconnected is lost
+                        self._reset()
+                    first_connect = False
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except Exception as e:
+                print(f"Invalidation listener lost its connection, retrying: {e}")
+                first_connect = False
+                self._stopped.wait(1.0)
+
+    def _handle(self, raw_payload: str):
+        try:
+            payload = json.loads(raw_payload)
+        except ValueError:
+            return
+        if payload.get("origin") == self._origin:
+            return
+        self._deliver(payload.get("topic", ""), payload.get("key", ""))
+
+
+def _build_invalidation_bus():
+    if INVALIDATION_BUS == "postgres":
+        return PostgresInvalidationBus(os.getenv("DATABASE_URL", ""))
+    return LocalInvalidationBus()
+
+invalidation_bus = _build_invalidation_bus()
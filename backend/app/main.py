@@ -1,16 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import user_router, task_router, auth_router, chat_router # Import the new routers
+from app.routers import user_router, task_router, recurring_task_router, auth_router, profiling_router # Import the new routers
+from app.routers.profiling_router import require_profiling_token
+from app.cache import task_view_cache
+from app.services.agent_trace_service import agent_metrics
+from app.services.llm_resilience import llm_breaker
+from app.services.chat_turn_service import chat_turn_queue
+from app.invalidation import invalidation_bus
+from app.database import engine
+from app import idempotency, profiling
+from app.services import account_service, archive_service, chat_retention_service, rollover_service
 import os
 from dotenv import load_dotenv
-from fastapi_mcp import FastApiMCP
 load_dotenv()
 
+# "full" serves everything. "api" serves only the auth/user/task APIs and skips the chat
+# router and MCP mount, so task-API workers never import the agent or MCP stacks.
+APP_MODE = os.getenv("APP_MODE", "full")
+if APP_MODE not in ("full", "api"):
+    raise ValueError(f"Invalid APP_MODE '{APP_MODE}'. Must be 'full' or 'api'.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Listen for cache invalidations published by the other workers
+    invalidation_bus.start()
+    background_jobs = [
+        asyncio.create_task(idempotency.run_purge_periodically(engine)),
+        asyncio.create_task(asyncio.to_thread(account_service.resume_account_purges, engine)),
+    ]
+    if rollover_service.TASK_ROLLOVER_INTERVAL_SECONDS > 0:
+        background_jobs.append(asyncio.create_task(rollover_service.run_rollover_periodically(engine)))
+    if archive_service.TASK_ARCHIVE_AFTER_DAYS > 0:
+        background_jobs.append(asyncio.create_task(archive_service.run_archiver_periodically(engine)))
+    if chat_retention_service.chat_maintenance_enabled(engine):
+        background_jobs.append(asyncio.create_task(chat_retention_service.run_chat_maintenance_periodically(engine)))
+    yield
+    for job in background_jobs:
+        job.cancel()
+    if APP_MODE == "full":
+        from app.services.chat_write_service import chat_write_batcher
+        await chat_write_batcher.stop()
+    invalidation_bus.stop()
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Modular Task Management API",
     description="A robust backend API providing comprehensive management for users and their to-do tasks. Features secure user authentication and the ability to organize tasks into modular units.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -29,19 +68,39 @@ app.add_middleware(
     allow_headers=["*"],                # Allow all headers in the request
 )
 
+# Per-request profiling, only installed when a token or sampling rate is configured
+if profiling.profiling_enabled():
+    app.middleware("http")(profiling.profile_requests)
+
 # Include the routers
 app.include_router(auth_router.router)
 app.include_router(user_router.router)
 app.include_router(task_router.router)
-app.include_router(chat_router.router)
+app.include_router(recurring_task_router.router)
+app.include_router(profiling_router.router)
+if APP_MODE == "full":
+    from app.routers import chat_router
+    app.include_router(chat_router.router)
 
-# Mount MCP functionality
-mcp = FastApiMCP(app)
-mcp.mount()
+# Operational metrics, kept out of the OpenAPI schema so they never become MCP tools and
+# behind the same admin token as the request profiles
+@app.get("/metrics/cache", include_in_schema=False, dependencies=[Depends(require_profiling_token)])
+async def cache_metrics():
+    return task_view_cache.stats()
+
+# Stage timings of agent runs (see services/agent_trace_service.py), the LLM circuit
+# breaker's state (see services/llm_resilience.py) and per-chat turn queueing (see
+# services/chat_turn_service.py)
+@app.get("/metrics/agent", include_in_schema=False, dependencies=[Depends(require_profiling_token)])
+async def agent_run_metrics():
+    return {**agent_metrics.stats(), "llm_breaker": llm_breaker.stats(), "chat_turns": chat_turn_queue.stats()}
 
 # No more direct endpoint definitions or helper functions here, they are in the routers.
 # The database creation logic is in init_db.py, run separately.
 
-mcp_app = FastAPI()
-mcp = FastApiMCP(app)
-mcp.mount(mcp_app)
+if APP_MODE == "full":
+    from app.mcp_server.tools import create_mcp
+
+    # Mount the single MCP server (task tools only) at /mcp over SSE for the agent
+    mcp = create_mcp(app)
+    mcp.mount_sse(app, mount_path="/mcp")
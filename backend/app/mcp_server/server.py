@@ -1,16 +1,7 @@
 # backend/app/mcp_server/server.py
-from fastapi_mcp import FastApiMCP
-from app.main import app as fastapi_app  # Import FastAPI app WITH registered routers
-
-# Configure MCP with authentication headers
-mcp = FastApiMCP(
-    fastapi_app,
-    headers={
-        "Authorization": "Bearer {{auth_token}}",  # Template for auth token
-        "Content-Type": "application/json"
-    }
-)
-mcp.mount_http()  # Exposes all /api as MCP tools at /mcp
+# The MCP server is created once and mounted at /mcp by app.main (see app/mcp_server/tools.py),
+# so this module only provides a uvicorn entry point for it.
+from app.main import app as fastapi_app
 
 app = fastapi_app  # To allow `uvicorn app.mcp_server.server:app`
 
@@ -0,0 +1,139 @@
+# backend/app/mcp_server/tools.py
+"""
+Builds the single MCP server exposed by the API.
+
+Only the operations in MCP_TOOL_OPERATIONS become tools, so the agent never sees account
+management endpoints and the tool schema sent to the LLM stays small. The tool manifest
+(MCP tool definitions plus the operation map used to call them) is generated once per
+process from just those routes, or loaded from MCP_TOOL_MANIFEST_PATH when that file exists
+and was generated from the same routes: the manifest stores a fingerprint of the app version,
+the tool routes and the source files that define them and their models, and a manifest whose
+fingerprint no longer matches is ignored and regenerated. Checking it reads a few files and
+builds no schema, so loading a manifest keeps the schema work out of startup.
+
+Precompute the manifest file with:
+    python -m app.mcp_server.tools mcp_manifest.json
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+from typing import Optional
+
+import httpx
+import mcp.types as types
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi_mcp import FastApiMCP
+from dotenv import load_dotenv
+
+import app.models as models
+
+load_dotenv()
+
+# operation_ids exposed to the agent. Task tools only: no user deletion or account changes.
+MCP_TOOL_OPERATIONS = [
+    "create_task",
+    "update_task",
+    "delete_single_task",
+    "delete_multiple_tasks",
+    "get_task_details",
+    "list_user_tasks",
+    "list_tasks_in_range",
+    "get_user_task_counts",
+    "search_tasks",
+    "create_recurring_task",
+    "list_recurring_tasks",
+    "delete_recurring_task",
+]
+
+MCP_TOOL_MANIFEST_PATH = os.getenv("MCP_TOOL_MANIFEST_PATH")
+
+def _tool_routes_app(app: FastAPI, with_routes: bool = True) -> FastAPI:
+    """
+    A bare FastAPI app carrying only the allow-listed routes of `app`. FastApiMCP walks the
+    routes of the app it is given, so this keeps schema generation down to the tool routes.
+    """
+    tool_app = FastAPI(title=app.title, description=app.description, version=app.version)
+    if with_routes:
+        tool_app.router.routes = [
+            route for route in app.routes
+            if isinstance(route, APIRoute) and route.operation_id in MCP_TOOL_OPERATIONS
+        ]
+    return tool_app
+
+def routes_fingerprint(app: FastAPI) -> str:
+    """
+    A hash of `app`'s version, its allow-listed routes (operation id, path, methods) and the
+    source of the modules defining them and the models: it changes whenever a tool route's
+    parameters, body or response models may have. Cheap enough to run on every startup.
+    """
+    digest = hashlib.sha256(app.version.encode())
+    source_files = {inspect.getsourcefile(models)}
+    for route in sorted(_tool_routes_app(app).routes, key=lambda route: route.operation_id):
+        digest.update(json.dumps([route.operation_id, route.path, sorted(route.methods)]).encode())
+        source_files.add(inspect.getsourcefile(route.endpoint))
+    for path in sorted(source_files):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def manifest_from_mcp(mcp: FastApiMCP, fingerprint: str) -> dict:
+    """Serializes an MCP server's tools and operation map into a JSON-able manifest."""
+    return {
+        "operations": sorted(tool.name for tool in mcp.tools),
+        "routes_fingerprint": fingerprint,
+        "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in mcp.tools],
+        "operation_map": mcp.operation_map,
+    }
+
+def load_manifest(path: Optional[str], fingerprint: str) -> Optional[dict]:
+    """
+    Reads a manifest file. Returns None when there is no file or when it was generated for a
+    different allow-list or from different routes (see routes_fingerprint), in which case the
+    caller regenerates it from the routes.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("operations") != sorted(MCP_TOOL_OPERATIONS):
+        print(f"MCP manifest at {path} does not match MCP_TOOL_OPERATIONS, regenerating it.")
+        return None
+    if manifest.get("routes_fingerprint") != fingerprint:
+        print(f"MCP manifest at {path} was generated from different tool routes, regenerating it.")
+        return None
+    return manifest
+
+def create_mcp(app: FastAPI, manifest_path: Optional[str] = MCP_TOOL_MANIFEST_PATH) -> FastApiMCP:
+    """
+    Creates the one MCP server for `app`. Call it after all routers are included, then mount
+    the result on `app`. Tool calls are dispatched in-process to `app` over ASGI.
+    """
+    manifest = load_manifest(manifest_path, routes_fingerprint(app)) if manifest_path else None
+    mcp = FastApiMCP(
+        # With a manifest there is nothing to generate, so hand FastApiMCP no routes at all
+        _tool_routes_app(app, with_routes=manifest is None),
+        name=app.title,
+        description=app.description,
+        include_operations=MCP_TOOL_OPERATIONS,
+        http_client=httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://apiserver",
+            timeout=10.0,
+        ),
+    )
+    if manifest is not None:
+        # The MCP handlers read these attributes on every call
+        mcp.tools = [types.Tool.model_validate(tool) for tool in manifest["tools"]]
+        mcp.operation_map = manifest["operation_map"]
+    return mcp
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m app.mcp_server.tools <manifest.json>")
+    from app.main import app
+    with open(sys.argv[1], "w") as f:
+        json.dump(manifest_from_mcp(create_mcp(app, manifest_path=None), routes_fingerprint(app)), f, indent=2)
+    print(f"Wrote MCP tool manifest for {len(MCP_TOOL_OPERATIONS)} operations to {sys.argv[1]}")
@@ -1,30 +1,38 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID, uuid4
 from pydantic import BaseModel
 from datetime import date
 
+from sqlalchemy import JSON, Column, ForeignKey, Index, false, func, literal_column, text
 from sqlmodel import Field, SQLModel, Relationship
 
 # --- User Models ---
 class UserBase(SQLModel):
     """Base model for user properties."""
-    # Username will be stored as lowercase for case-insensitive lookup
+    # Stored with its original casing; lookups are case-insensitive via ix_users_username_lower
     username: str = Field(unique=True, index=True, max_length=100)
 
 class User(UserBase, table=True):
     """Database model for the 'users' table."""
     __tablename__ = "users"
+    __table_args__ = (
+        # Usernames are matched case-insensitively (see crud.get_user_by_username); this both
+        # serves those lookups and keeps "Alice" and "alice" from coexisting
+        Index("ix_users_username_lower", func.lower(literal_column("username")), unique=True),
+    )
 
     user_id: UUID = Field(default_factory=uuid4, primary_key=True)
     hashed_password: str = Field(nullable=False) # Store hashed password
     is_verified: bool = Field(default=False) # New field for verification status
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     chat_id: UUID = Field(default_factory=uuid4, unique=True, nullable=False)
-    chat_messages: list["ChatMessage"] = Relationship(back_populates="user")
+    deleted_at: Optional[datetime] = Field(default=None) # Set while a deleted account's data is purged in the background
+    # Children are removed by ON DELETE CASCADE in the database; the ORM never loads them to delete them
+    chat_messages: list["ChatMessage"] = Relationship(back_populates="user", sa_relationship_kwargs={"passive_deletes": "all"})
 
     # Relationship to tasks
-    tasks: list["Task"] = Relationship(back_populates="owner")
+    tasks: list["Task"] = Relationship(back_populates="owner", sa_relationship_kwargs={"passive_deletes": "all"})
 
 class UserCreate(UserBase):
     """Pydantic model for creating a new user (registration)."""
@@ -52,15 +60,67 @@ class TaskBase(SQLModel):
     task_date: date = Field(default_factory=date.today, nullable=False, description="The logical date this task is for")
 
 
-class Task(TaskBase, table=True):
-    __tablename__ = "tasks"
+class TaskRecordBase(TaskBase):
+    """Columns shared by the hot 'tasks' table and the 'tasks_archive' table."""
     task_id: UUID = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     modified_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     previous_status: Optional[str] = Field(default=None, max_length=50)
     last_status_change_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # Set on occurrences of a recurring rule (see services/recurring_service.py)
+    recurring_rule_id: Optional[UUID] = Field(default=None, description="Recurring rule this task is an occurrence of, if any")
+    occurrence_date: Optional[date] = Field(default=None, description="The date of that occurrence, even if the task was moved since")
+
+def _user_id_cascade_field():
+    # Each table needs its own ForeignKey object, so this can't live on the shared base
+    return Field(nullable=False, index=True, sa_column_args=[ForeignKey("users.user_id", ondelete="CASCADE")])
+
+class Task(TaskRecordBase, table=True):
+    __tablename__ = "tasks"
+    __table_args__ = (
+        # Date-bounded per-user views (day, week and month) are index range scans
+        Index("ix_tasks_user_id_task_date", "user_id", "task_date"),
+        Index("ix_tasks_user_id_status_changed", "user_id", "current_status", "last_status_change_at"),
+        # The backlog view reads every backlog task up to a date; keep only those rows in its index
+        Index(
+            "ix_tasks_backlog_user_id_changed", "user_id", "last_status_change_at",
+            postgresql_where=text("current_status = 'backlog'"),
+            sqlite_where=text("current_status = 'backlog'"),
+        ),
+        # The rollover job finds overdue active tasks across all users (services/rollover_service.py)
+        Index(
+            "ix_tasks_active_task_date", "task_date",
+            postgresql_where=text("current_status = 'active'"),
+            sqlite_where=text("current_status = 'active'"),
+        ),
+        # Which recurring occurrences have been written (services/recurring_service.py)
+        Index(
+            "ix_tasks_recurring_occurrence", "recurring_rule_id", "occurrence_date",
+            postgresql_where=text("recurring_rule_id IS NOT NULL"),
+            sqlite_where=text("recurring_rule_id IS NOT NULL"),
+        ),
+    )
+    user_id: UUID = _user_id_cascade_field()
     owner: Optional[User] = Relationship(back_populates="tasks")
 
+class TaskArchive(TaskRecordBase, table=True):
+    """
+    Database model for the 'tasks_archive' table: completed tasks moved out of 'tasks' by the
+    archiver once they are older than TASK_ARCHIVE_AFTER_DAYS (see services/archive_service.py).
+    """
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_user_id_task_date", "user_id", "task_date"),
+        Index("ix_tasks_archive_user_id_changed", "user_id", "last_status_change_at"),
+        Index(
+            "ix_tasks_archive_recurring_occurrence", "recurring_rule_id", "occurrence_date",
+            postgresql_where=text("recurring_rule_id IS NOT NULL"),
+            sqlite_where=text("recurring_rule_id IS NOT NULL"),
+        ),
+    )
+    user_id: UUID = _user_id_cascade_field()
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
 # --- API Input/Output Models for Tasks ---
 class TaskCreateInput(SQLModel):
     """
@@ -87,6 +147,13 @@ class TaskBatchDeleteInput(SQLModel):
 class TaskCountRequest(SQLModel):
     target_date: date = Field(..., description="Filter counts for tasks for this date (YYYY-MM-DD)")
 
+class TaskRangeResponse(SQLModel):
+    """Pydantic model for tasks over a date range, grouped by date."""
+    start_date: date = Field(..., description="First date of the range (inclusive)")
+    end_date: date = Field(..., description="Last date of the range (inclusive)")
+    status: Optional[str] = Field(default=None, description="Status filter that was applied, if any")
+    tasks_by_date: Dict[date, List[Task]] = Field(default_factory=dict, description="Tasks for each date in the range, keyed by YYYY-MM-DD. Every date in the range is present.")
+
 class TaskStatusCounts(SQLModel):
     """Pydantic model for task status counts response."""
     active: int = Field(default=0, description="Number of active tasks")
@@ -94,19 +161,88 @@ class TaskStatusCounts(SQLModel):
     backlog: int = Field(default=0, description="Number of backlog tasks")
     total: int = Field(default=0, description="Total number of tasks")
 
+class TaskDashboard(SQLModel):
+    """Pydantic model for one day's task lists per status plus their counts."""
+    target_date: date = Field(..., description="The date the dashboard is for")
+    active: List[Task] = Field(default_factory=list, description="Active tasks for the date")
+    completed: List[Task] = Field(default_factory=list, description="Tasks completed on the date")
+    backlog: List[Task] = Field(default_factory=list, description="Tasks in backlog on or before the date")
+    counts: TaskStatusCounts = Field(..., description="Number of tasks in each list")
+
+class TaskImportRow(SQLModel):
+    """One task in an import file. Tasks are always imported as new tasks of the current user."""
+    task_description: str = Field(..., max_length=1000)
+    current_status: str = Field(default="active", max_length=50)
+    task_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    modified_at: Optional[datetime] = None
+    previous_status: Optional[str] = Field(default=None, max_length=50)
+    last_status_change_at: Optional[datetime] = None
+
+class TaskImportError(SQLModel):
+    """Pydantic model for a rejected row of an import."""
+    line: int = Field(..., description="Line of the file the row starts on (1-based; the CSV header is line 1)")
+    error: str = Field(..., description="Why the row was rejected")
+
+class TaskImportResult(SQLModel):
+    """Pydantic model for the outcome of a task import."""
+    imported: int = Field(default=0, description="Number of tasks created")
+    failed: int = Field(default=0, description="Number of rows rejected")
+    errors: List[TaskImportError] = Field(default_factory=list, description="Rejected rows (at most the first 100)")
+
+
+# --- Recurring Task Models ---
+class RecurringTaskRuleBase(SQLModel):
+    task_description: str = Field(nullable=False, max_length=1000, description="Description of every occurrence")
+    rrule: str = Field(nullable=False, max_length=500, description="RRULE-style recurrence, e.g. 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'")
+    start_date: date = Field(default_factory=date.today, nullable=False, description="First date the rule can occur on")
+
+class RecurringTaskRule(RecurringTaskRuleBase, table=True):
+    """
+    Database model for the 'recurring_task_rules' table. Occurrences are not stored: they are
+    listed as virtual tasks and only written to 'tasks' once they are changed, or once their
+    date has passed and the rollover job moves them to backlog.
+    """
+    __tablename__ = "recurring_task_rules"
+    rule_id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = _user_id_cascade_field()
+    until: Optional[date] = Field(default=None, description="Last date the rule can occur on (from UNTIL or COUNT)")
+    excluded_dates: List[str] = Field(default_factory=list, sa_column=Column(JSON, nullable=False), description="Dates (YYYY-MM-DD) whose occurrence was deleted")
+    rolled_over_until: Optional[date] = Field(default=None, description="Occurrences up to this date have been written to 'tasks' by the rollover job")
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    modified_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+class RecurringTaskRuleCreate(SQLModel):
+    """Pydantic model for the request body when creating a recurring task."""
+    task_description: str = Field(..., max_length=1000, description="Description of every occurrence")
+    rrule: str = Field(..., max_length=500, description="RRULE-style recurrence: FREQ (DAILY, WEEKLY, MONTHLY or YEARLY) plus optional INTERVAL, BYDAY, BYMONTHDAY, UNTIL and COUNT, e.g. 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'")
+    start_date: Optional[date] = Field(None, description="First date the rule can occur on. If omitted, uses today (server date).")
+
+class RecurringTaskRuleUpdate(SQLModel):
+    """Pydantic model for the request body when updating a recurring task. Occurrences already written as tasks keep their values."""
+    task_description: Optional[str] = Field(default=None, max_length=1000, description="New description for the occurrences")
+    rrule: Optional[str] = Field(default=None, max_length=500, description="New recurrence")
+
 
 # --- Chat Models ---
 class ChatMessageBase(SQLModel):
     """Base model for chat message properties."""
-    chat_id: UUID = Field(foreign_key="users.chat_id", nullable=False, index=True) # Links to User's chat_id
+    chat_id: UUID = Field(nullable=False, index=True, sa_column_args=[ForeignKey("users.chat_id", ondelete="CASCADE")]) # Links to User's chat_id
     is_user: bool = Field(nullable=False) # True if user sent, False otherwise
     is_agent: bool = Field(nullable=False) # True if agent sent, False otherwise
     content: str = Field(nullable=False)
     timestamp: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    is_summary: bool = Field(default=False, nullable=False, sa_column_kwargs={"server_default": false()}) # True for rows produced by compacting older turns
 
 class ChatMessage(ChatMessageBase, table=True):
     """Database model for the 'chat_messages' table."""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # History is always read per chat in time order
+        Index("ix_chat_messages_chat_id_timestamp", "chat_id", "timestamp"),
+        # Retention and compaction select old messages across all chats
+        Index("ix_chat_messages_timestamp", "timestamp"),
+    )
     message_id: UUID = Field(default_factory=uuid4, primary_key=True)
 
     user: Optional[User] = Relationship(back_populates="chat_messages") # Relationship back to User
@@ -119,6 +255,7 @@ class ChatResponse(SQLModel):
     """Pydantic model for chat response."""
     agent_response: str = Field(..., description="Response from the AI agent")
     message_id: UUID = Field(..., description="ID of the stored agent message")
+    degraded: bool = Field(False, description="True when the agent could not answer and this is a fallback reply; sending the message again may get a real answer")
 
 class ChatMessageRead(SQLModel):
     """Pydantic model for reading chat messages."""
@@ -128,11 +265,47 @@ class ChatMessageRead(SQLModel):
     content: str
     timestamp: datetime
     message_id: UUID
+    is_summary: bool = False
 
     class Config:
         from_attributes = True
 
 
+# --- Idempotency Models ---
+class IdempotencyRecord(SQLModel, table=True):
+    """
+    Database model for the 'idempotency_keys' table: the first response to a request sent
+    with an Idempotency-Key, replayed for retries of that request.
+    """
+    __tablename__ = "idempotency_keys"
+    user_id: UUID = Field(primary_key=True)
+    endpoint: str = Field(primary_key=True, max_length=100)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(nullable=False, max_length=64) # sha256 of the request body
+    response_body: Optional[str] = Field(default=None) # JSON; None while the first request is still running
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
+
+# --- Agent Trace Models ---
+class AgentTrace(SQLModel, table=True):
+    """
+    Database model for the 'agent_traces' table: the stage timings of agent runs slower than
+    AGENT_TRACE_SLOW_MS (see services/agent_trace_service.py). No message or tool content is kept.
+    """
+    __tablename__ = "agent_traces"
+    trace_id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: Optional[UUID] = Field(default=None, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+    duration_ms: float = Field(nullable=False)
+    llm_calls: int = Field(default=0, nullable=False)
+    tool_calls: int = Field(default=0, nullable=False)
+    prompt_tokens: int = Field(default=0, nullable=False)
+    completion_tokens: int = Field(default=0, nullable=False)
+    model_tier: Optional[str] = Field(default=None, max_length=20) # tier that produced the reply
+    escalated: Optional[bool] = Field(default=None) # True when a fast-tier run was retried on the strong tier
+    spans: List[dict] = Field(default_factory=list, sa_column=Column(JSON, nullable=False)) # [{stage, name, start_ms, duration_ms, ...}]
+
+
 # --- Authentication Models ---
 class LoginRequest(SQLModel):
     """Model for user login request."""
@@ -0,0 +1,150 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it sends the PROFILING_TOKEN in the X-Profile-Token header, or is
+picked by PROFILING_SAMPLE_RATE. It then runs under pyinstrument, a sampling profiler (an
+HTML flamegraph). Without pyinstrument, token-triggered requests fall back to cProfile (a
+.pstats file, e.g. for snakeviz), but sampling is off: cProfile instruments every call, which
+is too much overhead for production traffic. The profile is saved in PROFILING_DIR under a
+generated id, which the response returns in the X-Profile-Id header; the newest
+PROFILING_MAX_PROFILES are kept.
+
+Profilers follow the whole event loop thread, so only one request is profiled at a time.
+cProfile also counts other requests' work done while the profiled one awaits, and misses work
+handed to threads (sync dependencies, asyncio.to_thread).
+
+Profiles are listed and downloaded through /admin/profiles (see routers/profiling_router.py).
+"""
+import asyncio
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+from uuid import uuid4
+
+from fastapi import Request
+from dotenv import load_dotenv
+
+try:
+    from pyinstrument import Profiler
+except ImportError: # optional; cProfile is the fallback
+    Profiler = None
+
+load_dotenv()
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") # unset disables header-triggered profiles, /admin/profiles and /metrics
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0")) # fraction of all requests, e.g. 0.001
+if PROFILING_SAMPLE_RATE > 0 and Profiler is None:
+    print("PROFILING_SAMPLE_RATE is ignored: sampling requests needs pyinstrument, cProfile's overhead is too high.")
+    PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "tapyou-profiles"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "200"))
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_FORMATS = {"html": "text/html", "pstats": "application/octet-stream"}
+
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_profiling_active = False
+
+def profiling_enabled() -> bool:
+    return bool(PROFILING_TOKEN) or PROFILING_SAMPLE_RATE > 0
+
+def has_profiling_token(request: Request) -> bool:
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    return bool(PROFILING_TOKEN and token) and hmac.compare_digest(token, PROFILING_TOKEN)
+
+def _save_profile(profiler, profile_id: str, metadata: dict):
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    if Profiler is not None:
+        metadata["format"] = "html"
+        with open(os.path.join(PROFILING_DIR, f"{profile_id}.html"), "w") as f:
+            f.write(profiler.output_html())
+    else:
+        metadata["format"] = "pstats"
+        profiler.dump_stats(os.path.join(PROFILING_DIR, f"{profile_id}.pstats"))
+    with open(os.path.join(PROFILING_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump(metadata, f)
+
+    # Keep only the newest profiles
+    for stale in list_profiles()[PROFILING_MAX_PROFILES:]:
+        for extension in ("json", stale["format"]):
+            try:
+                os.remove(os.path.join(PROFILING_DIR, f"{stale['profile_id']}.{extension}"))
+            except OSError:
+                pass
+
+async def profile_requests(request: Request, call_next):
+    """HTTP middleware that profiles requests carrying the token, or sampled ones."""
+    global _profiling_active
+    wanted = has_profiling_token(request) or (PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE)
+    if not wanted or _profiling_active:
+        return await call_next(request)
+
+    _profiling_active = True
+    # Always a new id: a caller-chosen one could overwrite an existing profile
+    profile_id = uuid4().hex
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    try:
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            response = await call_next(request)
+        finally:
+            if Profiler is not None:
+                profiler.stop()
+            else:
+                profiler.disable()
+    finally:
+        _profiling_active = False
+
+    metadata = {
+        "profile_id": profile_id,
+        "request_id": request.headers.get("X-Request-ID"),
+        "method": request.method,
+        "path": request.url.path,
+        "status_code": response.status_code,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "created_at": started_at.isoformat(),
+    }
+    try:
+        await asyncio.to_thread(_save_profile, profiler, profile_id, metadata)
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    except Exception as e:
+        print(f"Could not save profile {profile_id}: {e}")
+    return response
+
+def list_profiles() -> List[dict]:
+    """Saved profiles' metadata, newest first."""
+    if not os.path.isdir(PROFILING_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILING_DIR):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(PROFILING_DIR, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """The saved profile file for `profile_id`, or None."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for extension in PROFILE_FORMATS:
+        path = os.path.join(PROFILING_DIR, f"{profile_id}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
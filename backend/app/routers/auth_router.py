@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm # New import
-from sqlmodel import Session, select
+from sqlmodel import Session
 from jose import jwt, JWTError # Correct import for jwt operations
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy import func
+from uuid import UUID
 from passlib.context import CryptContext # For password hashing
-from ..database import get_session
+from ..database import get_session, get_read_session_for_user
 import app.models as models
+from ..crud import get_user_by_username
 
 router = APIRouter(
     prefix="/auth",
@@ -45,8 +46,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 # --- Dependency to get current authenticated user ---
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> models.User:
-    """Decodes JWT and retrieves the user from the database."""
+def _token_user_id(token: str) -> UUID:
+    """Decodes a JWT into the user_id it was issued for. Raises 401 for an invalid token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -58,9 +59,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
         username: str = payload.get("username")
         if user_id is None or username is None:
             raise credentials_exception
-    except JWTError:
+        return UUID(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
 
+async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> models.User:
+    """Decodes JWT and retrieves the user from the database."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user_id = _token_user_id(token)
+
     user = session.get(models.User, user_id) # Retrieve user by ID
     if user is None:
         raise credentials_exception
@@ -72,6 +83,18 @@ async def get_current_active_user(current_user: models.User = Depends(get_curren
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not verified")
     return current_user
 
+def get_read_session(token: str = Depends(oauth2_scheme)):
+    """
+    Dependency for read-only endpoints. Routes the session to a read replica when one is
+    configured, unless the authenticated user wrote recently (read-your-writes). The user is
+    taken from the token, so choosing the session runs no query on the primary.
+    """
+    yield from get_read_session_for_user(_token_user_id(token))
+
+async def get_current_read_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_read_session)) -> models.User:
+    """get_current_active_user for read-only endpoints: the user is looked up through the read session."""
+    return await get_current_active_user(await get_current_user(token, session))
+
 # --- Endpoints ---
 @router.post(
     "/login",
@@ -94,7 +117,7 @@ async def login_user(
     Verifies username and password, then checks if the user is verified.
     """
     # Look up user by lowercase username for case-insensitivity
-    user = session.exec(select(models.User).where(func.lower(models.User.username) == func.lower(form_data.username))).first()
+    user = get_user_by_username(session, form_data.username)
 
     if not user:
         raise HTTPException(
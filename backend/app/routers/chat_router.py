@@ -130,16 +130,23 @@
 #         message_id=stored_agent_message.message_id
     # )
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from app.models import User, ChatInput, ChatResponse, ChatMessage, ChatMessageRead
-from app.database import get_session
-from .auth_router import get_current_active_user, oauth2_scheme
-from app.services.agent_service import call_agent_on_message
-from app.crud import store_chat_message_in_db, get_chat_history_from_db
+from app.database import engine, get_session
+from app.invalidation import invalidation_bus, CHATS_TOPIC
+from .auth_router import get_current_active_user, get_current_read_user, get_read_session, oauth2_scheme
+from app.crud import store_chat_turn, get_chat_history_from_db
+from app.services.chat_write_service import CHAT_WRITE_BEHIND, chat_write_batcher
+from app.services.agent_trace_service import AgentRunTrace
+from app.services.fast_path_service import TIMEOUT_REPLY, fast_path_reply
+from app.services.llm_resilience import LLMUnavailable, TurnBudgetExceeded, llm_breaker
+from app.services.chat_turn_service import ChatQueueFull, chat_turn_queue
+from app.idempotency import run_once
 
 
-from sqlalchemy.orm import Session
-from typing import List
+from sqlmodel import Session
+import traceback
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime, date
 
@@ -147,46 +154,116 @@ from app.models import User, ChatMessage
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
-@router.post("/", response_model=ChatResponse)
+@router.post(
+    "/",
+    response_model=ChatResponse,
+    summary="Send a message to the AI agent",
+    description=(
+        "Runs one agent turn per chat at a time. Messages sent while a turn is running are "
+        "answered together by the next turn, and every request in that turn gets the same reply."
+    ),
+)
 async def chat(
     chat_input: ChatInput,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     session = Depends(get_session),
-    token: str = Depends(oauth2_scheme)
+    token: str = Depends(oauth2_scheme),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, include_in_schema=False),
 ):
     user_chat_id = current_user.chat_id
     if not user_chat_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User does not have an associated chat_id.")
 
+    trace = AgentRunTrace(user_id=current_user.user_id)
+    # A retried send replays the first reply instead of running the agent again, unless that
+    # reply was a fallback: then the retry gets another chance at a real answer
+    reply = await run_once(
+        current_user.user_id, "chat", idempotency_key, chat_input, ChatResponse,
+        lambda: run_chat_turn(chat_input, current_user, session, token, trace),
+        should_store=lambda reply: not reply.degraded,
+    )
+    if trace.spans: # empty for a replayed reply
+        response.headers["Server-Timing"] = trace.server_timing()
+    return reply
+
+async def run_chat_turn(chat_input: ChatInput, current_user: User, session, token: str, trace: AgentRunTrace) -> ChatResponse:
+    user_id, user_chat_id = current_user.user_id, current_user.chat_id
     user_message = ChatMessage(
         chat_id=user_chat_id,
         is_user=True,
         is_agent=False,
         content=chat_input.message
     )
+    # Give the request's connection back to the pool: the turn may wait in the queue and on the
+    # LLM for a while, and stores its messages through a session of its own
+    session.close()
 
-    print(f"Storing user message in database...", user_message)
-    await store_chat_message_in_db(user_message, session)
-
+    # One turn at a time per chat; messages sent while a turn runs are answered together by
+    # the next one (see services/chat_turn_service.py)
     try:
-        agent_reply = await call_agent_on_message(chat_input.message, auth_token=token)
-    except Exception as e:
-        agent_reply = "Sorry, an error occurred while processing the request."
+        return await chat_turn_queue.submit(
+            user_chat_id, user_message,
+            lambda user_messages: answer_chat_turn(user_messages, user_id, user_chat_id, token, trace),
+        )
+    except ChatQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many messages are waiting for a reply in this chat. Please wait for the agent to answer.",
+        )
 
-    agent_message = ChatMessage(
-        chat_id=user_chat_id,
-        is_user=False,
-        is_agent=True,
-        content=agent_reply
+async def answer_chat_turn(user_messages: List[ChatMessage], user_id: UUID, user_chat_id: UUID, token: str, trace: AgentRunTrace) -> ChatResponse:
+    """Runs the agent once on a turn's user messages and stores them with its reply."""
+    # A double-send is one message for the agent to answer, not two; both are still stored
+    message = "\n".join(
+        user_message.content for i, user_message in enumerate(user_messages)
+        if i == 0 or user_message.content != user_messages[i - 1].content
     )
-    await store_chat_message_in_db(agent_message, session)
 
-    return ChatResponse(agent_response=agent_reply, message_id=agent_message.message_id)
+    degraded = True # until the agent answers
+    agent_reply = None # None: answer from the fast path
+    # While the breaker is open the LLM provider is failing: answer at once instead of
+    # queueing behind it
+    if not llm_breaker.is_open():
+        try:
+            # Imported on first use: the langchain/OpenAI stack is heavy and only chat needs it
+            from app.services.agent_service import call_agent_on_message
+            agent_reply = await call_agent_on_message(message, auth_token=token, trace=trace)
+            degraded = False
+        except LLMUnavailable:
+            pass
+        except TurnBudgetExceeded:
+            agent_reply = TIMEOUT_REPLY
+        except Exception as e:
+            print(f"Agent run failed for user {user_id}: {e}")
+            traceback.print_exc()
+            agent_reply = "Sorry, an error occurred while processing the request."
+
+    with Session(engine) as session:
+        if agent_reply is None:
+            agent_reply = fast_path_reply(message, user_id, session)
+        agent_message = ChatMessage(
+            chat_id=user_chat_id,
+            is_user=False,
+            is_agent=True,
+            content=agent_reply
+        )
+        # The user messages are stored together with the reply: one transaction per turn. Their
+        # timestamps were taken when they arrived, so history order is unchanged.
+        with trace.stage("chat_store"):
+            if CHAT_WRITE_BEHIND:
+                await chat_write_batcher.write([*user_messages, agent_message])
+            else:
+                await store_chat_turn(user_messages, agent_message, session)
+        message_id = agent_message.message_id
+    invalidation_bus.publish(CHATS_TOPIC, user_id)
+
+    return ChatResponse(agent_response=agent_reply, message_id=message_id, degraded=degraded)
 
 @router.get("/history", response_model=List[ChatMessageRead], summary="Retrieve chat history for the authenticated user")
 async def get_chat_history(
-    current_user: User = Depends(get_current_active_user),
-    session = Depends(get_session)
+    current_user: User = Depends(get_current_read_user),
+    session = Depends(get_read_session)
 ):
     print(f"=== CHAT HISTORY GET ENDPOINT CALLED ===")
     print(f"Current User ID: {current_user.user_id}")
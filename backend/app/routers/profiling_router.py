@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from typing import List
+import os
+
+from ..profiling import PROFILE_FORMATS, has_profiling_token, list_profiles, profile_path
+
+# Operational endpoints: kept out of the OpenAPI schema so they never become MCP tools
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["Admin"],
+    include_in_schema=False,
+)
+
+def require_profiling_token(request: Request):
+    """Only callers sending the PROFILING_TOKEN in X-Profile-Token may read profiles and metrics."""
+    if not has_profiling_token(request):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="A valid X-Profile-Token header is required.")
+
+@router.get("/", dependencies=[Depends(require_profiling_token)])
+async def list_request_profiles(limit: int = 50) -> List[dict]:
+    """
+    **Endpoint to list the most recent request profiles, newest first.**
+    """
+    return list_profiles()[:limit]
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def download_request_profile(profile_id: str):
+    """
+    **Endpoint to download a profile: an HTML flamegraph (pyinstrument) or a .pstats file (cProfile).**
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile '{profile_id}' not found.")
+    extension = os.path.splitext(path)[1].lstrip(".")
+    return FileResponse(path, media_type=PROFILE_FORMATS[extension], filename=os.path.basename(path))
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import Session, select
+from typing import List
+from uuid import UUID
+from datetime import datetime, date
+
+from ..database import get_session
+from ..services.recurring_service import last_occurrence_date
+import app.models as models
+from .auth_router import get_current_active_user, get_current_read_user, get_read_session
+from .task_router import task_write_committed
+
+router = APIRouter(
+    prefix="/recurring-tasks",
+    tags=["Recurring Tasks"],
+)
+
+def _get_owned_rule(session: Session, rule_id: UUID, current_user: models.User, action: str) -> models.RecurringTaskRule:
+    rule = session.get(models.RecurringTaskRule, rule_id)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Recurring task with ID '{rule_id}' not found."
+        )
+    if rule.user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"You are not authorized to {action} this recurring task."
+        )
+    return rule
+
+@router.post(
+    "/",
+    response_model=models.RecurringTaskRule,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a recurring task for the authenticated user",
+    description="Creates a task that repeats according to an RRULE-style recurrence, e.g. 'FREQ=DAILY', 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR' or 'FREQ=MONTHLY;BYMONTHDAY=1;COUNT=12'. Its occurrences appear as active tasks in the task lists and counts of the dates they fall on, and can be updated or deleted like any task. Use this instead of creating the same task for many dates.",
+    operation_id="create_recurring_task",
+    responses={
+        201: {"description": "Recurring task successfully created."},
+        400: {"model": models.MessageResponse, "description": "Invalid or unsupported recurrence."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def create_recurring_task(
+    *,
+    session: Session = Depends(get_session),
+    rule_input: models.RecurringTaskRuleCreate,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    **Endpoint to create a recurring task.**
+    Occurrences are not stored until they are changed.
+    """
+    start_date = rule_input.start_date or date.today()
+    try:
+        until = last_occurrence_date(rule_input.rrule, start_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rule = models.RecurringTaskRule(
+        user_id=current_user.user_id,
+        task_description=rule_input.task_description,
+        rrule=rule_input.rrule,
+        start_date=start_date,
+        until=until,
+    )
+    session.add(rule)
+    session.commit()
+    task_write_committed(current_user.user_id)
+    session.refresh(rule)
+    return rule
+
+@router.get(
+    "/",
+    response_model=List[models.RecurringTaskRule],
+    summary="List the authenticated user's recurring tasks",
+    description="Retrieves every recurring task of the user, including ones that have ended.",
+    operation_id="list_recurring_tasks",
+    responses={
+        200: {"description": "Recurring tasks retrieved successfully."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def list_recurring_tasks(
+    *,
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user),
+):
+    """
+    **Endpoint to list recurring tasks.**
+    """
+    return session.exec(
+        select(models.RecurringTaskRule)
+        .where(models.RecurringTaskRule.user_id == current_user.user_id)
+        .order_by(models.RecurringTaskRule.created_at)
+    ).all()
+
+@router.get(
+    "/{rule_id}",
+    response_model=models.RecurringTaskRule,
+    summary="Retrieve a recurring task",
+    description="Fetches a recurring task by its rule_id.",
+    operation_id="get_recurring_task",
+    responses={
+        200: {"description": "Recurring task retrieved successfully."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+        403: {"model": models.MessageResponse, "description": "Not authorized to view this recurring task."},
+        404: {"model": models.MessageResponse, "description": "Recurring task not found."},
+    }
+)
+async def get_recurring_task(
+    *,
+    session: Session = Depends(get_read_session),
+    rule_id: UUID,
+    current_user: models.User = Depends(get_current_read_user),
+):
+    """
+    **Endpoint to retrieve a recurring task by its ID.**
+    """
+    return _get_owned_rule(session, rule_id, current_user, "view")
+
+@router.put(
+    "/{rule_id}",
+    response_model=models.RecurringTaskRule,
+    summary="Update a recurring task",
+    description="Changes the description or recurrence of a recurring task. Occurrences that were already updated keep their own values.",
+    operation_id="update_recurring_task",
+    responses={
+        200: {"description": "Recurring task successfully updated."},
+        400: {"model": models.MessageResponse, "description": "Invalid or unsupported recurrence."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+        403: {"model": models.MessageResponse, "description": "Not authorized to modify this recurring task."},
+        404: {"model": models.MessageResponse, "description": "Recurring task not found."},
+    }
+)
+async def update_recurring_task(
+    *,
+    session: Session = Depends(get_session),
+    rule_id: UUID,
+    rule_input: models.RecurringTaskRuleUpdate,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    **Endpoint to update a recurring task by its ID.**
+    """
+    rule = _get_owned_rule(session, rule_id, current_user, "modify")
+    if rule_input.rrule is not None:
+        try:
+            rule.until = last_occurrence_date(rule_input.rrule, rule.start_date)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        rule.rrule = rule_input.rrule
+    if rule_input.task_description is not None:
+        rule.task_description = rule_input.task_description
+    rule.modified_at = datetime.utcnow()
+    session.add(rule)
+    session.commit()
+    task_write_committed(current_user.user_id)
+    session.refresh(rule)
+    return rule
+
+@router.delete(
+    "/{rule_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a recurring task",
+    description="Stops a task from recurring. Occurrences that were already updated (e.g. completed) are kept as ordinary tasks.",
+    operation_id="delete_recurring_task",
+    responses={
+        204: {"description": "Recurring task successfully deleted."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+        403: {"model": models.MessageResponse, "description": "Not authorized to delete this recurring task."},
+        404: {"model": models.MessageResponse, "description": "Recurring task not found."},
+    }
+)
+async def delete_recurring_task(
+    *,
+    session: Session = Depends(get_session),
+    rule_id: UUID,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    **Endpoint to delete a recurring task by its ID.**
+    """
+    rule = _get_owned_rule(session, rule_id, current_user, "delete")
+    session.delete(rule)
+    session.commit()
+    task_write_committed(current_user.user_id)
+    return None
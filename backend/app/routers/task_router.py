@@ -1,19 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, func
-from typing import Optional, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select, func, or_
+from typing import Optional, List, Dict
 from uuid import UUID
-from datetime import datetime, date
-
-from ..database import get_session
+import asyncio
+import tempfile
+from datetime import datetime, date, time, timedelta
+
+from ..database import engine, get_read_engine, get_session
+from ..cache import task_view_cache
+from ..invalidation import invalidation_bus, TASKS_TOPIC
+from ..search import search_tasks as run_task_search
+from ..idempotency import run_once
+from ..services.archive_service import archived_tasks, delete_archived_task, get_archived_task, restore_archived_task
+from ..services.task_transfer_service import export_tasks as export_task_rows, import_tasks as import_task_rows
+from ..services.recurring_service import exclude_occurrence, find_occurrence, virtual_occurrences
+from ..services.rollover_service import roll_over_tasks
 import app.models as models
 # Import authentication helpers
-from .auth_router import get_current_active_user # Only need active user now
+from .auth_router import get_current_active_user, get_current_read_user, get_read_session # Only need active user now
 
 router = APIRouter(
     prefix="/tasks",
     tags=["Tasks"],
 )
 
+MAX_RANGE_DAYS = 92 # a quarter; enough for month views with leading/trailing weeks
+TASK_IMPORT_MAX_BYTES = 50 * 1024 * 1024
+TASK_TRANSFER_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _day_start(day: date) -> datetime:
+    """Midnight at the start of `day`, for half-open datetime ranges that can use an index."""
+    return datetime.combine(day, time.min)
+
+def task_write_committed(user_id: UUID):
+    """
+    Announces a committed task mutation on the invalidation bus. Every worker then
+    drops the user's cached task views and pins their reads to the primary.
+    """
+    invalidation_bus.publish(TASKS_TOPIC, user_id)
+
 @router.post(
     "/",
     response_model=models.Task,
@@ -31,25 +57,31 @@ async def create_task(
     *,
     session: Session = Depends(get_session),
     task_input: models.TaskCreateInput, # Use the proper input model
-    current_user: models.User = Depends(get_current_active_user) # Get authenticated user
+    current_user: models.User = Depends(get_current_active_user), # Get authenticated user
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, include_in_schema=False),
 ):
     """
     **Endpoint to create a new task.**
+    A retry carrying the same `Idempotency-Key` header returns the task created by the first request.
     """
-    # user_id comes directly from the authenticated user
-    task_date = task_input.task_date or date.today()
-    db_task_base = models.TaskBase(
-        user_id=current_user.user_id, # User ID from JWT
-        task_date=task_date,
-        current_status=task_input.current_status,
-        task_description=task_input.task_description
-    )
-    print(f"task_date: {task_date}")
-    db_task = models.Task.model_validate(db_task_base)
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
-    return db_task
+    async def create():
+        # user_id comes directly from the authenticated user
+        task_date = task_input.task_date or date.today()
+        db_task_base = models.TaskBase(
+            user_id=current_user.user_id, # User ID from JWT
+            task_date=task_date,
+            current_status=task_input.current_status,
+            task_description=task_input.task_description
+        )
+        print(f"task_date: {task_date}")
+        db_task = models.Task.model_validate(db_task_base)
+        session.add(db_task)
+        session.commit()
+        task_write_committed(current_user.user_id)
+        session.refresh(db_task)
+        return db_task
+
+    return await run_once(current_user.user_id, "create_task", idempotency_key, task_input, models.Task, create)
 
 @router.put(
     "/{task_id}",
@@ -75,8 +107,13 @@ async def update_task(
 ):
     """
     **Endpoint to update an existing task by its ID.**
+    Updating an occurrence of a recurring task writes it to the database as a task.
     """
-    db_task = session.get(models.Task, task_id)
+    db_task = (
+        session.get(models.Task, task_id) or
+        restore_archived_task(session, task_id) or
+        find_occurrence(session, current_user.user_id, task_id)
+    )
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -106,6 +143,7 @@ async def update_task(
     db_task.modified_at = datetime.utcnow()
     session.add(db_task)
     session.commit()
+    task_write_committed(current_user.user_id)
     session.refresh(db_task)
     return db_task
 
@@ -132,6 +170,13 @@ async def delete_single_task(
     **Endpoint to delete a specific task by its ID.**
     """
     db_task = session.get(models.Task, task_id)
+    archived = False
+    if db_task is None:
+        # Detached copy: an archived task is deleted from the archive, not restored first
+        db_task = get_archived_task(session, task_id)
+        archived = db_task is not None
+    if db_task is None:
+        db_task = find_occurrence(session, current_user.user_id, task_id)
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -145,8 +190,14 @@ async def delete_single_task(
             detail="You are not authorized to delete this task."
         )
 
-    session.delete(db_task)
+    if db_task.recurring_rule_id is not None:
+        exclude_occurrence(session, db_task)
+    if archived:
+        delete_archived_task(session, task_id)
+    elif db_task in session: # a recurring occurrence may never have been written
+        session.delete(db_task)
     session.commit()
+    task_write_committed(current_user.user_id)
     return None
 
 @router.delete(
@@ -185,6 +236,13 @@ async def delete_multiple_tasks(
             (models.Task.user_id == current_user.user_id)
         )
     ).all()
+    # Completed tasks may have been moved to the archive
+    user_tasks += session.exec(
+        select(models.TaskArchive).where(
+            (models.TaskArchive.task_id.in_(task_ids)) &
+            (models.TaskArchive.user_id == current_user.user_id)
+        )
+    ).all()
 
     # Check if all requested tasks were found and belong to the user
     found_task_ids = {task.task_id for task in user_tasks}
@@ -198,13 +256,250 @@ async def delete_multiple_tasks(
 
     # Delete all tasks
     for task in user_tasks:
+        if task.recurring_rule_id is not None:
+            exclude_occurrence(session, task)
         session.delete(task)
 
     session.commit()
+    task_write_committed(current_user.user_id)
     return models.MessageResponse(
         message=f"Successfully deleted {len(user_tasks)} tasks."
     )
 
+@router.get(
+    "/dashboard",
+    response_model=models.TaskDashboard,
+    tags=["Tasks"],
+    summary="Get a day's tasks per status and their counts",
+    description="Returns the active, completed and backlog task lists for target_date together with their counts, from a single query. Equivalent to calling list_user_tasks for each status plus get_user_task_counts.",
+    operation_id="get_task_dashboard",
+    responses={
+        200: {"description": "Dashboard retrieved successfully."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def get_task_dashboard(
+    *,
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user),
+    target_date: date = Query(..., description="The date to build the dashboard for (YYYY-MM-DD)"),
+):
+    """
+    **Endpoint to get the tasks and counts for one day in a single round-trip.**
+    """
+    cache_params = {"target_date": target_date}
+    cached_dashboard = task_view_cache.get(current_user.user_id, "get_task_dashboard", cache_params)
+    if cached_dashboard is not None:
+        return models.TaskDashboard(
+            target_date=target_date,
+            counts=models.TaskStatusCounts.model_validate(cached_dashboard["counts"]),
+            **{
+                task_status: [models.Task.model_validate(task) for task in cached_dashboard[task_status]]
+                for task_status in ("active", "completed", "backlog")
+            },
+        )
+    cache_generation = task_view_cache.generation(current_user.user_id)
+
+    next_day = _day_start(target_date + timedelta(days=1))
+    tasks = session.exec(
+        select(models.Task).where(
+            (models.Task.user_id == current_user.user_id) &
+            or_(
+                # Same per-status date rules as list_user_tasks and get_user_task_counts
+                (models.Task.current_status == "active") & (models.Task.task_date == target_date),
+                (models.Task.current_status == "completed") &
+                    (models.Task.last_status_change_at >= _day_start(target_date)) &
+                    (models.Task.last_status_change_at < next_day),
+                (models.Task.current_status == "backlog") & (models.Task.last_status_change_at < next_day),
+            )
+        ).order_by(models.Task.created_at.desc())
+    ).all()
+
+    tasks += archived_tasks(session, current_user.user_id, target_date, target_date, "completed")
+    tasks += virtual_occurrences(session, current_user.user_id, target_date, target_date)
+
+    tasks_by_status = {"active": [], "completed": [], "backlog": []}
+    for task in tasks:
+        tasks_by_status[task.current_status].append(task)
+    dashboard = models.TaskDashboard(
+        target_date=target_date,
+        counts=models.TaskStatusCounts(
+            active=len(tasks_by_status["active"]),
+            completed=len(tasks_by_status["completed"]),
+            backlog=len(tasks_by_status["backlog"]),
+            total=len(tasks),
+        ),
+        **tasks_by_status,
+    )
+    task_view_cache.set(current_user.user_id, cache_generation, "get_task_dashboard", cache_params, dashboard)
+    return dashboard
+
+@router.get(
+    "/range",
+    response_model=models.TaskRangeResponse,
+    tags=["Tasks"],
+    summary="List tasks for a date range, grouped by date",
+    description="Retrieves the user's tasks for every date from start_date to end_date (inclusive) in one call, grouped by date, e.g. for week or month views. Status semantics match list_user_tasks: no status or 'active' use the task date, 'completed' uses the date the task was completed, and a 'backlog' task appears on every date on or after it moved to backlog.",
+    operation_id="list_tasks_in_range",
+    responses={
+        200: {"description": "Tasks retrieved successfully."},
+        400: {"model": models.MessageResponse, "description": "Invalid date range or status."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def list_tasks_in_range(
+    *,
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user),
+    start_date: date = Query(..., description="First date of the range (YYYY-MM-DD), inclusive."),
+    end_date: date = Query(..., description="Last date of the range (YYYY-MM-DD), inclusive."),
+    status: Optional[str] = Query(None, description="Filter tasks by current status ('active', 'completed', 'backlog'). If not provided, returns all tasks by task date."),
+):
+    """
+    **Endpoint to list tasks over a date range with a single query.**
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date.")
+    day_count = (end_date - start_date).days + 1
+    if day_count > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days.")
+    status_filter = status.lower() if status else None
+
+    query = select(models.Task).where(models.Task.user_id == current_user.user_id)
+    if status_filter is None or status_filter == "active":
+        if status_filter:
+            query = query.where(models.Task.current_status == "active")
+        query = query.where((models.Task.task_date >= start_date) & (models.Task.task_date <= end_date))
+    elif status_filter == "completed":
+        query = query.where(
+            (models.Task.current_status == "completed") &
+            (models.Task.last_status_change_at >= _day_start(start_date)) &
+            (models.Task.last_status_change_at < _day_start(end_date + timedelta(days=1)))
+        )
+    elif status_filter == "backlog":
+        query = query.where(
+            (models.Task.current_status == "backlog") &
+            (models.Task.last_status_change_at < _day_start(end_date + timedelta(days=1)))
+        )
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid status filter. Status must be 'active', 'completed', or 'backlog'."
+        )
+    tasks = session.exec(query.order_by(models.Task.created_at.desc())).all()
+    tasks += archived_tasks(session, current_user.user_id, start_date, end_date, status_filter)
+    if status_filter is None or status_filter == "active":
+        tasks += virtual_occurrences(session, current_user.user_id, start_date, end_date)
+
+    days = [start_date + timedelta(days=offset) for offset in range(day_count)]
+    tasks_by_date: Dict[date, List[models.Task]] = {day: [] for day in days}
+    for task in tasks:
+        if status_filter is None or status_filter == "active":
+            tasks_by_date[task.task_date].append(task)
+        elif status_filter == "completed":
+            tasks_by_date[task.last_status_change_at.date()].append(task)
+        else:
+            # Backlog tasks stay on the backlog of every later day
+            first_day = max(start_date, task.last_status_change_at.date())
+            for day in days[(first_day - start_date).days:]:
+                tasks_by_date[day].append(task)
+
+    return {"start_date": start_date, "end_date": end_date, "status": status, "tasks_by_date": tasks_by_date}
+
+@router.get(
+    "/search",
+    response_model=List[models.Task],
+    tags=["Tasks"],
+    summary="Search the authenticated user's tasks by description",
+    description="Full-text search over the user's task descriptions across all dates and statuses. Returns matching tasks ranked best match first. Use this to find a specific task (e.g. 'find my task about the dentist') instead of listing every task.",
+    operation_id="search_tasks",
+    responses={
+        200: {"description": "Matching tasks retrieved successfully."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def search_tasks(
+    *,
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user),
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for in task descriptions."),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of tasks to return."),
+    offset: int = Query(0, ge=0, description="Number of matches to skip, for pagination."),
+):
+    """
+    **Endpoint to search tasks by description.**
+    Backed by a text index (tsvector/trigram on Postgres, FTS5 on SQLite).
+    """
+    return run_task_search(session, current_user.user_id, q, limit=limit, offset=offset)
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    tags=["Tasks"],
+    summary="Export all of the authenticated user's tasks",
+    description="Streams every task of the user, archived ones included, as NDJSON (one JSON object per line) or CSV.",
+    operation_id="export_tasks",
+    responses={
+        200: {"content": {"application/x-ndjson": {}, "text/csv": {}}, "description": "The user's tasks."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+    }
+)
+async def export_tasks(
+    *,
+    current_user: models.User = Depends(get_current_active_user),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="'ndjson' or 'csv'."),
+):
+    """
+    **Endpoint to export all tasks.**
+    Rows are read through a server-side cursor and streamed as they are read, in constant memory.
+    """
+    return StreamingResponse(
+        export_task_rows(get_read_engine(current_user.user_id), current_user.user_id, export_format),
+        media_type=TASK_TRANSFER_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+@router.post(
+    "/import",
+    response_model=models.TaskImportResult,
+    tags=["Tasks"],
+    summary="Import tasks for the authenticated user",
+    description="Creates tasks from an NDJSON or CSV request body (the format of /tasks/export). Invalid rows are skipped and reported with their line number; all valid rows are imported.",
+    operation_id="import_tasks",
+    responses={
+        200: {"description": "Import finished; see the result for rejected rows."},
+        400: {"model": models.MessageResponse, "description": "Unsupported format or encoding."},
+        401: {"model": models.MessageResponse, "description": "Authentication required."},
+        413: {"model": models.MessageResponse, "description": "File too large."},
+    }
+)
+async def import_tasks(
+    *,
+    request: Request,
+    current_user: models.User = Depends(get_current_active_user),
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="'ndjson' or 'csv'. Defaults to the request's Content-Type."),
+):
+    """
+    **Endpoint to bulk import tasks.**
+    The body is spooled to a temporary file and inserted in batches (COPY on Postgres).
+    """
+    import_format = import_format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    with tempfile.TemporaryFile() as upload:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > TASK_IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Import files are limited to {TASK_IMPORT_MAX_BYTES} bytes.")
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            result = await asyncio.to_thread(import_task_rows, engine, current_user.user_id, upload, import_format)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import files must be UTF-8 encoded.")
+    if result.imported:
+        task_write_committed(current_user.user_id)
+    return result
+
 @router.get(
     "/{task_id}",
     response_model=models.Task,
@@ -221,14 +516,18 @@ async def delete_multiple_tasks(
 )
 async def get_task_details(
     *,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     task_id: UUID,
-    current_user: models.User = Depends(get_current_active_user) # Authenticated user
+    current_user: models.User = Depends(get_current_read_user) # Authenticated user
 ):
     """
     **Endpoint to retrieve details of a specific task by its ID.**
     """
-    db_task = session.get(models.Task, task_id)
+    db_task = (
+        session.get(models.Task, task_id) or
+        get_archived_task(session, task_id) or
+        find_occurrence(session, current_user.user_id, task_id)
+    )
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -258,8 +557,8 @@ async def get_task_details(
 )
 async def list_user_tasks(
     *,
-    session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_active_user), # Authenticated user
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user), # Authenticated user
     status: Optional[str] = Query(None, description="Filter tasks by current status (e.g., 'active', 'completed', 'backlog'). If not provided, returns all tasks."),
     target_date: date = Query(..., description="Filter tasks for this specific date (YYYY-MM-DD). Required for 'active' and 'completed' statuses. Ignored for 'backlog' status."),
     sort_by: Optional[str] = Query(None, description="Field to sort by (e.g., 'created_at', 'modified_at', 'task_description')."),
@@ -272,14 +571,23 @@ async def list_user_tasks(
     - If `target_date` is provided:
         - For 'active' status: Tasks created on `target_date`.
         - For 'completed' status: Tasks whose status was changed to 'completed' on `target_date`.
-        - For 'backlog' status: Tasks whose status was changed to 'backlog' on `target_date`.
+        - For 'backlog' status: Tasks still in backlog whose status was changed to 'backlog' on or before `target_date`.
     """
+    cache_params = {
+        "status": status, "target_date": target_date, "sort_by": sort_by,
+        "sort_order": sort_order, "limit": limit, "offset": offset,
+    }
+    cached_tasks = task_view_cache.get(current_user.user_id, "list_user_tasks", cache_params)
+    if cached_tasks is not None:
+        return [models.Task.model_validate(task) for task in cached_tasks]
+    cache_generation = task_view_cache.generation(current_user.user_id)
+
     # Build the query using current_user.user_id
     query = select(models.Task).where(models.Task.user_id == current_user.user_id)
 
     # Apply filters and sorting
     if status:
-        query = query.where(models.Task.current_status == status)
+        query = query.where(models.Task.current_status == status.lower())
 
     # Apply date filtering based on status
     if status is None:
@@ -292,14 +600,15 @@ async def list_user_tasks(
     elif status.lower() == 'completed':
         # For 'completed', filter by last_status_change_at date
         query = query.where(
-            (models.Task.last_status_change_at != None) & \
-            (func.date(models.Task.last_status_change_at) == target_date)
+            (models.Task.last_status_change_at >= _day_start(target_date)) &
+            (models.Task.last_status_change_at < _day_start(target_date + timedelta(days=1)))
         )
     elif status.lower() == 'backlog':
-        # Filter backlog tasks where last_status_change_at is on or BEFORE target_date
+        # Backlog tasks moved to backlog on or BEFORE target_date. A plain range on the column
+        # (not func.date) so it is served by the partial backlog index.
         query = query.where(
-            (models.Task.last_status_change_at != None) & \
-            (func.date(models.Task.last_status_change_at) <= target_date) # <= (on or before)
+            (models.Task.current_status == "backlog") &
+            (models.Task.last_status_change_at < _day_start(target_date + timedelta(days=1)))
         )
     else:
         # Should not happen if status is properly validated
@@ -323,8 +632,21 @@ async def list_user_tasks(
     else:
         query = query.order_by(models.Task.created_at.desc())
 
-    query = query.offset(offset).limit(limit)
-    tasks = session.exec(query).all()
+    merged = archived_tasks(session, current_user.user_id, target_date, target_date, status)
+    if status is None or status.lower() == "active":
+        merged += virtual_occurrences(session, current_user.user_id, target_date, target_date)
+    if merged:
+        # Archived tasks or recurring occurrences: merge them in, then sort and paginate the combined list
+        tasks = session.exec(query).all() + merged
+        tasks.sort(
+            key=lambda task: getattr(task, sort_by or "created_at"),
+            reverse=(sort_order or "").lower() == "desc" if sort_by else True,
+        )
+        tasks = tasks[offset:offset + limit]
+    else:
+        query = query.offset(offset).limit(limit)
+        tasks = session.exec(query).all()
+    task_view_cache.set(current_user.user_id, cache_generation, "list_user_tasks", cache_params, tasks)
     return tasks
 
 @router.get(
@@ -341,13 +663,19 @@ async def list_user_tasks(
 )
 async def get_user_task_counts(
     *,
-    session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_active_user),
+    session: Session = Depends(get_read_session),
+    current_user: models.User = Depends(get_current_read_user),
     target_date: date = Query(..., description="Filter counts for tasks for this date (YYYY-MM-DD)")
 ):
     """
     **Endpoint to get task counts by status for the authenticated user.**
     """
+    cache_params = {"target_date": target_date}
+    cached_counts = task_view_cache.get(current_user.user_id, "get_user_task_counts", cache_params)
+    if cached_counts is not None:
+        return models.TaskStatusCounts.model_validate(cached_counts)
+    cache_generation = task_view_cache.generation(current_user.user_id)
+
     # Count active tasks (created on target_date)
     # print(f"task_count_request.target_date: {target_date}")
     active_count = session.exec(
@@ -363,29 +691,32 @@ async def get_user_task_counts(
         select(func.count(models.Task.task_id)).where(
             (models.Task.user_id == current_user.user_id) &
             (models.Task.current_status == "completed") &
-            (models.Task.last_status_change_at != None) &
-            (func.date(models.Task.last_status_change_at) == target_date)
+            (models.Task.last_status_change_at >= _day_start(target_date)) &
+            (models.Task.last_status_change_at < _day_start(target_date + timedelta(days=1)))
         )
     ).first() or 0
+    completed_count += len(archived_tasks(session, current_user.user_id, target_date, target_date, "completed"))
+    active_count += len(virtual_occurrences(session, current_user.user_id, target_date, target_date))
 
     # Count backlog tasks (status changed to backlog on or before target_date)
     backlog_count = session.exec(
         select(func.count(models.Task.task_id)).where(
             (models.Task.user_id == current_user.user_id) &
             (models.Task.current_status == "backlog") &
-            (models.Task.last_status_change_at != None) &
-            (func.date(models.Task.last_status_change_at) <= target_date)
+            (models.Task.last_status_change_at < _day_start(target_date + timedelta(days=1)))
         )
     ).first() or 0
 
     total_count = active_count + completed_count + backlog_count
 
-    return models.TaskStatusCounts(
+    counts = models.TaskStatusCounts(
         active=active_count,
         completed=completed_count,
         backlog=backlog_count,
         total=total_count
     )
+    task_view_cache.set(current_user.user_id, cache_generation, "get_user_task_counts", cache_params, counts)
+    return counts
 
 
 
@@ -393,8 +724,8 @@ async def get_user_task_counts(
 @router.post(
     "/auto-mark-backlog",
     response_model=models.MessageResponse,
-    summary="Automated job to mark old active tasks as backlog",
-    description="Identifies active tasks created on previous days and updates their status to 'backlog'. This endpoint simulates a daily background cron job.",
+    summary="Mark the authenticated user's old active tasks as backlog",
+    description="Moves the user's active tasks dated before today to backlog. Past recurring occurrences are written as backlog tasks too. The same rollover can run for all users as a scheduled job (TASK_ROLLOVER_INTERVAL_SECONDS, off by default).",
     operation_id="auto_mark_backlog_tasks",
     responses={
         200: {"description": "Backlog conversion job completed."},
@@ -403,37 +734,13 @@ async def get_user_task_counts(
 )
 async def auto_mark_backlog_tasks(
     *,
-    session: Session = Depends(get_session),
-    # For a real system, this would be protected by an API Key or admin role check.
-    # For now, it requires any authenticated user.
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     **Endpoint to automatically mark old active tasks as backlog.**
-    This simulates a daily background job that would run to move tasks to backlog.
+    Runs the rollover job (services/rollover_service.py) for the authenticated user only.
     """
-    # Get today's date
-    today = date.today()
-    
-    # Find active tasks created before today that belong to the authenticated user
-    old_active_tasks = session.exec(
-        select(models.Task).where(
-            (models.Task.user_id == current_user.user_id) & \
-            (models.Task.current_status == "active") & \
-            (func.date(models.Task.created_at) < today)
-        )
-    ).all()
-
-    # Update each task to backlog status
-    for task in old_active_tasks:
-        task.previous_status = task.current_status
-        task.current_status = "backlog"
-        task.last_status_change_at = datetime.utcnow()
-        task.modified_at = datetime.utcnow()
-        session.add(task)
-
-    session.commit()
-
+    rolled = await asyncio.to_thread(roll_over_tasks, engine, user_id=current_user.user_id)
     return models.MessageResponse(
-        message=f"Successfully moved {len(old_active_tasks)} active tasks to backlog for user {current_user.username}."
+        message=f"Successfully moved {rolled} active tasks to backlog for user {current_user.username}."
     )
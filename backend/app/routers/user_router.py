@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, func # Import func for lower()
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List
 from uuid import UUID, uuid4
 
-from ..database import get_session
+from ..database import engine, get_session
+from ..invalidation import invalidation_bus, USERS_TOPIC
 import app.models as models
+from ..crud import get_user_by_username
+from ..services.account_service import delete_account
 # Import authentication helpers
 from .auth_router import get_password_hash, get_current_active_user, get_current_user # get_current_user if some GETs are authenticated
 
@@ -30,11 +34,8 @@ def create_user(*, session: Session = Depends(get_session), user_in: models.User
     """
     **Endpoint to create a new user.**
     """
-    # Ensure username is stored lowercase for case-insensitive lookup later
-    username_lower = user_in.username.lower()
-
     # Check if username already exists (case-insensitive)
-    existing_user = session.exec(select(models.User).where(func.lower(models.User.username) == username_lower)).first()
+    existing_user = get_user_by_username(session, user_in.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -49,7 +50,15 @@ def create_user(*, session: Session = Depends(get_session), user_in: models.User
         chat_id=uuid4()
     )
     session.add(db_user)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration of the same name (in any casing)
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Username '{user_in.username}' already exists."
+        )
     session.refresh(db_user)
     return db_user
 
@@ -150,14 +159,8 @@ async def update_current_user(
         )
 
     # Check if new username already exists (case-insensitive)
-    existing_user = session.exec(
-        select(models.User).where(
-            (func.lower(models.User.username) == func.lower(user_in.new_username)) & \
-            (models.User.user_id != current_user.user_id)
-        )
-    ).first()
-    
-    if existing_user:
+    existing_user = get_user_by_username(session, user_in.new_username)
+    if existing_user and existing_user.user_id != current_user.user_id:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Username '{user_in.new_username}' is already taken."
@@ -167,6 +170,7 @@ async def update_current_user(
     current_user.username = user_in.new_username
     session.add(current_user)
     session.commit()
+    invalidation_bus.publish(USERS_TOPIC, current_user.user_id)
     session.refresh(current_user)
     
     return current_user
@@ -185,14 +189,14 @@ async def update_current_user(
 async def delete_current_user(
     *,
     session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user) # Authenticated user
 ):
     """
     **Endpoint to delete the current user's account.**
     """
-    # Delete the user (tasks will be deleted due to CASCADE)
-    session.delete(current_user)
-    session.commit()
+    # Tasks and chat messages are deleted by ON DELETE CASCADE; heavy accounts are purged in the background
+    delete_account(session, current_user, background_tasks, engine)
     return None
 
 # Keep the legacy endpoints for backward compatibility but mark them as deprecated
@@ -220,7 +224,7 @@ async def get_user_by_username_deprecated(
     **[DEPRECATED] Endpoint to retrieve user details by username.**
     Use /users/profile instead.
     """
-    user = session.exec(select(models.User).where(func.lower(models.User.username) == func.lower(username))).first()
+    user = get_user_by_username(session, username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -264,7 +268,7 @@ async def update_user_deprecated(
     Use /users/profile instead.
     """
     # Find the user by username
-    user = session.exec(select(models.User).where(func.lower(models.User.username) == func.lower(username))).first()
+    user = get_user_by_username(session, username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -293,14 +297,8 @@ async def update_user_deprecated(
         )
 
     # Check if new username already exists (case-insensitive)
-    existing_user = session.exec(
-        select(models.User).where(
-            (func.lower(models.User.username) == func.lower(user_in.new_username)) & \
-            (models.User.user_id != user.user_id)
-        )
-    ).first()
-    
-    if existing_user:
+    existing_user = get_user_by_username(session, user_in.new_username)
+    if existing_user and existing_user.user_id != user.user_id:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Username '{user_in.new_username}' is already taken."
@@ -310,6 +308,7 @@ async def update_user_deprecated(
     user.username = user_in.new_username
     session.add(user)
     session.commit()
+    invalidation_bus.publish(USERS_TOPIC, user.user_id)
     session.refresh(user)
     
     return user
@@ -331,6 +330,7 @@ async def update_user_deprecated(
 async def delete_user_deprecated(
     *,
     session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
     username: str,
     current_user: models.User = Depends(get_current_active_user) # Authenticated user
 ):
@@ -339,7 +339,7 @@ async def delete_user_deprecated(
     Use /users/profile instead.
     """
     # Find the user by username
-    user = session.exec(select(models.User).where(func.lower(models.User.username) == func.lower(username))).first()
+    user = get_user_by_username(session, username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -353,7 +353,6 @@ async def delete_user_deprecated(
             detail="You are not authorized to delete this user."
         )
 
-    # Delete the user (tasks will be deleted due to CASCADE)
-    session.delete(user)
-    session.commit()
+    # Tasks and chat messages are deleted by ON DELETE CASCADE; heavy accounts are purged in the background
+    delete_account(session, user, background_tasks, engine)
     return None
\ No newline at end of file
@@ -0,0 +1,109 @@
+import re
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+from sqlmodel import Session, select
+
+import app.models as models
+
+# Text search configuration used by both the Postgres index and the queries. It is inlined as
+# a literal so the planner can match the query expression against the expression index.
+_TS_CONFIG = literal_column("'english'::regconfig")
+
+_POSTGRES_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_description_fts ON tasks USING gin (to_tsvector('english'::regconfig, task_description))",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_description_trgm ON tasks USING gin (task_description gin_trgm_ops)",
+]
+
+# FTS5 table over tasks, kept in sync by triggers. It stores its own copy of the description
+# keyed by task_id rather than pointing at tasks.rowid: tasks has a UUID primary key, so its
+# rowid is implicit and VACUUM may renumber it. Deletes look task_id up with a scan of the FTS
+# table, which is fine at the sizes SQLite is used for here.
+_SQLITE_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(task_id UNINDEXED, task_description)",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(task_id, task_description) VALUES (new.task_id, new.task_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM tasks_fts WHERE task_id = old.task_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task_description ON tasks BEGIN
+        UPDATE tasks_fts SET task_description = new.task_description WHERE task_id = old.task_id;
+    END""",
+]
+
+# Objects of the earlier external-content layout (content='tasks', content_rowid='rowid')
+_SQLITE_LEGACY_OBJECTS = [
+    "DROP TRIGGER IF EXISTS tasks_fts_insert",
+    "DROP TRIGGER IF EXISTS tasks_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_fts_update",
+    "DROP TABLE IF EXISTS tasks_fts",
+]
+
+def ensure_search_index(engine):
+    """
+    Creates the text index on tasks.task_description if it doesn't exist yet: a tsvector and a
+    trigram GIN index on Postgres, an FTS5 table on SQLite. Safe to run on every startup.
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as connection:
+        if dialect == "postgresql":
+            for ddl in _POSTGRES_INDEX_DDL:
+                connection.exec_driver_sql(ddl)
+        elif dialect == "sqlite":
+            existing = connection.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+            ).first()
+            if existing is not None and "content=" in existing[0]:
+                # Built on tasks.rowid by an older version: rebuild it keyed by task_id
+                for ddl in _SQLITE_LEGACY_OBJECTS:
+                    connection.exec_driver_sql(ddl)
+                existing = None
+            for ddl in _SQLITE_INDEX_DDL:
+                connection.exec_driver_sql(ddl)
+            if existing is None:
+                # Index the tasks that existed before the FTS table
+                connection.exec_driver_sql("INSERT INTO tasks_fts(task_id, task_description) SELECT task_id, task_description FROM tasks")
+
+def _fts5_query(q: str) -> str:
+    """Turns free text into an FTS5 query: every word must match, as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
+
+def search_tasks(session: Session, user_id: UUID, q: str, limit: int = 20, offset: int = 0) -> List[models.Task]:
+    """Returns the user's tasks matching `q`, best match first."""
+    dialect = session.get_bind().dialect.name
+    query = select(models.Task).where(models.Task.user_id == user_id)
+
+    if dialect == "postgresql":
+        document = func.to_tsvector(_TS_CONFIG, models.Task.task_description)
+        ts_query = func.websearch_to_tsquery(_TS_CONFIG, q)
+        query = query.where(
+            # Whole-word matches come from the tsvector index, substrings and typos-in-progress
+            # ("standu") from the trigram index
+            or_(document.op("@@")(ts_query), models.Task.task_description.icontains(q, autoescape=True))
+        ).order_by(
+            func.ts_rank(document, ts_query).desc(),
+            func.similarity(models.Task.task_description, q).desc(),
+            models.Task.created_at.desc(),
+        )
+    elif dialect == "sqlite":
+        fts_query = _fts5_query(q)
+        if not fts_query:
+            return []
+        tasks_fts = table("tasks_fts", column("task_id"))
+        query = query.join(
+            tasks_fts, tasks_fts.c.task_id == models.Task.task_id
+        ).where(
+            text("tasks_fts MATCH :fts_query").bindparams(fts_query=fts_query)
+        ).order_by(
+            text("bm25(tasks_fts)"), # lower is better
+            models.Task.created_at.desc(),
+        )
+    else:
+        query = query.where(
+            models.Task.task_description.icontains(q, autoescape=True)
+        ).order_by(models.Task.created_at.desc())
+
+    return session.exec(query.offset(offset).limit(limit)).all()
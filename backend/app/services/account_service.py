@@ -0,0 +1,88 @@
+"""
+Account deletion.
+
+Tasks, archived tasks and chat messages reference users with ON DELETE CASCADE, so deleting a
+user row removes its data inside the database without the ORM loading anything. For accounts
+with more than ACCOUNT_INLINE_DELETE_MAX_ROWS rows that single cascading delete would hold its
+locks for too long, so the account is disabled and marked deleted instead, and its rows are
+purged in bounded batches in the background before the user row itself is removed.
+Purges interrupted by a restart are resumed at startup (see app.main).
+"""
+import asyncio
+import os
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import BackgroundTasks
+from sqlalchemy import delete
+from sqlmodel import Session, select, func
+from dotenv import load_dotenv
+
+import app.models as models
+from app.invalidation import invalidation_bus, TASKS_TOPIC, USERS_TOPIC
+
+load_dotenv()
+
+ACCOUNT_INLINE_DELETE_MAX_ROWS = int(os.getenv("ACCOUNT_INLINE_DELETE_MAX_ROWS", "10000"))
+ACCOUNT_PURGE_BATCH_SIZE = int(os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "5000"))
+
+def _owned_row_count(session: Session, user: models.User, limit: int) -> int:
+    """Rows owned by `user` across all child tables, counting at most `limit` + 1 per table."""
+    owner_columns = [
+        (models.Task.task_id, models.Task.user_id == user.user_id),
+        (models.TaskArchive.task_id, models.TaskArchive.user_id == user.user_id),
+        (models.ChatMessage.message_id, models.ChatMessage.chat_id == user.chat_id),
+    ]
+    return sum(
+        session.exec(select(func.count()).select_from(select(key).where(owned).limit(limit + 1).subquery())).one()
+        for key, owned in owner_columns
+    )
+
+def delete_account(session: Session, user: models.User, background_tasks: BackgroundTasks, engine):
+    """
+    Deletes `user` and everything they own: at once for ordinary accounts, in the background
+    for heavy ones. Either way the account can't be used once this returns.
+    """
+    if _owned_row_count(session, user, ACCOUNT_INLINE_DELETE_MAX_ROWS) <= ACCOUNT_INLINE_DELETE_MAX_ROWS:
+        session.delete(user)
+        session.commit()
+    else:
+        user.is_verified = False # get_current_active_user rejects the account from now on
+        user.deleted_at = datetime.utcnow()
+        session.add(user)
+        session.commit()
+        background_tasks.add_task(asyncio.to_thread, purge_deleted_account, engine, user.user_id)
+    invalidation_bus.publish(USERS_TOPIC, user.user_id)
+
+def _delete_batch(session: Session, model, key, owned, batch_size: int) -> int:
+    batch = session.exec(select(key).where(owned).limit(batch_size)).all()
+    if batch:
+        session.exec(delete(model).where(key.in_(batch)))
+        session.commit()
+    return len(batch)
+
+def purge_deleted_account(engine, user_id: UUID, batch_size: int = ACCOUNT_PURGE_BATCH_SIZE):
+    """Deletes a deleted account's rows one short transaction per batch, then the user row."""
+    with Session(engine) as session:
+        user = session.get(models.User, user_id)
+        if user is None or user.deleted_at is None:
+            return
+        children = [
+            (models.Task, models.Task.task_id, models.Task.user_id == user.user_id),
+            (models.TaskArchive, models.TaskArchive.task_id, models.TaskArchive.user_id == user.user_id),
+            (models.ChatMessage, models.ChatMessage.message_id, models.ChatMessage.chat_id == user.chat_id),
+        ]
+        for model, key, owned in children:
+            while _delete_batch(session, model, key, owned, batch_size) == batch_size:
+                pass
+        session.delete(user)
+        session.commit()
+    invalidation_bus.publish(TASKS_TOPIC, user_id)
+    print(f"Purged deleted account {user_id}.")
+
+def resume_account_purges(engine):
+    """Finishes purges of accounts deleted before the last restart."""
+    with Session(engine) as session:
+        pending = session.exec(select(models.User.user_id).where(models.User.deleted_at != None)).all()
+    for user_id in pending:
+        purge_deleted_account(engine, user_id)
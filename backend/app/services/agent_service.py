@@ -190,39 +190,60 @@
 
 import os
 import asyncio
-from typing import Optional
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
 
 from langchain_openai import ChatOpenAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain.agents import AgentExecutor
 from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
 from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
 
 from dotenv import load_dotenv
 
+from app.services.agent_trace_service import AgentRunTrace, finish_run
+from app.services import model_router
+from app.services.llm_resilience import (
+    CHAT_TURN_BUDGET_SECONDS, LLM_CALL_TIMEOUT_SECONDS, LLMUnavailable, TurnBudgetExceeded, call_llm, turn_budget,
+)
+
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable not set.")
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
-SYSTEM_PROMPT_TEXT = """
-You are a helpful AI assistant that manages to-do tasks.
-Use the provided tools on the backend (via MCP) to perform actions like create, update, list tasks.
-Always ask for clarifications if user instructions are ambiguous.
-Use system date for task dates if not provided.
-If user asks for tasks, use the system date for the task date.
-"""
+def _require_openai_api_key() -> str:
+    """
+    Checked on first use rather than at import time, so a missing key only breaks chat
+    and never the task/user API that shares the process.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable not set.")
+    return api_key
+
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:9000/mcp/")
+MCP_TOOLS_CACHE_SECONDS = int(os.getenv("MCP_TOOLS_CACHE_SECONDS", "300"))
+
+# auth_token -> (fetched_at, tools). The tools carry the token's headers, so they are cached
+# per token; the manifest itself is fixed for the lifetime of the MCP server.
+_tools_cache: OrderedDict = OrderedDict()
+_TOOLS_CACHE_MAX_ENTRIES = 256
+
+async def get_mcp_tools(auth_token: Optional[str] = None):
+    """Returns the MCP tools for a token, only asking the MCP server when the cache is cold."""
+    cached = _tools_cache.get(auth_token)
+    if cached is not None and time.monotonic() - cached[0] < MCP_TOOLS_CACHE_SECONDS:
+        _tools_cache.move_to_end(auth_token)
+        return cached[1]
 
-async def call_agent_on_message(
-    user_input: str,
-    auth_token: Optional[str] = None,
-) -> str:
     # Server connection config with authentication headers, if provided
     api_config = {
-        "url": "http://localhost:9000/mcp/",
+        "url": MCP_SERVER_URL,
         "transport": "sse",
     }
     if auth_token:
@@ -234,21 +255,209 @@ async def call_agent_on_message(
     mcp_client = MultiServerMCPClient({"api": api_config})
     tools = await mcp_client.get_tools()
 
+    _tools_cache[auth_token] = (time.monotonic(), tools)
+    _tools_cache.move_to_end(auth_token)
+    while len(_tools_cache) > _TOOLS_CACHE_MAX_ENTRIES:
+        _tools_cache.popitem(last=False)
+    return tools
+
+SYSTEM_PROMPT_TEXT = """
+You are a helpful AI assistant that manages to-do tasks.
+Use the provided tools on the backend (via MCP) to perform actions like create, update, list tasks.
+Always ask for clarifications if user instructions are ambiguous.
+Use system date for task dates if not provided.
+If user asks for tasks, use the system date for the task date.
+To find a specific task by what it is about, use search_tasks instead of listing every task.
+"""
+
+# Read-only tools, whose results can be reused within a run. Any other tool call (create,
+# update, delete, or a tool missing from this list) clears the run's memo.
+MEMOIZED_TOOLS = {
+    "list_user_tasks",
+    "list_tasks_in_range",
+    "get_user_task_counts",
+    "get_task_details",
+    "search_tasks",
+    "list_recurring_tasks",
+}
+
+class ToolResultMemo:
+    """
+    Results of read-only tool calls within one agent run, keyed by (tool, arguments), so a
+    repeated call with the same arguments skips the HTTP and DB round-trip. Identical calls
+    running concurrently share one request.
+    """
+
+    def __init__(self):
+        self._results: Dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.writes = 0 # calls to tools outside MEMOIZED_TOOLS
+
+    def wrap(self, tool):
+        """A copy of `tool` whose calls go through the memo."""
+        call_tool = tool.coroutine
+
+        async def memoized_call(**arguments):
+            if tool.name not in MEMOIZED_TOOLS:
+                # A write: nothing read before it can be trusted afterwards
+                self.writes += 1
+                self._results.clear()
+                try:
+                    return await call_tool(**arguments)
+                finally:
+                    self._results.clear()
+            key = (tool.name, json.dumps(arguments, sort_keys=True, default=str))
+            result = self._results.get(key)
+            if result is not None:
+                self.hits += 1
+                return await asyncio.shield(result)
+            result = self._results[key] = asyncio.ensure_future(call_tool(**arguments))
+            try:
+                return await asyncio.shield(result)
+            except BaseException:
+                if self._results.get(key) is result:
+                    del self._results[key] # never reuse a failure
+                raise
+
+        return tool.model_copy(update={"coroutine": memoized_call})
+
+class AgentRunTracer(AsyncCallbackHandler):
+    """Records every LLM call (with its token counts) and tool call of a run into its trace."""
+
+    def __init__(self, trace: AgentRunTrace):
+        self.trace = trace
+        self._started: Dict[UUID, tuple] = {} # run_id -> (perf_counter at start, name)
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs):
+        self._started[run_id] = (time.perf_counter(), (serialized or {}).get("kwargs", {}).get("model_name"))
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs):
+        self._started[run_id] = (time.perf_counter(), (serialized or {}).get("kwargs", {}).get("model_name"))
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        started, name = self._started.pop(run_id, (None, None))
+        if started is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.trace.add_span(
+            "llm", started, name,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+        )
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        started, name = self._started.pop(run_id, (None, None))
+        if started is not None:
+            self.trace.add_span("llm", started, name, error=type(error).__name__)
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs):
+        self._started[run_id] = (time.perf_counter(), (serialized or {}).get("name"))
+
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs):
+        started, name = self._started.pop(run_id, (None, None))
+        if started is not None:
+            self.trace.add_span("tool", started, name)
+
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        started, name = self._started.pop(run_id, (None, None))
+        if started is not None:
+            self.trace.add_span("tool", started, name, error=type(error).__name__)
+
+async def call_agent_on_message(
+    user_input: str,
+    auth_token: Optional[str] = None,
+    trace: Optional[AgentRunTrace] = None,
+) -> str:
+    """
+    Runs the agent on one user message. Pass an AgentRunTrace to read the run's stage
+    timings afterwards (e.g. for a Server-Timing header); every run is traced either way.
+
+    Raises TurnBudgetExceeded when the run takes longer than CHAT_TURN_BUDGET_SECONDS, and
+    LLMUnavailable while the LLM circuit breaker is open (see services/llm_resilience.py).
+    """
+    trace = trace or AgentRunTrace()
+    try:
+        with turn_budget(CHAT_TURN_BUDGET_SECONDS):
+            try:
+                return await asyncio.wait_for(_run_agent(user_input, auth_token, trace), timeout=CHAT_TURN_BUDGET_SECONDS)
+            except asyncio.TimeoutError:
+                raise TurnBudgetExceeded()
+    finally:
+        finish_run(trace)
+
+_chat_models: Dict[str, Any] = {}
+
+def _openai_chat_model(model_name: str):
+    # One client per model, reused by every run so its connection pool is too
+    if model_name not in _chat_models:
+        # Timeouts and retries are applied per call by llm_resilience.call_llm, not by the client
+        _chat_models[model_name] = ChatOpenAI(
+            model=model_name,
+            temperature=0,
+            api_key=_require_openai_api_key(),
+            timeout=LLM_CALL_TIMEOUT_SECONDS,
+            max_retries=0,
+        )
+    return _chat_models[model_name]
+
+_model_factory: Callable[[str], Any] = _openai_chat_model
+
+def set_model_factory(factory: Optional[Callable[[str], Any]]):
+    """
+    Replaces how chat models are built from a model name, e.g. with LangChain's fake chat
+    models in tests. None restores the OpenAI models.
+    """
+    global _model_factory
+    _model_factory = factory or _openai_chat_model
+
+async def _run_agent(user_input: str, auth_token: Optional[str], trace: AgentRunTrace) -> str:
+    with trace.stage("tool_fetch"):
+        tools = await get_mcp_tools(auth_token)
+    # The cached tools are shared by runs; each run calls them through its own memo
+    memo = ToolResultMemo()
+    tools = [memo.wrap(tool) for tool in tools]
+
+    decision = model_router.classify_turn(user_input)
+    trace.model_tier, trace.routing_reason = decision.tier, decision.reason
+    try:
+        try:
+            output = await _invoke_agent(user_input, tools, decision.tier, trace)
+            tool_errors = sum(span["stage"] == "tool" and "error" in span for span in trace.spans)
+            unsure = model_router.needs_escalation(output, tool_errors)
+        except (LLMUnavailable, TurnBudgetExceeded):
+            raise # the strong tier would fail the same way
+        except Exception:
+            if decision.tier != model_router.FAST_TIER or memo.writes:
+                raise
+            unsure = True
+        # Rerunning after a write could repeat it, so only runs that changed nothing are escalated
+        if decision.tier == model_router.FAST_TIER and unsure and not memo.writes:
+            trace.model_tier, trace.escalated = model_router.STRONG_TIER, True
+            output = await _invoke_agent(user_input, tools, model_router.STRONG_TIER, trace)
+        return output
+    finally:
+        trace.tool_memo_hits = memo.hits
+
+async def _invoke_agent(user_input: str, tools, tier: str, trace: AgentRunTrace) -> str:
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT_TEXT),
         ("human", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
     ])
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    llm = _model_factory(model_router.model_name(tier))
     llm_with_tools = llm.bind_tools(tools)
 
+    async def call_model(messages, config):
+        # Per-call timeout, jittered retries and the circuit breaker (see llm_resilience)
+        return await call_llm(lambda: llm_with_tools.ainvoke(messages, config=config))
+
     agent_chain = (
         RunnablePassthrough.assign(
             agent_scratchpad=lambda x: format_to_openai_tool_messages(x.get("intermediate_steps", []))
         )
         | prompt
-        | llm_with_tools
+        | RunnableLambda(call_model)
         | OpenAIToolsAgentOutputParser()
     )
 
@@ -258,5 +467,6 @@ async def call_agent_on_message(
         verbose=True,
     )
 
-    result = await agent_executor.ainvoke({"input": user_input})
+    with trace.stage("agent_run", tier):
+        result = await agent_executor.ainvoke({"input": user_input}, config={"callbacks": [AgentRunTracer(trace)]})
     return result["output"]
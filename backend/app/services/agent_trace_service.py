@@ -0,0 +1,190 @@
+"""
+Stage-level timings of agent runs.
+
+An AgentRunTrace collects the spans of one /chat/ turn: MCP tool fetch, every LLM call (with
+its token counts) and every tool call. The spans are recorded by the LangChain callback
+handler in agent_service; this module holds no LangChain code, so the metrics can be read
+without loading the agent stack.
+
+Each finished run feeds the in-process agent_metrics (served at /metrics/agent), the chat
+response's Server-Timing header, and, for runs slower than AGENT_TRACE_SLOW_MS, a row in
+agent_traces (the newest AGENT_TRACE_MAX_RECORDS are kept).
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+import app.models as models
+from app.database import engine
+
+load_dotenv()
+
+AGENT_TRACE_SLOW_MS = float(os.getenv("AGENT_TRACE_SLOW_MS", "5000")) # runs at least this slow are persisted
+AGENT_TRACE_MAX_RECORDS = int(os.getenv("AGENT_TRACE_MAX_RECORDS", "1000"))
+
+class AgentRunTrace:
+    """The spans of one agent run, with offsets and durations in milliseconds."""
+
+    def __init__(self, user_id: Optional[UUID] = None):
+        self.user_id = user_id
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[dict] = []
+        self.tool_memo_hits = 0 # tool calls answered from the run's memo (see agent_service.ToolResultMemo)
+        # Set by the model router (see services/model_router.py)
+        self.model_tier: Optional[str] = None
+        self.routing_reason: Optional[str] = None
+        self.escalated = False
+
+    def add_span(self, stage: str, started: float, name: Optional[str] = None, **details):
+        """Records a span that began at perf_counter() value `started` and ends now."""
+        self.spans.append({
+            "stage": stage,
+            "name": name or stage,
+            "start_ms": round((started - self._started) * 1000, 1),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            **{key: value for key, value in details.items() if value is not None},
+        })
+
+    @contextmanager
+    def stage(self, stage: str, name: Optional[str] = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(stage, started, name)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 1)
+
+    def totals(self) -> Dict[str, dict]:
+        """Per-stage call counts and summed durations."""
+        totals: Dict[str, dict] = {}
+        for span in self.spans:
+            total = totals.setdefault(span["stage"], {"count": 0, "duration_ms": 0.0})
+            total["count"] += 1
+            total["duration_ms"] += span["duration_ms"]
+        return totals
+
+    def token_count(self, kind: str) -> int:
+        return sum(span.get(kind, 0) for span in self.spans)
+
+    def server_timing(self) -> str:
+        """The trace as a Server-Timing header value, e.g. 'llm;dur=812.4;desc="2 calls", ...'."""
+        metrics = [
+            f'{stage};dur={total["duration_ms"]:.1f};desc="{total["count"]} call{"s" if total["count"] != 1 else ""}"'
+            for stage, total in self.totals().items()
+        ]
+        if self.duration_ms is not None:
+            metrics.append(f"agent;dur={self.duration_ms:.1f}")
+        return ", ".join(metrics)
+
+class AgentMetrics:
+    """In-process aggregates over all finished agent runs, per stage and per tool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.run_ms = 0.0
+        self.max_run_ms = 0.0
+        self.slow_runs = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_memo_hits = 0
+        self.escalations = 0
+        self.routes: Dict[str, int] = {} # routing reason -> runs (see model_router.classify_turn)
+        self._spans: Dict[str, dict] = {}
+
+    def record(self, trace: AgentRunTrace):
+        with self._lock:
+            self.runs += 1
+            self.run_ms += trace.duration_ms
+            self.max_run_ms = max(self.max_run_ms, trace.duration_ms)
+            self.slow_runs += trace.duration_ms >= AGENT_TRACE_SLOW_MS
+            self.prompt_tokens += trace.token_count("prompt_tokens")
+            self.completion_tokens += trace.token_count("completion_tokens")
+            self.tool_memo_hits += trace.tool_memo_hits
+            self.escalations += trace.escalated
+            if trace.routing_reason is not None:
+                self.routes[trace.routing_reason] = self.routes.get(trace.routing_reason, 0) + 1
+            for span in trace.spans:
+                # Per tool, per model and per tier (e.g. "tool:list_user_tasks", "llm:gpt-4o", "agent_run:fast")
+                key = span["stage"] if span["name"] == span["stage"] else f"{span['stage']}:{span['name']}"
+                aggregate = self._spans.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+                aggregate["count"] += 1
+                aggregate["total_ms"] += span["duration_ms"]
+                aggregate["max_ms"] = max(aggregate["max_ms"], span["duration_ms"])
+                aggregate["errors"] += "error" in span
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "avg_run_ms": round(self.run_ms / self.runs, 1) if self.runs else 0.0,
+                "max_run_ms": self.max_run_ms,
+                "slow_runs": self.slow_runs,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "tool_memo_hits": self.tool_memo_hits,
+                "escalations": self.escalations,
+                "routes": dict(self.routes),
+                "stages": {
+                    key: {**aggregate, "avg_ms": round(aggregate["total_ms"] / aggregate["count"], 1), "total_ms": round(aggregate["total_ms"], 1)}
+                    for key, aggregate in self._spans.items()
+                },
+            }
+
+agent_metrics = AgentMetrics()
+_pending_saves = set() # holds the background save tasks until they finish
+
+def save_trace(engine, trace: AgentRunTrace):
+    """Stores a slow run's trace and drops the oldest ones beyond AGENT_TRACE_MAX_RECORDS."""
+    with Session(engine) as session:
+        session.add(models.AgentTrace(
+            user_id=trace.user_id,
+            created_at=trace.started_at,
+            duration_ms=trace.duration_ms,
+            llm_calls=sum(span["stage"] == "llm" for span in trace.spans),
+            tool_calls=sum(span["stage"] == "tool" for span in trace.spans),
+            prompt_tokens=trace.token_count("prompt_tokens"),
+            completion_tokens=trace.token_count("completion_tokens"),
+            model_tier=trace.model_tier,
+            escalated=trace.escalated,
+            spans=trace.spans,
+        ))
+        session.commit()
+        oldest_kept = session.exec(
+            select(models.AgentTrace.created_at)
+            .order_by(models.AgentTrace.created_at.desc())
+            .offset(AGENT_TRACE_MAX_RECORDS - 1)
+            .limit(1)
+        ).first()
+        if oldest_kept is not None:
+            session.exec(delete(models.AgentTrace).where(models.AgentTrace.created_at < oldest_kept))
+            session.commit()
+
+async def _save_trace_in_background(engine, trace: AgentRunTrace):
+    try:
+        await asyncio.to_thread(save_trace, engine, trace)
+    except Exception as e:
+        print(f"Could not save agent trace: {e}")
+
+def finish_run(trace: AgentRunTrace):
+    """Closes a run's trace: updates agent_metrics and persists the trace if the run was slow."""
+    trace.finish()
+    agent_metrics.record(trace)
+    if trace.duration_ms >= AGENT_TRACE_SLOW_MS:
+        # Off the request path; the reply doesn't wait for the trace to be written
+        task = asyncio.get_running_loop().create_task(_save_trace_in_background(engine, trace))
+        _pending_saves.add(task)
+        task.add_done_callback(_pending_saves.discard)
@@ -0,0 +1,152 @@
+"""
+Hot/cold storage for tasks.
+
+Completed tasks whose status last changed more than TASK_ARCHIVE_AFTER_DAYS ago are moved from
+'tasks' into 'tasks_archive' in bounded batches, so the per-day queries only touch recent rows.
+Historical reads merge the archive back in, so callers never see a difference.
+
+Runs on a timer inside the API (see app.main) when TASK_ARCHIVE_AFTER_DAYS is set, or as a
+one-off job, e.g. from cron:
+    python -m app.services.archive_service
+"""
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, literal
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+import app.models as models
+from app.invalidation import invalidation_bus, TASKS_TOPIC
+
+load_dotenv()
+
+# Archive completed tasks this many days after they were completed. 0 disables archiving.
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "0"))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", "1000"))
+TASK_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("TASK_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+_RECORD_COLUMNS = list(models.TaskRecordBase.model_fields)
+
+def archive_completed_tasks(engine, older_than_days: int = TASK_ARCHIVE_AFTER_DAYS, batch_size: int = TASK_ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Moves completed tasks older than `older_than_days` into tasks_archive, one transaction per
+    batch so no lock is held for long. Returns the number of tasks archived.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        with Session(engine) as session:
+            batch = session.exec(
+                select(models.Task.task_id, models.Task.user_id).where(
+                    (models.Task.current_status == "completed") &
+                    (models.Task.last_status_change_at < cutoff)
+                ).limit(batch_size).with_for_update(skip_locked=True) # concurrent archivers take disjoint batches
+            ).all()
+            if not batch:
+                return archived
+
+            task_ids = [task_id for task_id, _ in batch]
+            archived_at = datetime.utcnow()
+            session.exec(
+                insert(models.TaskArchive).from_select(
+                    _RECORD_COLUMNS + ["archived_at"],
+                    select(*[getattr(models.Task, column) for column in _RECORD_COLUMNS], literal(archived_at))
+                    .where(models.Task.task_id.in_(task_ids)),
+                )
+            )
+            session.exec(delete(models.Task).where(models.Task.task_id.in_(task_ids)))
+            session.commit()
+
+        archived += len(batch)
+        for user_id in {user_id for _, user_id in batch}:
+            invalidation_bus.publish(TASKS_TOPIC, user_id)
+        if len(batch) < batch_size:
+            return archived
+
+async def run_archiver_periodically(engine):
+    """Background loop started from the app lifespan when archiving is enabled."""
+    while True:
+        try:
+            archived = await asyncio.to_thread(archive_completed_tasks, engine)
+            if archived:
+                print(f"Archived {archived} completed tasks older than {TASK_ARCHIVE_AFTER_DAYS} days.")
+        except Exception as e:
+            print(f"Task archiver failed: {e}")
+        await asyncio.sleep(TASK_ARCHIVE_INTERVAL_SECONDS)
+
+# --- Transparent historical reads ---
+def may_have_archived_tasks(session: Session, user_id: UUID, start_date: date) -> bool:
+    """
+    Whether a view of the user's tasks starting at `start_date` can include archived tasks:
+    the user's newest archived task date or completion time is on or after it. Two index-only
+    MAX lookups, so the common per-day views skip the archive query entirely. It reads the
+    archive rather than TASK_ARCHIVE_AFTER_DAYS, so tasks archived with another setting (e.g.
+    by the one-off job) are still found.
+    """
+    newest_task_date, newest_change = session.exec(select(
+        select(func.max(models.TaskArchive.task_date)).where(models.TaskArchive.user_id == user_id).scalar_subquery(),
+        select(func.max(models.TaskArchive.last_status_change_at)).where(models.TaskArchive.user_id == user_id).scalar_subquery(),
+    )).one()
+    return (
+        (newest_task_date is not None and newest_task_date >= start_date) or
+        (newest_change is not None and newest_change >= datetime.combine(start_date, time.min))
+    )
+
+def _as_task(archived_task: models.TaskArchive) -> models.Task:
+    return models.Task.model_validate(archived_task.model_dump(exclude={"archived_at"}))
+
+def archived_tasks(session: Session, user_id: UUID, start_date: date, end_date: date, status: Optional[str] = None) -> List[models.Task]:
+    """
+    Archived tasks for a date range, as Task objects, using the same date rules as the hot
+    views: by task_date without a status filter, by completion date for 'completed'.
+    Archived tasks are always completed, so any other status has nothing archived.
+    """
+    if not may_have_archived_tasks(session, user_id, start_date):
+        return []
+    query = select(models.TaskArchive).where(models.TaskArchive.user_id == user_id)
+    if status is None:
+        query = query.where((models.TaskArchive.task_date >= start_date) & (models.TaskArchive.task_date <= end_date))
+    elif status.lower() == "completed":
+        query = query.where(
+            (models.TaskArchive.last_status_change_at >= datetime.combine(start_date, time.min)) &
+            (models.TaskArchive.last_status_change_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        )
+    else:
+        return []
+    return [_as_task(archived_task) for archived_task in session.exec(query).all()]
+
+def get_archived_task(session: Session, task_id: UUID) -> Optional[models.Task]:
+    """Looks a single task up in the archive, as a detached Task object."""
+    archived_task = session.get(models.TaskArchive, task_id)
+    return _as_task(archived_task) if archived_task else None
+
+def delete_archived_task(session: Session, task_id: UUID) -> bool:
+    """Deletes a task from the archive. Nothing is committed. Returns whether it was there."""
+    archived_task = session.get(models.TaskArchive, task_id)
+    if archived_task is None:
+        return False
+    session.delete(archived_task)
+    return True
+
+def restore_archived_task(session: Session, task_id: UUID) -> Optional[models.Task]:
+    """
+    Moves an archived task back into 'tasks' so it can be modified like any other task.
+    Nothing is committed; the caller's commit covers the move and its own change.
+    """
+    archived_task = session.get(models.TaskArchive, task_id)
+    if archived_task is None:
+        return None
+    task = _as_task(archived_task)
+    session.delete(archived_task)
+    session.add(task)
+    return task
+
+if __name__ == "__main__":
+    from app.database import engine
+    days = TASK_ARCHIVE_AFTER_DAYS or 90
+    print(f"Archived {archive_completed_tasks(engine, older_than_days=days)} completed tasks older than {days} days.")
+    invalidation_bus.stop() # sends the queued invalidations before exiting
@@ -0,0 +1,268 @@
+"""
+Keeps chat_messages bounded.
+
+- Retention: messages older than CHAT_RETENTION_DAYS are purged in small batches. On Postgres,
+  when chat_messages is partitioned by month, whole expired partitions are dropped instead.
+- Compaction: messages older than CHAT_COMPACT_AFTER_DAYS are replaced, per chat, by a single
+  summary row (is_summary=True), so recent context survives without the full transcript.
+- Partitioning (Postgres only, opt-in): partition_chat_messages_table() converts chat_messages
+  into a table range-partitioned by month on timestamp, plus a DEFAULT partition that catches
+  any row no monthly partition covers; ensure_chat_partitions() keeps the upcoming months'
+  partitions created.
+
+Runs on a timer inside the API (see app.main) when retention or compaction is configured or
+chat_messages is partitioned, or as a one-off job:
+    python -m app.services.chat_retention_service [--partition]
+"""
+import asyncio
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+import app.models as models
+
+load_dotenv()
+
+CHAT_RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "0")) # 0 keeps messages forever
+CHAT_COMPACT_AFTER_DAYS = int(os.getenv("CHAT_COMPACT_AFTER_DAYS", "0")) # 0 disables compaction
+CHAT_PURGE_BATCH_SIZE = int(os.getenv("CHAT_PURGE_BATCH_SIZE", "5000"))
+CHAT_COMPACT_BATCH_CHATS = int(os.getenv("CHAT_COMPACT_BATCH_CHATS", "100"))
+CHAT_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("CHAT_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+
+_PARTITION_NAME = re.compile(r"^chat_messages_p(\d{4})(\d{2})$")
+_DEFAULT_PARTITION = "chat_messages_default"
+
+# --- Partitioning (Postgres) ---
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(month_start: date) -> date:
+    return (month_start + timedelta(days=32)).replace(day=1)
+
+def is_chat_table_partitioned(connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('chat_messages')"
+    ).first() is not None
+
+def _create_default_partition(connection):
+    connection.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {_DEFAULT_PARTITION} PARTITION OF chat_messages DEFAULT")
+
+def _create_month_partition(connection, month_start: date):
+    name = f"chat_messages_p{month_start:%Y%m}"
+    if connection.exec_driver_sql(f"SELECT to_regclass('{name}')").scalar() is not None:
+        return
+    bounds = f"FROM ('{month_start.isoformat()}') TO ('{_next_month(month_start).isoformat()}')"
+    in_month = f"timestamp >= '{month_start.isoformat()}' AND timestamp < '{_next_month(month_start).isoformat()}'"
+    default_exists = connection.exec_driver_sql(f"SELECT to_regclass('{_DEFAULT_PARTITION}')").scalar() is not None
+    if default_exists and connection.exec_driver_sql(f"SELECT 1 FROM {_DEFAULT_PARTITION} WHERE {in_month} LIMIT 1").first():
+        # Postgres refuses a new partition while the DEFAULT one holds rows in its range: take
+        # the DEFAULT partition out, create the month, and move those rows over
+        connection.exec_driver_sql(f"ALTER TABLE chat_messages DETACH PARTITION {_DEFAULT_PARTITION}")
+        connection.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF chat_messages FOR VALUES {bounds}")
+        connection.exec_driver_sql(f"INSERT INTO chat_messages SELECT * FROM {_DEFAULT_PARTITION} WHERE {in_month}")
+        connection.exec_driver_sql(f"DELETE FROM {_DEFAULT_PARTITION} WHERE {in_month}")
+        connection.exec_driver_sql(f"ALTER TABLE chat_messages ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT")
+    else:
+        connection.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF chat_messages FOR VALUES {bounds}")
+
+def ensure_chat_partitions(engine, months_ahead: int = 2):
+    """
+    Creates the partitions for the current month and the next `months_ahead` months, and the
+    DEFAULT partition if it is missing.
+    """
+    with engine.begin() as connection:
+        if not is_chat_table_partitioned(connection):
+            return
+        _create_default_partition(connection)
+        month = _month_start(date.today())
+        for _ in range(months_ahead + 1):
+            _create_month_partition(connection, month)
+            month = _next_month(month)
+
+def partition_chat_messages_table(engine):
+    """
+    One-off conversion of chat_messages into a monthly range-partitioned table (Postgres only).
+    The primary key becomes (message_id, timestamp), as Postgres requires the partition key in
+    it. Existing rows are copied into their partitions within a single transaction.
+    """
+    if engine.dialect.name != "postgresql":
+        raise ValueError("chat_messages partitioning is only supported on PostgreSQL.")
+    with engine.begin() as connection:
+        if is_chat_table_partitioned(connection):
+            print("chat_messages is already partitioned.")
+            return
+        oldest = connection.exec_driver_sql("SELECT min(timestamp) FROM chat_messages").scalar()
+        connection.exec_driver_sql("ALTER TABLE chat_messages RENAME TO chat_messages_unpartitioned")
+        connection.exec_driver_sql(
+            "CREATE TABLE chat_messages (LIKE chat_messages_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (timestamp)"
+        )
+        month = _month_start(oldest.date() if oldest else date.today())
+        last_month = _next_month(_next_month(_month_start(date.today())))
+        while month <= last_month:
+            _create_month_partition(connection, month)
+            month = _next_month(month)
+        _create_default_partition(connection)
+        connection.exec_driver_sql("INSERT INTO chat_messages SELECT * FROM chat_messages_unpartitioned")
+        connection.exec_driver_sql("DROP TABLE chat_messages_unpartitioned")
+        connection.exec_driver_sql("ALTER TABLE chat_messages ADD PRIMARY KEY (message_id, timestamp)")
+        connection.exec_driver_sql(
+            "ALTER TABLE chat_messages ADD FOREIGN KEY (chat_id) REFERENCES users (chat_id) ON DELETE CASCADE"
+        )
+        connection.exec_driver_sql("CREATE INDEX ix_chat_messages_chat_id ON chat_messages (chat_id)")
+        connection.exec_driver_sql(
+            "CREATE INDEX ix_chat_messages_chat_id_timestamp ON chat_messages (chat_id, timestamp)"
+        )
+        connection.exec_driver_sql("CREATE INDEX ix_chat_messages_timestamp ON chat_messages (timestamp)")
+    print("chat_messages is now partitioned by month.")
+
+# --- Retention ---
+def _drop_expired_partitions(connection, cutoff: datetime) -> int:
+    """Drops monthly partitions that end on or before `cutoff`. Returns how many were dropped."""
+    partitions = connection.exec_driver_sql(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass('chat_messages')"
+    ).scalars().all()
+    dropped = 0
+    for name in partitions:
+        match = _PARTITION_NAME.match(name)
+        if match and _next_month(date(int(match.group(1)), int(match.group(2)), 1)) <= cutoff.date():
+            connection.exec_driver_sql(f"DROP TABLE {name}")
+            dropped += 1
+    return dropped
+
+def purge_expired_messages(engine, retention_days: int = CHAT_RETENTION_DAYS, batch_size: int = CHAT_PURGE_BATCH_SIZE) -> int:
+    """
+    Deletes chat messages older than `retention_days`, one short transaction per batch.
+    Returns the number of rows deleted (dropped partitions are not counted).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    with engine.begin() as connection:
+        if is_chat_table_partitioned(connection):
+            dropped = _drop_expired_partitions(connection, cutoff)
+            if dropped:
+                print(f"Dropped {dropped} expired chat_messages partitions.")
+
+    deleted = 0
+    while True:
+        with Session(engine) as session:
+            expired_ids = session.exec(
+                select(models.ChatMessage.message_id)
+                .where(models.ChatMessage.timestamp < cutoff)
+                .limit(batch_size)
+            ).all()
+            if not expired_ids:
+                return deleted
+            session.exec(delete(models.ChatMessage).where(models.ChatMessage.message_id.in_(expired_ids)))
+            session.commit()
+        deleted += len(expired_ids)
+        if len(expired_ids) < batch_size:
+            return deleted
+
+# --- Compaction ---
+def summarize_messages(messages: List[models.ChatMessage], max_chars: int = 2000) -> str:
+    """
+    Default summarizer: lists what the user asked for, oldest first, truncated to `max_chars`.
+    Pass a different summarizer (e.g. an LLM call) to compact_chat_history to replace it.
+    """
+    lines = [f"Summary of {len(messages)} earlier messages "
+             f"({messages[0].timestamp:%Y-%m-%d} to {messages[-1].timestamp:%Y-%m-%d}). The user asked:"]
+    for message in messages:
+        if message.is_user or message.is_summary:
+            lines.append(f"- {message.content[:200]}")
+    summary = "\n".join(lines)
+    return summary if len(summary) <= max_chars else summary[:max_chars - 3] + "..."
+
+def compact_chat_history(
+    engine,
+    older_than_days: int = CHAT_COMPACT_AFTER_DAYS,
+    batch_chats: int = CHAT_COMPACT_BATCH_CHATS,
+    summarizer: Callable[[List[models.ChatMessage]], str] = summarize_messages,
+) -> int:
+    """
+    Replaces each chat's messages older than `older_than_days` with one summary row, a batch
+    of chats per transaction. Earlier summaries are folded into the new one, so a chat never
+    has more than one summary. Returns the number of chats compacted.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    compacted = 0
+    while True:
+        with Session(engine) as session:
+            # Chats with more than one old row; a lone summary is already compact
+            chat_ids = session.exec(
+                select(models.ChatMessage.chat_id)
+                .where(models.ChatMessage.timestamp < cutoff)
+                .group_by(models.ChatMessage.chat_id)
+                .having(func.count() > 1)
+                .limit(batch_chats)
+            ).all()
+            if not chat_ids:
+                return compacted
+            for chat_id in chat_ids:
+                old_messages = session.exec(
+                    select(models.ChatMessage)
+                    .where((models.ChatMessage.chat_id == chat_id) & (models.ChatMessage.timestamp < cutoff))
+                    .order_by(models.ChatMessage.timestamp.asc())
+                ).all()
+                summary = models.ChatMessage(
+                    chat_id=chat_id,
+                    is_user=False,
+                    is_agent=True,
+                    is_summary=True,
+                    content=summarizer(old_messages),
+                    timestamp=old_messages[-1].timestamp,
+                )
+                for message in old_messages:
+                    session.delete(message)
+                session.add(summary)
+            session.commit()
+        compacted += len(chat_ids)
+        if len(chat_ids) < batch_chats:
+            return compacted
+
+# --- Scheduling ---
+def run_chat_maintenance(engine):
+    """One maintenance pass: partitions, compaction, then retention."""
+    ensure_chat_partitions(engine)
+    if CHAT_COMPACT_AFTER_DAYS > 0:
+        compacted = compact_chat_history(engine)
+        if compacted:
+            print(f"Compacted chat history older than {CHAT_COMPACT_AFTER_DAYS} days for {compacted} chats.")
+    if CHAT_RETENTION_DAYS > 0:
+        purged = purge_expired_messages(engine)
+        if purged:
+            print(f"Purged {purged} chat messages older than {CHAT_RETENTION_DAYS} days.")
+
+def chat_maintenance_enabled(engine) -> bool:
+    """
+    Whether the maintenance loop has work: retention or compaction is configured, or
+    chat_messages is partitioned and so needs next months' partitions created.
+    """
+    if CHAT_RETENTION_DAYS > 0 or CHAT_COMPACT_AFTER_DAYS > 0:
+        return True
+    with engine.connect() as connection:
+        return is_chat_table_partitioned(connection)
+
+async def run_chat_maintenance_periodically(engine):
+    """Background loop started from the app lifespan when chat_maintenance_enabled()."""
+    while True:
+        try:
+            await asyncio.to_thread(run_chat_maintenance, engine)
+        except Exception as e:
+            print(f"Chat maintenance failed: {e}")
+        await asyncio.sleep(CHAT_MAINTENANCE_INTERVAL_SECONDS)
+
+if __name__ == "__main__":
+    from app.database import engine
+    if "--partition" in sys.argv[1:]:
+        partition_chat_messages_table(engine)
+    run_chat_maintenance(engine)
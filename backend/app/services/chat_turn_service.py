@@ -0,0 +1,110 @@
+"""
+One agent turn at a time per chat.
+
+A double-send, or two open tabs, used to start parallel agent runs for the same chat_id that
+read and changed the same tasks. Chat turns now go through chat_turn_queue: a chat's turns run
+one after another, and messages that arrive while a turn is running are coalesced into the
+next turn, so the agent answers them together in one invocation. Every request of a coalesced
+turn gets the same reply. A turn on an idle chat starts at once; set CHAT_COALESCE_MS to have
+it wait that long for more messages first.
+
+At most CHAT_MAX_PENDING_MESSAGES messages may wait per chat; more are refused with
+ChatQueueFull (a 429 from /chat/).
+
+The queue is per process: turns sent to different workers are not serialized.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Generic, List, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_COALESCE_MS = int(os.getenv("CHAT_COALESCE_MS", "0")) # how long an idle chat waits for more messages
+CHAT_MAX_PENDING_MESSAGES = int(os.getenv("CHAT_MAX_PENDING_MESSAGES", "5"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class ChatQueueFull(Exception):
+    """Too many messages are already waiting for this chat."""
+
+class _Turn(Generic[T]):
+    """Messages waiting to be answered together, and the future their reply is set on."""
+
+    def __init__(self, run: Callable[[List[T]], Awaitable[Any]]):
+        self.run = run # the first request's handler runs the turn for everyone in it
+        self.messages: List[T] = []
+        self.reply: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class ChatTurnQueue:
+    """Serializes and coalesces turns per chat. At most one running and one waiting turn per chat."""
+
+    def __init__(self, coalesce_ms: int = CHAT_COALESCE_MS, max_pending: int = CHAT_MAX_PENDING_MESSAGES):
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.max_pending = max_pending
+        self._waiting: Dict[Any, _Turn] = {} # chat_id -> turn still accepting messages
+        self._running: Dict[Any, asyncio.Future] = {} # chat_id -> reply of the running turn
+        self._tasks = set() # holds the turn tasks until they finish
+        self.turns = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def submit(self, chat_id, message: T, run: Callable[[List[T]], Awaitable[R]]) -> R:
+        """
+        Queues `message` for the chat and returns the reply of the turn that answers it.
+        `run` gets the turn's messages, oldest first; it is only called if this message
+        starts a new turn.
+        """
+        turn = self._waiting.get(chat_id)
+        if turn is None:
+            turn = self._waiting[chat_id] = _Turn(run)
+            task = asyncio.ensure_future(self._run_turn(chat_id, turn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif len(turn.messages) >= self.max_pending:
+            self.rejected += 1
+            raise ChatQueueFull()
+        else:
+            self.coalesced += 1
+        turn.messages.append(message)
+        # Shielded: one request going away doesn't cancel the turn for the others
+        return await asyncio.shield(turn.reply)
+
+    async def _run_turn(self, chat_id, turn: _Turn):
+        running = self._running.get(chat_id)
+        if running is not None:
+            # Collects messages until the chat's current turn is answered
+            await asyncio.wait([running])
+        elif self.coalesce_seconds > 0:
+            await asyncio.sleep(self.coalesce_seconds)
+
+        # From here on, new messages start the chat's next turn
+        del self._waiting[chat_id]
+        self._running[chat_id] = turn.reply
+        self.turns += 1
+        try:
+            reply = await turn.run(turn.messages)
+        except asyncio.CancelledError:
+            turn.reply.cancel()
+            raise
+        except Exception as e:
+            turn.reply.set_exception(e)
+            turn.reply.exception() # marks it retrieved, in case every waiter has gone away
+        else:
+            turn.reply.set_result(reply)
+        finally:
+            if self._running.get(chat_id) is turn.reply:
+                del self._running[chat_id]
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "coalesced_messages": self.coalesced,
+            "rejected_messages": self.rejected,
+            "waiting_chats": len(self._waiting),
+            "running_chats": len(self._running),
+        }
+
+chat_turn_queue = ChatTurnQueue()
@@ -0,0 +1,100 @@
+"""
+Write-behind batching for chat messages.
+
+With CHAT_WRITE_BEHIND enabled, chat turns are not inserted by the request that produced them.
+They are queued, and a single writer flushes everything queued within CHAT_WRITE_FLUSH_MS
+(up to CHAT_WRITE_BATCH_SIZE messages) as one multi-row INSERT in one transaction. Under heavy
+chat traffic this turns many small commits into a few large ones.
+
+A request still waits for the flush that contains its messages, so a turn is durable, and
+visible to /chat/history, by the time its response is sent.
+"""
+import asyncio
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert
+from dotenv import load_dotenv
+
+import app.models as models
+from app.database import engine
+
+load_dotenv()
+
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "500"))
+CHAT_WRITE_FLUSH_MS = int(os.getenv("CHAT_WRITE_FLUSH_MS", "20"))
+
+class ChatWriteBatcher:
+    """Coalesces chat message inserts from concurrent requests into multi-row INSERTs."""
+
+    def __init__(self, engine, batch_size: int = CHAT_WRITE_BATCH_SIZE, flush_ms: int = CHAT_WRITE_FLUSH_MS):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        # Started on first use, inside the running event loop
+        if self._writer is None or self._writer.done():
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._run())
+
+    async def write(self, messages: List[models.ChatMessage]):
+        """Queues `messages` and returns once the batch containing them is committed."""
+        self._ensure_started()
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put(([message.model_dump() for message in messages], done))
+        await done
+
+    async def _next_batch(self) -> Tuple[List[Tuple[List[dict], asyncio.Future]], bool]:
+        """Waits for a turn, then gathers more until the batch is full or the flush interval ends."""
+        batch = []
+        item = await self._queue.get()
+        size = 0
+        deadline = asyncio.get_running_loop().time() + self.flush_seconds
+        while item is not None:
+            batch.append(item)
+            size += len(item[0])
+            timeout = deadline - asyncio.get_running_loop().time()
+            if size >= self.batch_size or timeout <= 0:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True # None is the stop sentinel
+
+    def _insert(self, rows: List[dict]):
+        with self.engine.begin() as connection:
+            connection.execute(insert(models.ChatMessage).values(rows))
+
+    async def _flush(self, batch: List[Tuple[List[dict], asyncio.Future]]):
+        rows = [row for turn_rows, _ in batch for row in turn_rows]
+        try:
+            await asyncio.to_thread(self._insert, rows)
+        except Exception as e:
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+            return
+        for _, done in batch:
+            if not done.done():
+                done.set_result(None)
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def stop(self):
+        """Flushes whatever is still queued, then stops the writer."""
+        if self._writer is None or self._writer.done():
+            return
+        await self._queue.put(None)
+        await self._writer
+
+chat_write_batcher = ChatWriteBatcher(engine)
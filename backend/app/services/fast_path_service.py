@@ -0,0 +1,70 @@
+"""
+Replies to chat turns without the LLM, used while the LLM circuit breaker is open (see
+llm_resilience).
+
+Small talk (greetings, thanks, goodbyes) gets a canned answer and questions about today's
+tasks ("what are my tasks today?") are answered straight from the database; anything else,
+including other lists and searches, is told the assistant is unavailable for now, so the user
+gets an immediate answer instead of waiting on a provider that is down.
+"""
+import re
+from datetime import date
+from uuid import UUID
+
+from sqlmodel import Session, func, select
+
+import app.models as models
+from app.services import model_router
+from app.services.recurring_service import virtual_occurrences
+
+UNAVAILABLE_REPLY = (
+    "The assistant is temporarily unavailable, so I can't do that right now. "
+    "Please try again in a minute, or manage your tasks directly in the app."
+)
+TIMEOUT_REPLY = "Sorry, that took too long to process. Please try again."
+
+# Only a plain "what's on today?" is answered from the database: any other list, search or
+# date would get today's active tasks as a confidently wrong answer
+TODAY = re.compile(r"\btoday'?s?\b")
+NOT_TODAYS_LIST = re.compile(
+    r"\b(tomorrow|yesterday|tonight|week|month|year|backlog|completed|done|deleted|search|find|"
+    r"how many|count|recurring|every)\b|\d"
+)
+
+def fast_path_reply(message: str, user_id: UUID, session: Session) -> str:
+    """An answer to `message` that needs no LLM call."""
+    reason = model_router.classify_turn(message).reason
+    if reason == "small_talk":
+        return _small_talk_reply(message)
+    if reason == "single_intent:list" and _asks_for_todays_tasks(message):
+        return _todays_tasks_reply(user_id, session)
+    return UNAVAILABLE_REPLY
+
+def _asks_for_todays_tasks(message: str) -> bool:
+    text = message.lower()
+    return bool(TODAY.search(text)) and not NOT_TODAYS_LIST.search(text)
+
+def _small_talk_reply(message: str) -> str:
+    text = message.strip().lower()
+    if re.match(r"(thanks|thank you|thx)\b", text):
+        return "You're welcome!"
+    if re.match(r"(bye|good night)\b", text):
+        return "Bye! See you later."
+    if re.match(r"(ok|okay|cool|great)\b", text):
+        return "Great!"
+    return "Hi! The assistant is running in a limited mode right now, but I can still list today's tasks for you."
+
+def _todays_tasks_reply(user_id: UUID, session: Session) -> str:
+    today = date.today()
+    tasks = session.exec(
+        select(models.Task)
+        .where(models.Task.user_id == user_id)
+        .where(models.Task.current_status == "active")
+        .where(func.date(models.Task.task_date) == today)
+        .order_by(models.Task.created_at)
+    ).all()
+    tasks = list(tasks) + virtual_occurrences(session, user_id, today, today)
+    if not tasks:
+        return "You have no active tasks for today. (The assistant is in a limited mode right now.)"
+    lines = "\n".join(f"- {task.task_description}" for task in tasks)
+    return f"Your active tasks for today (the assistant is in a limited mode right now):\n{lines}"
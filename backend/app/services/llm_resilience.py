@@ -0,0 +1,171 @@
+"""
+Keeps a slow or failing LLM provider from hanging /chat/.
+
+- Budget: a whole chat turn (tool fetch, every LLM call and tool call) gets at most
+  CHAT_TURN_BUDGET_SECONDS; each LLM call gets at most LLM_CALL_TIMEOUT_SECONDS of what is left.
+- Retries: transient failures (timeouts, connection errors, 429 and 5xx responses) are retried
+  up to LLM_MAX_RETRIES times, with exponential backoff and full jitter, and never past the
+  turn's budget.
+- Circuit breaker: after LLM_BREAKER_FAILURE_THRESHOLD consecutive transient failures the
+  breaker opens and LLM calls fail at once for LLM_BREAKER_RESET_SECONDS. A single probe call
+  then decides whether it closes again. While it is open, chat answers from the fast path
+  (see fast_path_service) instead of the agent.
+
+The breaker is per process: each worker finds out about a degraded provider on its own.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_TURN_BUDGET_SECONDS = float(os.getenv("CHAT_TURN_BUDGET_SECONDS", "45"))
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "4"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+T = TypeVar("T")
+
+class LLMUnavailable(Exception):
+    """The circuit breaker is open: the provider is considered down."""
+
+class TurnBudgetExceeded(Exception):
+    """The chat turn ran out of its CHAT_TURN_BUDGET_SECONDS."""
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and consecutive failures are counted. Open: calls are refused
+    until reset_seconds have passed. Half-open: one probe call goes through; its success
+    closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD, reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """Whether calls are currently refused, without claiming the half-open probe."""
+        with self._lock:
+            if self.state == "open":
+                return time.monotonic() - self.opened_at < self.reset_seconds
+            return self.state == "half_open" and self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now. Every allowed call must be followed by record_*()."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._probe_in_flight = "closed", 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"LLM circuit breaker opened after {self.failures} consecutive failures.")
+                self.state, self.opened_at, self._probe_in_flight = "open", time.monotonic(), False
+
+    def release(self):
+        """Ends a call that neither succeeded nor failed transiently (e.g. a 400 or a cancel)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+llm_breaker = CircuitBreaker()
+
+# time.monotonic() deadline of the chat turn running in this context, if any
+_turn_deadline: ContextVar[Optional[float]] = ContextVar("turn_deadline", default=None)
+
+@contextmanager
+def turn_budget(seconds: float = CHAT_TURN_BUDGET_SECONDS):
+    """Sets the deadline LLM calls made inside this block (and the tasks it starts) must meet."""
+    token = _turn_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _turn_deadline.reset(token)
+
+def is_transient(error: BaseException) -> bool:
+    """Timeouts, connection problems, rate limits and server errors; not bad requests."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # openai's APITimeoutError and APIConnectionError, without importing the client here
+    if type(error).__name__ in ("APITimeoutError", "APIConnectionError"):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (status_code in (408, 409, 429) or status_code >= 500)
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retrying workers don't hit the provider in step."""
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+async def call_llm(make_call: Callable[[], Awaitable[T]], breaker: CircuitBreaker = llm_breaker) -> T:
+    """
+    Runs one LLM call under the breaker, a per-call timeout and the turn's remaining budget,
+    retrying transient failures. Raises LLMUnavailable while the breaker is open and
+    TurnBudgetExceeded once the budget is spent.
+    """
+    attempt = 0
+    while True:
+        deadline = _turn_deadline.get()
+        remaining = deadline - time.monotonic() if deadline is not None else LLM_CALL_TIMEOUT_SECONDS
+        if remaining <= 0:
+            raise TurnBudgetExceeded()
+        if not breaker.allow():
+            raise LLMUnavailable("The language model provider is unavailable.")
+        try:
+            result = await asyncio.wait_for(make_call(), timeout=min(LLM_CALL_TIMEOUT_SECONDS, remaining))
+        except BaseException as e:
+            if not isinstance(e, Exception) or not is_transient(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            delay = retry_delay(attempt)
+            out_of_budget = deadline is not None and time.monotonic() + delay >= deadline
+            if breaker.is_open():
+                raise LLMUnavailable("The language model provider is unavailable.") from e
+            if out_of_budget:
+                raise TurnBudgetExceeded() from e
+            if attempt >= LLM_MAX_RETRIES:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
@@ -0,0 +1,78 @@
+"""
+Chooses the LLM tier for each chat turn.
+
+Simple turns (small talk, or a short message with a single clear intent such as "mark the
+dentist task as done") go to the fast tier, AGENT_FAST_MODEL. Long messages, several intents
+in one message, bulk or conditional requests, planning questions, and messages whose intent
+isn't recognised go to the strong tier, AGENT_STRONG_MODEL. A fast run that fails or looks
+unsure is escalated to the strong tier (see agent_service).
+
+The classifier is plain heuristics, with no LangChain imports, so it is cheap and easy to test.
+Models are built by a factory that tests can replace with fake chat models (set_model_factory
+in agent_service).
+"""
+import os
+import re
+from typing import Optional
+
+from sqlmodel import SQLModel
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
+
+AGENT_MODEL_ROUTING = os.getenv("AGENT_MODEL_ROUTING", "on") # "off" sends every turn to the strong tier
+AGENT_FAST_MODEL = os.getenv("AGENT_FAST_MODEL", "gpt-4o-mini")
+AGENT_STRONG_MODEL = os.getenv("AGENT_STRONG_MODEL", "gpt-4o")
+AGENT_FAST_MAX_CHARS = int(os.getenv("AGENT_FAST_MAX_CHARS", "200")) # longer messages always use the strong tier
+
+# What a message asks for. One match keeps a short message on the fast tier; several don't.
+TURN_INTENTS = {
+    "create": re.compile(r"\b(add|create|new task|remind me|schedule)\b"),
+    "list": re.compile(r"\b(show|list|what'?s|what (is|are|do)|how many|count|any tasks|search|find)\b"),
+    "complete": re.compile(r"\b(done|complete|completed|finish|finished|mark|tick)\b"),
+    "delete": re.compile(r"\b(delete|remove|cancel|drop)\b"),
+    "update": re.compile(r"\b(rename|change|move|update|edit|postpone)\b"),
+}
+# Requests that need several tool calls or some reasoning, however short they are
+COMPLEX_TURN = re.compile(
+    r"\b(all|every|each|everything|if|unless|except|plan|prioriti[sz]e|reschedule|organi[sz]e|"
+    r"summari[sz]e|suggest|recommend|why|compare|and then)\b"
+)
+SMALL_TALK = re.compile(r"^(hi|hello|hey|thanks|thank you|thx|ok|okay|cool|great|bye|good (morning|night))\b[\s!.]*$")
+
+class RoutingDecision(SQLModel):
+    """The tier chosen for a turn and why."""
+    tier: str
+    reason: str
+
+def classify_turn(message: str) -> RoutingDecision:
+    """Picks the fast or strong tier for a user message."""
+    if AGENT_MODEL_ROUTING == "off":
+        return RoutingDecision(tier=STRONG_TIER, reason="routing_off")
+    text = " ".join(message.lower().split())
+    if len(text) > AGENT_FAST_MAX_CHARS:
+        return RoutingDecision(tier=STRONG_TIER, reason="long_message")
+    if SMALL_TALK.match(text):
+        return RoutingDecision(tier=FAST_TIER, reason="small_talk")
+    if COMPLEX_TURN.search(text):
+        return RoutingDecision(tier=STRONG_TIER, reason="complex_request")
+    intents = [intent for intent, pattern in TURN_INTENTS.items() if pattern.search(text)]
+    if len(intents) > 1:
+        return RoutingDecision(tier=STRONG_TIER, reason="multiple_intents")
+    if not intents:
+        return RoutingDecision(tier=STRONG_TIER, reason="unclear_intent")
+    return RoutingDecision(tier=FAST_TIER, reason=f"single_intent:{intents[0]}")
+
+def model_name(tier: str) -> str:
+    return AGENT_FAST_MODEL if tier == FAST_TIER else AGENT_STRONG_MODEL
+
+def needs_escalation(output: Optional[str], tool_errors: int) -> bool:
+    """Whether a fast-tier answer looks unreliable: empty, cut off by the executor, or after failed tool calls."""
+    if not output or not output.strip():
+        return True
+    if output.startswith("Agent stopped due to"): # AgentExecutor's iteration/time limit message
+        return True
+    return tool_errors > 0
@@ -0,0 +1,246 @@
+"""
+Recurring tasks ("every weekday: standup") without a row per day.
+
+A RecurringTaskRule stores an RRULE-style recurrence. Its occurrences are expanded lazily:
+the task views merge them in as virtual active tasks for the dates they are asked about, and
+an occurrence is only written to 'tasks' when it is changed (e.g. marked completed). Its
+task_id is the first 12 bytes of the rule_id followed by the date's ordinal (see
+occurrence_id), so a virtual occurrence and the row it becomes share one id, and an id can be
+decoded back to its rule and date without scanning. A written occurrence keeps its rule and
+date in recurring_rule_id and occurrence_date, so it is never listed twice. Deleting an
+occurrence records its date in the rule's excluded_dates.
+
+Supported RRULE parts: FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL, BYDAY (MO..SU),
+BYMONTHDAY (1..31, or -1..-31 from the end of the month), UNTIL and COUNT.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+from uuid import UUID
+
+from sqlmodel import Session, SQLModel, select, or_
+
+import app.models as models
+
+RRULE_FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+RRULE_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+RRULE_PARTS = ("FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "UNTIL", "COUNT")
+_COUNT_SCAN_DAYS = 100 * 366 # COUNT is resolved to a last date by scanning at most this far
+
+class Recurrence(SQLModel):
+    """A parsed RRULE."""
+    freq: str
+    interval: int = 1
+    weekdays: List[int] = []
+    monthdays: List[int] = []
+    until: Optional[date] = None
+    count: Optional[int] = None
+
+# --- RRULE parsing and matching ---
+def _positive_int(name: str, value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"{name} must be a positive integer.")
+    return int(value)
+
+@lru_cache(maxsize=1024)
+def parse_rrule(rrule: str) -> Recurrence:
+    """Parses an RRULE string such as 'FREQ=WEEKLY;BYDAY=MO,WE'. Raises ValueError if unsupported."""
+    text = rrule.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    parts = {}
+    for part in filter(None, text.split(";")):
+        name, _, value = part.partition("=")
+        name, value = name.strip().upper(), value.strip().upper()
+        if name not in RRULE_PARTS:
+            raise ValueError(f"Unsupported RRULE part '{name}'. Supported parts: {', '.join(RRULE_PARTS)}.")
+        if not value:
+            raise ValueError(f"RRULE part '{name}' has no value.")
+        parts[name] = value
+
+    if parts.get("FREQ") not in RRULE_FREQUENCIES:
+        raise ValueError(f"FREQ must be one of: {', '.join(RRULE_FREQUENCIES)}.")
+    recurrence = Recurrence(freq=parts["FREQ"])
+    if "INTERVAL" in parts:
+        recurrence.interval = _positive_int("INTERVAL", parts["INTERVAL"])
+    if "COUNT" in parts:
+        recurrence.count = _positive_int("COUNT", parts["COUNT"])
+    if "BYDAY" in parts:
+        for weekday in parts["BYDAY"].split(","):
+            if weekday not in RRULE_WEEKDAYS:
+                raise ValueError(f"Invalid BYDAY value '{weekday}'. Use MO, TU, WE, TH, FR, SA or SU.")
+            recurrence.weekdays.append(RRULE_WEEKDAYS[weekday])
+    if "BYMONTHDAY" in parts:
+        for monthday in parts["BYMONTHDAY"].split(","):
+            try:
+                value = int(monthday)
+            except ValueError:
+                value = 0
+            if not 1 <= abs(value) <= 31:
+                raise ValueError(f"Invalid BYMONTHDAY value '{monthday}'. Use 1 to 31 or -1 to -31.")
+            recurrence.monthdays.append(value)
+    if "UNTIL" in parts:
+        try:
+            recurrence.until = datetime.strptime(parts["UNTIL"].replace("-", "")[:8], "%Y%m%d").date()
+        except ValueError:
+            raise ValueError("UNTIL must be a date such as 20251231.")
+    if recurrence.count is not None and recurrence.until is not None:
+        raise ValueError("An RRULE can't have both UNTIL and COUNT.")
+    return recurrence
+
+def _matches_monthday(day: date, monthdays: List[int]) -> bool:
+    days_in_month = ((day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).day
+    return day.day in monthdays or day.day - days_in_month - 1 in monthdays
+
+def occurs_on(recurrence: Recurrence, start_date: date, day: date) -> bool:
+    """Whether a rule starting on `start_date` has an occurrence on `day` (UNTIL and COUNT aside)."""
+    if day < start_date:
+        return False
+    if recurrence.weekdays and day.weekday() not in recurrence.weekdays:
+        return False
+    if recurrence.monthdays and not _matches_monthday(day, recurrence.monthdays):
+        return False
+    by_rules = recurrence.weekdays or recurrence.monthdays
+    if recurrence.freq == "DAILY":
+        return (day - start_date).days % recurrence.interval == 0
+    if recurrence.freq == "WEEKLY":
+        if not recurrence.weekdays and day.weekday() != start_date.weekday():
+            return False
+        # Weeks start on Monday, as with the RRULE default WKST=MO
+        weeks = ((day - timedelta(days=day.weekday())) - (start_date - timedelta(days=start_date.weekday()))).days // 7
+        return weeks % recurrence.interval == 0
+    if recurrence.freq == "MONTHLY":
+        if not by_rules and day.day != start_date.day:
+            return False
+        return ((day.year - start_date.year) * 12 + day.month - start_date.month) % recurrence.interval == 0
+    # YEARLY: on the start date's day, or on the BYDAY/BYMONTHDAY days of the start date's month
+    if day.month != start_date.month or (not by_rules and day.day != start_date.day):
+        return False
+    return (day.year - start_date.year) % recurrence.interval == 0
+
+def last_occurrence_date(rrule: str, start_date: date) -> Optional[date]:
+    """
+    The last date a rule can occur on: its UNTIL, or the date of its COUNT-th occurrence.
+    None when the rule never ends. Raises ValueError for an invalid or unsupported RRULE.
+    """
+    recurrence = parse_rrule(rrule)
+    if recurrence.count is None:
+        return recurrence.until
+    day, found = start_date, 0
+    last_day = start_date + timedelta(days=_COUNT_SCAN_DAYS)
+    while day <= last_day:
+        if occurs_on(recurrence, start_date, day):
+            found += 1
+            if found == recurrence.count:
+                return day
+        day += timedelta(days=1)
+    return last_day
+
+# --- Occurrences ---
+def occurrence_id(rule_id: UUID, day: date) -> UUID:
+    """The rule_id's first 12 bytes, then the date's ordinal in the last 4."""
+    return UUID(bytes=rule_id.bytes[:12] + day.toordinal().to_bytes(4, "big"))
+
+def _decode_occurrence_id(task_id: UUID):
+    """The (rule_id prefix, date) an occurrence id was built from, or None if it can't be one."""
+    ordinal = int.from_bytes(task_id.bytes[12:], "big")
+    if not 1 <= ordinal <= date.max.toordinal():
+        return None
+    return task_id.bytes[:12], date.fromordinal(ordinal)
+
+def _occurrence_task(rule: models.RecurringTaskRule, day: date) -> models.Task:
+    return models.Task(
+        task_id=occurrence_id(rule.rule_id, day),
+        user_id=rule.user_id,
+        task_description=rule.task_description,
+        current_status="active",
+        task_date=day,
+        created_at=rule.created_at,
+        modified_at=rule.modified_at,
+        last_status_change_at=rule.created_at,
+        recurring_rule_id=rule.rule_id,
+        occurrence_date=day,
+    )
+
+def _rule_days(rule: models.RecurringTaskRule, start_date: date, end_date: date) -> List[date]:
+    """Dates from start_date to end_date (inclusive) the rule has a non-deleted occurrence on."""
+    recurrence = parse_rrule(rule.rrule)
+    first_day = max(start_date, rule.start_date)
+    last_day = min(end_date, rule.until) if rule.until else end_date
+    days = []
+    day = first_day
+    while day <= last_day:
+        if occurs_on(recurrence, rule.start_date, day) and day.isoformat() not in rule.excluded_dates:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def _user_rules(session: Session, user_id: UUID, start_date: date, end_date: date) -> List[models.RecurringTaskRule]:
+    return session.exec(
+        select(models.RecurringTaskRule).where(
+            (models.RecurringTaskRule.user_id == user_id) &
+            (models.RecurringTaskRule.start_date <= end_date) &
+            or_(models.RecurringTaskRule.until == None, models.RecurringTaskRule.until >= start_date)
+        )
+    ).all()
+
+def virtual_occurrences(session: Session, user_id: UUID, start_date: date, end_date: date) -> List[models.Task]:
+    """
+    The user's recurring occurrences from start_date to end_date (inclusive) that have not been
+    written to 'tasks' (or archived) yet, as unsaved active Task objects.
+    """
+    occurrences = [
+        _occurrence_task(rule, day)
+        for rule in _user_rules(session, user_id, start_date, end_date)
+        for day in _rule_days(rule, start_date, end_date)
+    ]
+    return _unwritten(session, occurrences, start_date, end_date)
+
+def unwritten_occurrences(session: Session, rule: models.RecurringTaskRule, start_date: date, end_date: date) -> List[models.Task]:
+    """One rule's occurrences from start_date to end_date (inclusive) not written yet, as unsaved Tasks."""
+    occurrences = [_occurrence_task(rule, day) for day in _rule_days(rule, start_date, end_date)]
+    return _unwritten(session, occurrences, start_date, end_date)
+
+def _unwritten(session: Session, occurrences: List[models.Task], start_date: date, end_date: date) -> List[models.Task]:
+    if not occurrences:
+        return []
+    rule_ids = {task.recurring_rule_id for task in occurrences}
+    written = set()
+    for table in (models.Task, models.TaskArchive):
+        written.update(session.exec(
+            select(table.recurring_rule_id, table.occurrence_date).where(
+                table.recurring_rule_id.in_(rule_ids) &
+                (table.occurrence_date >= start_date) & (table.occurrence_date <= end_date)
+            )
+        ).all())
+    return [task for task in occurrences if (task.recurring_rule_id, task.occurrence_date) not in written]
+
+def find_occurrence(session: Session, user_id: UUID, task_id: UUID) -> Optional[models.Task]:
+    """
+    The user's virtual occurrence with this id, as an unsaved Task: adding it to the session
+    writes it to 'tasks'. The id is decoded into a rule id prefix and a date, so this is one
+    primary key range lookup. Call it after looking the id up in 'tasks' and the archive.
+    """
+    decoded = _decode_occurrence_id(task_id)
+    if decoded is None:
+        return None
+    prefix, day = decoded
+    rules = session.exec(
+        select(models.RecurringTaskRule).where(
+            (models.RecurringTaskRule.user_id == user_id) &
+            (models.RecurringTaskRule.rule_id >= UUID(bytes=prefix + bytes(4))) &
+            (models.RecurringTaskRule.rule_id <= UUID(bytes=prefix + b"\xff" * 4))
+        )
+    ).all()
+    for rule in rules:
+        if _rule_days(rule, day, day):
+            return _occurrence_task(rule, day)
+    return None
+
+def exclude_occurrence(session: Session, task: models.Task):
+    """Keeps the rule of a deleted occurrence from listing it again. Not committed."""
+    rule = session.get(models.RecurringTaskRule, task.recurring_rule_id)
+    if rule is not None and task.occurrence_date.isoformat() not in rule.excluded_dates:
+        # Reassigned, not appended: the JSON column only tracks assignment
+        rule.excluded_dates = [*rule.excluded_dates, task.occurrence_date.isoformat()]
+        session.add(rule)
@@ -0,0 +1,165 @@
+"""
+Daily rollover of unfinished tasks.
+
+Active tasks whose task_date has passed are moved to backlog by set-based UPDATEs in bounded
+batches, instead of one update_task call per task. A rolled-over task records 'active' as its
+previous status and the midnight after its task_date as its status change, so it appears on
+the backlog of every day after its date even when the job ran late.
+
+Recurring occurrences whose date has passed and that were never written are written to
+'tasks' as backlog tasks in the same way, so they don't stay active forever. Only the last
+TASK_ROLLOVER_OCCURRENCE_DAYS days are looked at, and never days before the rule was created,
+so a rule with an old start date doesn't fill the backlog with one task per day. Each rule's
+rolled_over_until records how far this has been done, so every occurrence is written once.
+
+Runs on a timer inside the API (see app.main) when TASK_ROLLOVER_INTERVAL_SECONDS is set, or
+as a one-off job, e.g. from cron just after midnight:
+    python -m app.services.rollover_service
+"""
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import case, update
+from sqlmodel import Session, select, or_
+from dotenv import load_dotenv
+
+import app.models as models
+from app.invalidation import invalidation_bus, TASKS_TOPIC
+from app.services.recurring_service import unwritten_occurrences
+
+load_dotenv()
+
+# Off by default, like the other jobs that change data. 3600 (hourly) rolls tasks over soon
+# after midnight; runs that find nothing are cheap.
+TASK_ROLLOVER_INTERVAL_SECONDS = int(os.getenv("TASK_ROLLOVER_INTERVAL_SECONDS", "0")) # 0 disables the timer
+TASK_ROLLOVER_BATCH_SIZE = int(os.getenv("TASK_ROLLOVER_BATCH_SIZE", "5000"))
+# How many past days of a recurring rule's occurrences are written as backlog tasks; older
+# missed occurrences are left as they are
+TASK_ROLLOVER_OCCURRENCE_DAYS = int(os.getenv("TASK_ROLLOVER_OCCURRENCE_DAYS", "7"))
+
+def roll_over_tasks(engine, today: Optional[date] = None, user_id: Optional[UUID] = None, batch_size: int = TASK_ROLLOVER_BATCH_SIZE) -> int:
+    """
+    Moves active tasks dated before `today` to backlog, for every user or only `user_id`, and
+    writes the recurring occurrences dated before `today` as backlog tasks. One short
+    transaction per batch of at most `batch_size` tasks, one task_date at a time so each batch
+    is a single UPDATE. Returns the number of tasks rolled over.
+    """
+    today = today or date.today()
+    rolled = roll_over_occurrences(engine, today, user_id, batch_size)
+    overdue = (models.Task.current_status == "active") & (models.Task.task_date < today)
+    if user_id is not None:
+        overdue &= models.Task.user_id == user_id
+    with Session(engine) as session:
+        task_dates = session.exec(select(models.Task.task_date).where(overdue).distinct()).all()
+
+    for task_date in sorted(task_dates):
+        rolled_at = _rolled_over_at(task_date)
+        while True:
+            with Session(engine) as session:
+                batch = session.exec(
+                    select(models.Task.task_id, models.Task.user_id)
+                    .where(overdue & (models.Task.task_date == task_date))
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True) # concurrent runs take disjoint batches
+                ).all()
+                if not batch:
+                    break
+                session.exec(
+                    update(models.Task)
+                    .where(models.Task.task_id.in_([task_id for task_id, _ in batch]) & (models.Task.current_status == "active"))
+                    .values(
+                        previous_status="active",
+                        current_status="backlog",
+                        # Never earlier than a change the task already had (e.g. created after its date)
+                        last_status_change_at=case(
+                            (models.Task.last_status_change_at > rolled_at, models.Task.last_status_change_at),
+                            else_=rolled_at,
+                        ),
+                        modified_at=datetime.utcnow(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+            rolled += len(batch)
+            for batch_user_id in {batch_user_id for _, batch_user_id in batch}:
+                invalidation_bus.publish(TASKS_TOPIC, batch_user_id)
+            if len(batch) < batch_size:
+                break
+    return rolled
+
+def _rolled_over_at(task_date: date) -> datetime:
+    return datetime.combine(task_date + timedelta(days=1), time.min)
+
+def _first_day_to_roll_over(rule: models.RecurringTaskRule, today: date) -> date:
+    first_day = max(rule.start_date, rule.created_at.date(), today - timedelta(days=TASK_ROLLOVER_OCCURRENCE_DAYS))
+    if rule.rolled_over_until is not None:
+        first_day = max(first_day, rule.rolled_over_until + timedelta(days=1))
+    return first_day
+
+def roll_over_occurrences(engine, today: date, user_id: Optional[UUID] = None, batch_size: int = TASK_ROLLOVER_BATCH_SIZE) -> int:
+    """
+    Writes the recurring occurrences dated before `today` that were never written (and not
+    deleted) as backlog tasks, looking back at most TASK_ROLLOVER_OCCURRENCE_DAYS days. One
+    transaction per rule and batch of at most `batch_size` days, each advancing the rule's
+    rolled_over_until. Returns how many occurrences were written.
+    """
+    yesterday = today - timedelta(days=1)
+    due = (models.RecurringTaskRule.start_date < today) & or_(
+        models.RecurringTaskRule.rolled_over_until == None,
+        models.RecurringTaskRule.rolled_over_until < yesterday,
+    )
+    if user_id is not None:
+        due &= models.RecurringTaskRule.user_id == user_id
+    with Session(engine) as session:
+        rule_ids = session.exec(select(models.RecurringTaskRule.rule_id).where(due)).all()
+
+    written = 0
+    for rule_id in rule_ids:
+        while True:
+            with Session(engine) as session:
+                rule = session.exec(
+                    select(models.RecurringTaskRule)
+                    .where(due & (models.RecurringTaskRule.rule_id == rule_id))
+                    .with_for_update(skip_locked=True) # another run is writing this rule's occurrences
+                ).first()
+                if rule is None:
+                    break
+                # A rule has at most one occurrence a day, so a batch of days is a bounded batch of tasks
+                first_day = _first_day_to_roll_over(rule, today)
+                last_day = min(yesterday, first_day + timedelta(days=batch_size - 1))
+                occurrences = unwritten_occurrences(session, rule, first_day, last_day)
+                for task in occurrences:
+                    task.previous_status, task.current_status = "active", "backlog"
+                    task.last_status_change_at = max(_rolled_over_at(task.task_date), task.last_status_change_at)
+                    task.modified_at = datetime.utcnow()
+                    session.add(task)
+                rule.rolled_over_until = last_day
+                session.add(rule)
+                rule_user_id = rule.user_id
+                session.commit()
+            written += len(occurrences)
+            if occurrences:
+                invalidation_bus.publish(TASKS_TOPIC, rule_user_id)
+            if last_day >= yesterday:
+                break
+    return written
+
+async def run_rollover_periodically(engine):
+    """Background loop started from the app lifespan unless TASK_ROLLOVER_INTERVAL_SECONDS is 0."""
+    while True:
+        try:
+            rolled = await asyncio.to_thread(roll_over_tasks, engine)
+            if rolled:
+                print(f"Rolled {rolled} unfinished tasks over to backlog.")
+        except Exception as e:
+            print(f"Task rollover failed: {e}")
+        await asyncio.sleep(TASK_ROLLOVER_INTERVAL_SECONDS)
+
+if __name__ == "__main__":
+    from app.database import engine
+    print(f"Rolled {roll_over_tasks(engine)} unfinished tasks over to backlog.")
+    invalidation_bus.stop() # sends the queued invalidations before exiting
@@ -0,0 +1,153 @@
+"""
+Bulk export and import of a user's tasks, as NDJSON (one JSON object per line) or CSV.
+
+Export streams rows from a server-side cursor in batches, so memory stays constant however
+many tasks a user has. Import reads the uploaded file row by row, rejects invalid rows with
+their line number, and inserts the valid ones in batches (COPY on PostgreSQL) within a single
+transaction.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+import app.models as models
+
+TASK_TRANSFER_FORMATS = ("ndjson", "csv")
+TASK_STATUSES = ("active", "completed", "backlog")
+TASK_EXPORT_COLUMNS = [
+    "task_id", "task_description", "current_status", "task_date",
+    "created_at", "modified_at", "previous_status", "last_status_change_at",
+]
+TASK_EXPORT_BATCH_SIZE = 1000
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_ERRORS = 100
+
+_INSERT_COLUMNS = [
+    "task_id", "user_id", "task_description", "current_status", "task_date",
+    "created_at", "modified_at", "previous_status", "last_status_change_at",
+]
+
+# --- Export ---
+def _format_batch(rows: List[Tuple], export_format: str) -> str:
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(jsonable_encoder(list(row)) for row in rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(jsonable_encoder(dict(zip(TASK_EXPORT_COLUMNS, row)))) + "\n" for row in rows)
+
+def export_tasks(engine, user_id: UUID, export_format: str) -> Iterator[str]:
+    """
+    Yields the user's tasks, archived ones included, as chunks of NDJSON or CSV text. Opens
+    its own session: it runs while the response is streamed, after the request's session
+    has been closed.
+    """
+    if export_format == "csv":
+        yield ",".join(TASK_EXPORT_COLUMNS) + "\r\n"
+    with Session(engine) as session:
+        for model in (models.Task, models.TaskArchive):
+            result = session.exec(
+                select(*[getattr(model, column) for column in TASK_EXPORT_COLUMNS])
+                .where(model.user_id == user_id)
+                .order_by(model.task_date)
+                .execution_options(yield_per=TASK_EXPORT_BATCH_SIZE) # server-side cursor
+            )
+            for rows in result.partitions():
+                yield _format_batch(rows, export_format)
+
+# --- Import ---
+def _parse_rows(text: io.TextIOBase, import_format: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yields (line, row, error) for every row of the file; exactly one of row and error is set."""
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        line = 2
+        try:
+            for row in reader:
+                if None in row:
+                    yield line, None, "Row has more fields than the header."
+                else:
+                    # Empty CSV cells mean "not set"
+                    yield line, {key: value for key, value in row.items() if value != ""}, None
+                line = reader.line_num + 1
+        except csv.Error as e:
+            yield line, None, f"Malformed CSV, stopped reading: {e}"
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            yield line, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield line, row, None
+        else:
+            yield line, None, "Each line must be a JSON object."
+
+def _task_values(user_id: UUID, row: Dict[str, Any]) -> Dict[str, Any]:
+    task = models.TaskImportRow.model_validate(row)
+    status = task.current_status.lower()
+    if status not in TASK_STATUSES:
+        raise ValueError(f"Invalid current_status '{task.current_status}'. Must be 'active', 'completed', or 'backlog'.")
+    created_at = task.created_at or datetime.utcnow()
+    return {
+        "task_id": uuid4(),
+        "user_id": user_id,
+        "task_description": task.task_description,
+        "current_status": status,
+        "task_date": task.task_date or date.today(),
+        "created_at": created_at,
+        "modified_at": task.modified_at or created_at,
+        "previous_status": task.previous_status,
+        "last_status_change_at": task.last_status_change_at or created_at,
+    }
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors())
+    return str(error)
+
+def _insert_tasks(connection, rows: List[Dict[str, Any]]):
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.driver_connection.cursor()
+        with cursor.copy(f"COPY tasks ({', '.join(_INSERT_COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([row[column] for column in _INSERT_COLUMNS])
+    else:
+        connection.execute(insert(models.Task), rows)
+
+def import_tasks(engine, user_id: UUID, source: BinaryIO, import_format: str) -> models.TaskImportResult:
+    """
+    Creates a task for every valid row of `source` and reports the invalid ones. Valid rows
+    are inserted in batches of TASK_IMPORT_BATCH_SIZE, all in one transaction.
+    """
+    result = models.TaskImportResult()
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="" if import_format == "csv" else None)
+    batch = []
+    with engine.begin() as connection:
+        for line, row, error in _parse_rows(text, import_format):
+            if row is not None:
+                try:
+                    batch.append(_task_values(user_id, row))
+                except (ValidationError, ValueError) as e:
+                    error = _error_message(e)
+            if error is not None:
+                result.failed += 1
+                if len(result.errors) < TASK_IMPORT_MAX_ERRORS:
+                    result.errors.append(models.TaskImportError(line=line, error=error))
+            if len(batch) >= TASK_IMPORT_BATCH_SIZE:
+                _insert_tasks(connection, batch)
+                result.imported += len(batch)
+                batch = []
+        if batch:
+            _insert_tasks(connection, batch)
+            result.imported += len(batch)
+    return result
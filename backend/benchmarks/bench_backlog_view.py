@@ -0,0 +1,132 @@
+"""
+Backlog view benchmark.
+
+Grows one user's task history (completed tasks spread over past days, plus a fixed number of
+tasks currently in backlog) and times the backlog list and the task counts for today at each
+size. With the partial backlog index both only read the user's current backlog, so the
+timings should stay flat as the history grows. Fails when the largest size is more than
+--max-ratio times slower than the smallest.
+
+Runs against a throwaway SQLite database. Run from the backend directory:
+    python benchmarks/bench_backlog_view.py --sizes 1000 10000 100000 --max-ratio 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_backlog_view.db")
+
+# Must be set before the app modules are imported
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("DATABASE_READ_URLS", None)
+os.environ["TASK_CACHE_BACKEND"] = "off"
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+import app.models as models  # noqa: E402
+from app.database import engine, create_db_and_tables  # noqa: E402
+from app.routers.task_router import list_user_tasks, get_user_task_counts  # noqa: E402
+
+INSERT_BATCH_SIZE = 5000
+
+
+def add_history(user_id, start: int, end: int, today: date):
+    """Inserts completed tasks number start..end-1, about 20 per day going back from today."""
+    rows = []
+    for n in range(start, end):
+        day = today - timedelta(days=1 + n // 20)
+        changed_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=9, minutes=n % 600)
+        rows.append({
+            "task_id": uuid4(), "user_id": user_id, "task_description": f"History task {n}",
+            "current_status": "completed", "previous_status": "active", "task_date": day,
+            "created_at": changed_at, "modified_at": changed_at, "last_status_change_at": changed_at,
+        })
+    with engine.begin() as connection:
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            connection.execute(insert(models.Task), rows[i:i + INSERT_BATCH_SIZE])
+
+
+def add_backlog(user_id, count: int, today: date):
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(insert(models.Task), [{
+            "task_id": uuid4(), "user_id": user_id, "task_description": f"Backlog task {n}",
+            "current_status": "backlog", "previous_status": "active", "task_date": today - timedelta(days=n + 1),
+            "created_at": now, "modified_at": now, "last_status_change_at": now - timedelta(days=n),
+        } for n in range(count)])
+
+
+def best_ms(call, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backlog view as a user's task history grows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="History sizes (tasks per user) to time.")
+    parser.add_argument("--backlog", type=int, default=50, help="Number of tasks currently in backlog.")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per view and size; the best is reported.")
+    parser.add_argument("--max-ratio", type=float, default=None, help="Fail if the largest size is this many times slower than the smallest.")
+    args = parser.parse_args()
+
+    engine.echo = False
+    create_db_and_tables()
+    today = date.today()
+    with Session(engine) as session:
+        user = models.User(username=f"bench-{uuid4().hex[:8]}", hashed_password="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.expunge(user)
+    add_backlog(user.user_id, args.backlog, today)
+
+    def backlog_list():
+        with Session(engine) as session:
+            tasks = asyncio.run(list_user_tasks(
+                session=session, current_user=user, status="backlog", target_date=today,
+                sort_by=None, sort_order="asc", limit=100, offset=0,
+            ))
+        assert len(tasks) == min(args.backlog, 100)
+
+    def counts():
+        with Session(engine) as session:
+            task_counts = asyncio.run(get_user_task_counts(session=session, current_user=user, target_date=today))
+        assert task_counts.backlog == args.backlog
+
+    print(f"{'history':>10}  {'backlog list':>14}  {'counts':>10}")
+    results = []
+    inserted = 0
+    for size in sorted(args.sizes):
+        add_history(user.user_id, inserted, size, today)
+        inserted = size
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        list_ms, counts_ms = best_ms(backlog_list, args.runs), best_ms(counts, args.runs)
+        results.append((size, list_ms, counts_ms))
+        print(f"{size:>10}  {list_ms:>11.2f} ms  {counts_ms:>7.2f} ms")
+
+    failed = False
+    if args.max_ratio is not None and len(results) > 1:
+        (_, first_list, first_counts), (last_size, last_list, last_counts) = results[0], results[-1]
+        for view, first, last in (("backlog list", first_list, last_list), ("counts", first_counts, last_counts)):
+            if last > first * args.max_ratio:
+                print(f"FAIL: {view} is {last / first:.1f}x slower at {last_size} tasks, budget is {args.max_ratio:.1f}x")
+                failed = True
+    os.remove(DB_PATH)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
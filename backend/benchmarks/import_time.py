@@ -0,0 +1,94 @@
+"""
+Import-time benchmark for the API workers.
+
+Imports app.main in fresh interpreters, reports the best wall-clock time over several runs
+plus the slowest modules from `python -X importtime`, and fails when:
+  - the import takes longer than --max-ms, or
+  - the agent stack (langchain*, openai) got imported, which must only happen on first chat use.
+
+Run from the backend directory:
+    python benchmarks/import_time.py --mode api --max-ms 1500
+    python benchmarks/import_time.py --mode full --max-ms 3000
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that belong to the lazily loaded agent stack
+AGENT_MODULE_PREFIXES = ("langchain", "langchain_core", "langchain_openai", "langchain_mcp_adapters", "openai")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import app.main
+elapsed_ms = (time.perf_counter() - start) * 1000
+prefixes = {prefixes!r}
+leaked = sorted({{m.split('.')[0] for m in sys.modules if m.split('.')[0] in prefixes}})
+print(f"{{elapsed_ms:.1f}}|{{','.join(leaked)}}")
+"""
+
+
+def run_probe(env: dict) -> tuple[float, list[str]]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(prefixes=AGENT_MODULE_PREFIXES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"FAIL: importing app.main raised:\n{result.stderr}")
+    elapsed, leaked = result.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [m for m in leaked.split(",") if m]
+
+
+def slowest_modules(env: dict, top: int) -> list[tuple[int, str]]:
+    """Parses `-X importtime` output into (cumulative_us, module) pairs, slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth == 1: # modules imported directly by a top-level import such as app.main
+            timings.append((int(cumulative), module.strip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of app.main.")
+    parser.add_argument("--mode", choices=["api", "full"], default="api", help="APP_MODE to import the app with.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time.")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the best run exceeds this many milliseconds.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list.")
+    args = parser.parse_args()
+
+    env = dict(os.environ, APP_MODE=args.mode)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env.pop("OPENAI_API_KEY", None) # importing the app must not need it
+
+    runs = [run_probe(env) for _ in range(args.runs)]
+    best_ms = min(elapsed for elapsed, _ in runs)
+    leaked = runs[0][1]
+
+    print(f"APP_MODE={args.mode}: best {best_ms:.1f} ms over {args.runs} runs")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, module in slowest_modules(env, args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: agent stack imported at startup: {', '.join(leaked)}")
+        failed = True
+    if args.max_ms is not None and best_ms > args.max_ms:
+        print(f"FAIL: import took {best_ms:.1f} ms, budget is {args.max_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
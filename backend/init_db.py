@@ -22,9 +22,15 @@ def create_db_and_tables():
     """
     # Ensure all models are imported so SQLModel.metadata knows about them
     # This imports the User and Task models, making them known to SQLModel
-    from app.models import User, Task, ChatMessage
+    from app.models import User, Task, TaskArchive, RecurringTaskRule, ChatMessage, IdempotencyRecord, AgentTrace
+    from app.database import add_missing_columns, upgrade_foreign_keys, create_missing_indexes
+    from app.search import ensure_search_index
     print("Attempting to create database tables (users and tasks) if they don't exist...")
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
+    upgrade_foreign_keys(engine)
+    create_missing_indexes(engine)
+    ensure_search_index(engine)
     print("Database tables created/checked successfully.")
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+# seed_db.py
+"""
+Fills a database with a large synthetic dataset for scale testing: users, tasks with realistic
+dates and status transitions, and chat history. The same --seed always produces the same data
+(dates are relative to the day it runs).
+
+Rows are written with COPY on PostgreSQL and with batched INSERTs elsewhere (SQLite), one
+transaction per --chunk-users users, so memory stays flat however large the dataset is.
+Every seeded user can log in with the password "password".
+
+Examples (from the backend directory):
+    python seed_db.py --users 1000 --tasks-per-user 200
+    python seed_db.py --database-url postgresql+psycopg://... --users 100000 --tasks-per-user 50 --seed 7
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Sequence, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from passlib.hash import bcrypt
+from sqlalchemy import insert
+from sqlmodel import SQLModel, create_engine
+
+load_dotenv()
+
+SEED_PASSWORD = "password"
+# Fixed salt: hashing once per run keeps seeding fast, and the salt keeps it deterministic
+SEED_PASSWORD_HASH = bcrypt.using(salt="TapYouSeedDatasetSalt.").hash(SEED_PASSWORD)
+
+INSERT_BATCH_SIZE = 5000
+
+TASK_VERBS = ["Write", "Review", "Call", "Email", "Plan", "Fix", "Buy", "Prepare", "Book", "Clean", "Read", "Update"]
+TASK_OBJECTS = [
+    "the quarterly report", "dentist appointment", "groceries", "team standup notes", "flight to Berlin",
+    "project proposal", "kitchen", "invoice #{n}", "chapter {n}", "budget spreadsheet", "garden", "blog post",
+]
+CHAT_PROMPTS = [
+    "What do I have today?", "Add a task to {task}", "Mark {task} as done", "Move {task} to tomorrow",
+    "How many tasks did I finish this week?", "Delete the task about {task}", "Show my backlog",
+]
+
+def uuid_from(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+def task_description(rng: random.Random) -> str:
+    return f"{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS).format(n=rng.randint(1, 99))}"
+
+def skewed_count(rng: random.Random, mean: float) -> int:
+    """Per-user volume with a long tail: most users are light, a few are very heavy."""
+    return int(rng.lognormvariate(0, 1) * mean / 1.65) # E[lognormal(0, 1)] is about 1.65
+
+def user_rows(rng: random.Random, index: int, prefix: str, today: date, days: int) -> Tuple:
+    created_at = datetime.combine(today - timedelta(days=rng.randint(days, days + 365)), datetime.min.time())
+    # username, user_id, hashed_password, is_verified, created_at, chat_id
+    return (f"{prefix}{index:08d}", uuid_from(rng), SEED_PASSWORD_HASH, True, created_at, uuid_from(rng))
+
+def task_rows(rng: random.Random, user_id: UUID, count: int, today: date, days: int) -> Iterator[Tuple]:
+    """
+    Tasks spread over the last `days` days plus the coming week. Past tasks were mostly
+    completed on or shortly after their date; the rest were moved to backlog by the nightly
+    rollover. Today's and future tasks are mostly still active.
+    """
+    for _ in range(count):
+        task_date = today + timedelta(days=rng.randint(-days, 7))
+        created_at = datetime.combine(task_date - timedelta(days=rng.choice((0, 0, 0, 1, 2))), datetime.min.time()) \
+            + timedelta(seconds=rng.randint(7 * 3600, 22 * 3600))
+        previous_status = None
+        status, changed_at = "active", created_at
+        roll = rng.random()
+        if task_date < today:
+            if roll < 0.75:
+                status, previous_status = "completed", "active"
+                changed_at = datetime.combine(task_date + timedelta(days=rng.choice((0, 0, 0, 1, 3))), datetime.min.time()) \
+                    + timedelta(seconds=rng.randint(8 * 3600, 23 * 3600))
+            else:
+                status, previous_status = "backlog", "active"
+                changed_at = datetime.combine(task_date + timedelta(days=1), datetime.min.time()) + timedelta(minutes=5)
+        elif task_date == today and roll < 0.3:
+            status, previous_status = "completed", "active"
+            changed_at = datetime.combine(today, datetime.min.time()) + timedelta(hours=rng.randint(8, 12))
+        changed_at = max(changed_at, created_at)
+        # task_description, current_status, user_id, task_date, task_id, created_at, modified_at, previous_status, last_status_change_at
+        yield (task_description(rng), status, user_id, task_date, uuid_from(rng), created_at, changed_at, previous_status, changed_at)
+
+def chat_rows(rng: random.Random, chat_id: UUID, count: int, today: date, days: int) -> Iterator[Tuple]:
+    """Alternating user/agent messages in time order over the last `days` days."""
+    timestamp = datetime.combine(today - timedelta(days=days), datetime.min.time())
+    end_of_history = datetime.combine(today, datetime.min.time())
+    step = max(1, days * 86400 // max(count, 1))
+    for n in range(count):
+        timestamp += timedelta(seconds=rng.randint(1, 2 * step))
+        is_user = n % 2 == 0
+        if is_user:
+            content = rng.choice(CHAT_PROMPTS).format(task=task_description(rng).lower())
+        else:
+            content = f"Done. You have {rng.randint(0, 12)} active tasks left for today."
+        # chat_id, is_user, is_agent, content, timestamp, is_summary, message_id
+        yield (chat_id, is_user, not is_user, content, min(timestamp, end_of_history), False, uuid_from(rng))
+
+USER_COLUMNS = ["username", "user_id", "hashed_password", "is_verified", "created_at", "chat_id"]
+TASK_COLUMNS = ["task_description", "current_status", "user_id", "task_date", "task_id", "created_at", "modified_at", "previous_status", "last_status_change_at"]
+CHAT_COLUMNS = ["chat_id", "is_user", "is_agent", "content", "timestamp", "is_summary", "message_id"]
+
+def _batches(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def write_rows(connection, table_name: str, columns: Sequence[str], rows: Iterable[Tuple]) -> int:
+    """Streams `rows` into `table_name`: COPY on PostgreSQL, batched INSERTs elsewhere."""
+    written = 0
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.driver_connection.cursor()
+        with cursor.copy(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                written += 1
+        return written
+    # One cached INSERT executed for a whole batch of rows (executemany). Cheaper than a
+    # multi-row VALUES statement, which SQLAlchemy would have to compile for every batch.
+    statement = insert(SQLModel.metadata.tables[table_name])
+    for batch in _batches(rows, INSERT_BATCH_SIZE):
+        connection.execute(statement, [dict(zip(columns, row)) for row in batch])
+        written += len(batch)
+    return written
+
+def seed(engine, users: int, tasks_per_user: float, messages_per_user: float, days: int, seed_value: int, prefix: str, chunk_users: int):
+    rng = random.Random(seed_value)
+    today = date.today()
+    totals = {"users": 0, "tasks": 0, "chat_messages": 0}
+    started = time.perf_counter()
+    for chunk_start in range(0, users, chunk_users):
+        chunk = [user_rows(rng, index, prefix, today, days) for index in range(chunk_start, min(users, chunk_start + chunk_users))]
+        volumes = [(skewed_count(rng, tasks_per_user), skewed_count(rng, messages_per_user)) for _ in chunk]
+        with engine.begin() as connection:
+            totals["users"] += write_rows(connection, "users", USER_COLUMNS, chunk)
+            totals["tasks"] += write_rows(connection, "tasks", TASK_COLUMNS, (
+                row for user, (task_count, _) in zip(chunk, volumes)
+                for row in task_rows(rng, user[1], task_count, today, days)
+            ))
+            totals["chat_messages"] += write_rows(connection, "chat_messages", CHAT_COLUMNS, (
+                row for user, (_, message_count) in zip(chunk, volumes)
+                for row in chat_rows(rng, user[5], message_count, today, days)
+            ))
+        print(f"  {totals['users']}/{users} users, {totals['tasks']} tasks, {totals['chat_messages']} chat messages "
+              f"({time.perf_counter() - started:.1f}s)")
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with a deterministic synthetic dataset.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Target database (defaults to DATABASE_URL).")
+    parser.add_argument("--users", type=int, default=1000, help="Number of users to create.")
+    parser.add_argument("--tasks-per-user", type=float, default=100, help="Mean tasks per user (long-tailed).")
+    parser.add_argument("--messages-per-user", type=float, default=40, help="Mean chat messages per user (long-tailed).")
+    parser.add_argument("--days", type=int, default=365, help="How many days of history to spread tasks and messages over.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed produces the same dataset.")
+    parser.add_argument("--username-prefix", default="seed", help="Prefix for generated usernames; change it to seed the same database twice.")
+    parser.add_argument("--chunk-users", type=int, default=1000, help="Users written per transaction.")
+    args = parser.parse_args()
+    if not args.database_url:
+        sys.exit("No database: pass --database-url or set DATABASE_URL.")
+
+    # app.database reads DATABASE_URL when imported
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import models
+    from app.database import add_missing_columns, upgrade_foreign_keys, create_missing_indexes
+    from app.search import ensure_search_index
+
+    engine = create_engine(args.database_url)
+    models.SQLModel.metadata.create_all(engine) # the tables app.models declares
+    add_missing_columns(engine)
+    upgrade_foreign_keys(engine)
+    create_missing_indexes(engine)
+    ensure_search_index(engine)
+
+    print(f"Seeding {args.users} users (seed {args.seed})...")
+    totals = seed(engine, args.users, args.tasks_per_user, args.messages_per_user, args.days, args.seed, args.username_prefix, args.chunk_users)
+    if engine.dialect.name in ("postgresql", "sqlite"):
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE") # fresh planner statistics for the new data
+    print(f"Seeded {totals['users']} users, {totals['tasks']} tasks and {totals['chat_messages']} chat messages.")
+
+if __name__ == "__main__":
+    main()
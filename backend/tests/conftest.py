@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads DATABASE_URL at import time: point it at a throwaway SQLite file first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import database
+from app.routers import auth_router, chat_router, recurring_task_router, task_router, user_router
+
+database.create_db_and_tables()
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def client():
+    # The routers without app.main's lifespan, so no background jobs start
+    app = FastAPI()
+    for router in (auth_router, user_router, task_router, recurring_task_router, chat_router):
+        app.include_router(router.router)
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(client):
+    """Signs up a fresh user and returns their Authorization header."""
+    from uuid import uuid4
+    username = f"user{uuid4().hex[:12]}"
+    response = client.post("/users/", json={"username": username, "password": "secret1"})
+    assert response.status_code == 201, response.text
+    token = client.post("/auth/login", data={"username": username, "password": "secret1"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,66 @@
+from datetime import date
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.cache import LRUCacheBackend, TaskViewCache, task_view_cache
+
+def test_generation_counters_are_bounded_and_never_roll_back():
+    cache = TaskViewCache(LRUCacheBackend(max_entries=2))
+    cache.set("alice", cache.generation("alice"), "list", {}, ["stale"])
+    cache.invalidate_user("alice")
+    cache.set("alice", cache.generation("alice"), "list", {}, ["fresh"])
+    old_generation = cache.generation("alice")
+
+    # Two other users push alice's counter out
+    cache.invalidate_user("bob")
+    cache.invalidate_user("carol")
+    assert len(cache.backend._counters) == 2
+
+    # Her generation never goes back below the one her stale entry was stored under
+    assert cache.generation("alice") >= old_generation
+    assert cache.get("alice", "list", {}) != ["stale"]
+    cache.invalidate_user("alice")
+    assert cache.generation("alice") > old_generation
+
+def test_metrics_need_the_admin_token(monkeypatch):
+    from app.main import app
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", "admin-secret")
+    client = TestClient(app)
+    for path in ("/metrics/cache", "/metrics/agent"):
+        assert client.get(path).status_code == 403
+        assert client.get(path, headers={"X-Profile-Token": "wrong"}).status_code == 403
+        assert client.get(path, headers={"X-Profile-Token": "admin-secret"}).status_code == 200
+
+def _day_views(client, auth_headers):
+    params = {"target_date": date.today().isoformat()}
+    tasks = client.get("/tasks/", params=params, headers=auth_headers).json()
+    counts = client.get("/tasks/user/counts", params=params, headers=auth_headers).json()
+    return sorted(task["task_description"] for task in tasks), counts
+
+def test_task_writes_invalidate_cached_views(client, auth_headers):
+    task = client.post("/tasks/", json={"task_description": "buy milk"}, headers=auth_headers).json()
+    assert _day_views(client, auth_headers)[0] == ["buy milk"]
+    hits = task_view_cache.hits
+    assert _day_views(client, auth_headers)[0] == ["buy milk"]
+    assert task_view_cache.hits == hits + 2 # both views came from the cache
+
+    client.post("/tasks/", json={"task_description": "call mom"}, headers=auth_headers)
+    tasks, counts = _day_views(client, auth_headers)
+    assert tasks == ["buy milk", "call mom"] and counts["active"] == 2
+
+    client.put(f"/tasks/{task['task_id']}", json={"current_status": "completed"}, headers=auth_headers)
+    counts = _day_views(client, auth_headers)[1]
+    assert (counts["active"], counts["completed"]) == (1, 1)
+
+    client.delete(f"/tasks/{task['task_id']}", headers=auth_headers)
+    assert _day_views(client, auth_headers)[0] == ["call mom"]
+
+def test_user_writes_invalidate_cached_views(client, auth_headers):
+    user_id = client.get("/users/profile", headers=auth_headers).json()["user_id"]
+    _day_views(client, auth_headers)
+    generation = task_view_cache.generation(user_id)
+    response = client.put("/users/profile", json={"new_username": f"renamed{uuid4().hex[:12]}"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert task_view_cache.generation(user_id) > generation
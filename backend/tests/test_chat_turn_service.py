@@ -0,0 +1,94 @@
+import asyncio
+import time
+from uuid import UUID
+
+import pytest
+from sqlmodel import Session, select
+
+import app.models as models
+from app import database
+from app.routers.chat_router import answer_chat_turn
+from app.services.agent_trace_service import AgentRunTrace
+from app.services.chat_turn_service import ChatQueueFull, ChatTurnQueue
+from app.services.llm_resilience import llm_breaker
+
+pytestmark = pytest.mark.anyio
+
+async def test_messages_sent_while_a_turn_runs_are_answered_together():
+    queue = ChatTurnQueue(coalesce_ms=0)
+    release = asyncio.Event()
+    turns = []
+
+    async def run(messages):
+        turns.append(list(messages))
+        await release.wait()
+        return f"reply to {len(messages)}"
+
+    first = asyncio.ensure_future(queue.submit("chat", "a", run))
+    await asyncio.sleep(0.01) # the first turn starts without waiting for more messages
+    assert turns == [["a"]]
+    second = asyncio.ensure_future(queue.submit("chat", "b", run))
+    third = asyncio.ensure_future(queue.submit("chat", "c", run))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == "reply to 1"
+    assert await second == await third == "reply to 2"
+    assert turns == [["a"], ["b", "c"]]
+    assert queue.stats()["turns"] == 2
+
+async def test_pending_messages_are_bounded():
+    queue = ChatTurnQueue(coalesce_ms=0, max_pending=2)
+    release = asyncio.Event()
+
+    async def run(messages):
+        await release.wait()
+        return "ok"
+
+    running = asyncio.ensure_future(queue.submit("chat", "a", run))
+    await asyncio.sleep(0.01)
+    waiting = [asyncio.ensure_future(queue.submit("chat", m, run)) for m in ("b", "c")]
+    await asyncio.sleep(0.01)
+    with pytest.raises(ChatQueueFull):
+        await queue.submit("chat", "d", run)
+    # Another chat is not held up by this one
+    release.set()
+    assert await queue.submit("other", "x", run) == "ok"
+    assert await asyncio.gather(running, *waiting) == ["ok"] * 3
+    assert queue.stats()["rejected_messages"] == 1
+
+async def test_turn_errors_reach_every_waiter():
+    queue = ChatTurnQueue(coalesce_ms=50)
+
+    async def run(messages):
+        raise RuntimeError("agent down")
+
+    results = await asyncio.gather(
+        queue.submit("chat", "a", run), queue.submit("chat", "b", run), return_exceptions=True,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert queue.stats()["turns"] == 1
+
+async def test_repeated_messages_are_answered_once_and_all_stored(client, auth_headers, monkeypatch):
+    # An open breaker makes the turn answer from the fast path, without an LLM
+    monkeypatch.setattr(llm_breaker, "state", "open")
+    monkeypatch.setattr(llm_breaker, "opened_at", time.monotonic())
+    user_id = UUID(client.get("/users/profile", headers=auth_headers).json()["user_id"])
+    with Session(database.engine) as session:
+        chat_id = session.get(models.User, user_id).chat_id
+    user_messages = [
+        models.ChatMessage(chat_id=chat_id, is_user=True, is_agent=False, content=content)
+        for content in ("thanks", "thanks")
+    ]
+
+    reply = await answer_chat_turn(user_messages, user_id, chat_id, "token", AgentRunTrace(user_id))
+
+    # Answered as one "thanks", not "thanks\nthanks"
+    assert reply.degraded and reply.agent_response == "You're welcome!"
+    with Session(database.engine) as session:
+        stored = session.exec(
+            select(models.ChatMessage.content)
+            .where(models.ChatMessage.chat_id == chat_id, models.ChatMessage.is_user == True)
+        ).all()
+    # Both stay in the chat history
+    assert stored == ["thanks", "thanks"]
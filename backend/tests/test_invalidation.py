@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.invalidation import LocalInvalidationBus, PostgresInvalidationBus, TASKS_TOPIC, USERS_TOPIC
+
+def test_local_bus_delivers_to_every_subscriber_of_the_topic():
+    bus = LocalInvalidationBus()
+    received = []
+    def failing(key):
+        raise RuntimeError("handler bug")
+    bus.subscribe(TASKS_TOPIC, failing)
+    bus.subscribe(TASKS_TOPIC, lambda key: received.append(("tasks", key)))
+    bus.subscribe(USERS_TOPIC, lambda key: received.append(("users", key)))
+
+    bus.publish(TASKS_TOPIC, 42)
+    # A failing handler doesn't keep the others from running; keys arrive as strings
+    assert received == [("tasks", "42")]
+
+class Worker(PostgresInvalidationBus):
+    """A Postgres bus whose NOTIFYs are collected instead of sent."""
+
+    def _ensure_publisher(self):
+        pass
+
+    def sent(self):
+        payloads = []
+        while not self._outbox.empty():
+            payloads.append(self._outbox.get())
+        return payloads
+
+@pytest.fixture
+def workers():
+    return Worker("postgresql+psycopg://localhost/tapyou"), Worker("postgresql+psycopg://localhost/tapyou")
+
+def test_postgres_bus_reaches_other_workers_once(workers):
+    first, second = workers
+    received = {first: [], second: []}
+    for worker in workers:
+        worker.subscribe(TASKS_TOPIC, received[worker].append)
+
+    first.publish(TASKS_TOPIC, "user-1")
+    [payload] = first.sent()
+    assert json.loads(payload)["topic"] == TASKS_TOPIC
+    # Every worker's listener gets the notification, the publisher's own included
+    for worker in workers:
+        worker._handle(payload)
+
+    # The publisher applied it synchronously and skips its own echo
+    assert received == {first: ["user-1"], second: ["user-1"]}
+
+def test_postgres_bus_ignores_malformed_notifications(workers):
+    first, _ = workers
+    received = []
+    first.subscribe(TASKS_TOPIC, received.append)
+    first._handle("not json")
+    assert received == []
+
+def test_postgres_bus_uses_a_libpq_url():
+    assert Worker("postgresql+psycopg://user:pw@db/tapyou")._conninfo == "postgresql://user:pw@db/tapyou"
+
+def test_postgres_bus_delivers_through_a_real_database():
+    """Runs against the Postgres in TEST_POSTGRES_URL, when there is one."""
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    pytest.importorskip("psycopg")
+    first, second = PostgresInvalidationBus(url), PostgresInvalidationBus(url)
+    delivered = threading.Event()
+    received = []
+    def handler(key):
+        received.append(key)
+        delivered.set()
+    second.subscribe(TASKS_TOPIC, handler)
+    second.start()
+    try:
+        time.sleep(1) # let the listener LISTEN before the NOTIFY
+        first.publish(TASKS_TOPIC, "user-1")
+        assert delivered.wait(5)
+        assert received == ["user-1"]
+    finally:
+        first.stop()
+        second.stop()
@@ -0,0 +1,102 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session
+
+from app import database
+from app.services import llm_resilience
+from app.services.fast_path_service import UNAVAILABLE_REPLY, fast_path_reply
+from app.services.llm_resilience import CircuitBreaker, LLMUnavailable, TurnBudgetExceeded, call_llm, turn_budget
+
+pytestmark = pytest.mark.anyio
+
+class FakeLLM:
+    """Fails with the queued errors, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "retry_delay", lambda attempt: 0)
+
+async def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+
+    # Two transient failures in a row (the call and its retry) open it
+    llm = FakeLLM(ConnectionError(), ConnectionError())
+    with pytest.raises(LLMUnavailable):
+        await call_llm(llm, breaker)
+    assert llm.calls == 2 and breaker.state == "open"
+
+    # Open: refused without calling the provider
+    llm = FakeLLM()
+    with pytest.raises(LLMUnavailable):
+        await call_llm(llm, breaker)
+    assert llm.calls == 0 and breaker.stats()["rejected_calls"] == 1
+
+    # Half-open: a failed probe opens it again at once
+    await asyncio.sleep(0.06)
+    llm = FakeLLM(ConnectionError())
+    with pytest.raises(LLMUnavailable):
+        await call_llm(llm, breaker)
+    assert llm.calls == 1 and breaker.state == "open"
+
+    # A successful probe closes it
+    await asyncio.sleep(0.06)
+    assert await call_llm(FakeLLM(), breaker) == "answer"
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.stats()["times_opened"] == 2
+
+async def test_transient_failures_are_retried():
+    breaker = CircuitBreaker(failure_threshold=5)
+    llm = FakeLLM(asyncio.TimeoutError())
+    assert await call_llm(llm, breaker) == "answer"
+    assert llm.calls == 2 and breaker.state == "closed"
+
+async def test_other_errors_are_not_retried_or_counted():
+    breaker = CircuitBreaker(failure_threshold=1)
+    llm = FakeLLM(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        await call_llm(llm, breaker)
+    assert llm.calls == 1 and breaker.state == "closed" and breaker.failures == 0
+
+async def test_retries_stop_at_the_turn_budget(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=5)
+    # The backoff before the retry would end after the turn's deadline
+    monkeypatch.setattr(llm_resilience, "retry_delay", lambda attempt: 1.0)
+    llm = FakeLLM(ConnectionError())
+    with turn_budget(0.5):
+        with pytest.raises(TurnBudgetExceeded):
+            await call_llm(llm, breaker)
+    assert llm.calls == 1
+
+    with turn_budget(0):
+        with pytest.raises(TurnBudgetExceeded):
+            await call_llm(llm, breaker)
+    assert llm.calls == 1
+
+@pytest.mark.parametrize("message, reply", [
+    ("hi!", "Hi! The assistant is running in a limited mode right now, but I can still list today's tasks for you."),
+    ("thank you", "You're welcome!"),
+    ("ok", "Great!"),
+    ("bye", "Bye! See you later."),
+])
+def test_fast_path_small_talk(message, reply):
+    # Small talk never touches the database
+    assert fast_path_reply(message, uuid4(), None) == reply
+
+def test_fast_path_only_lists_today():
+    user_id = uuid4() # no tasks: today's list is empty
+    with Session(database.engine) as session:
+        assert fast_path_reply("what are my tasks today?", user_id, session).startswith("You have no active tasks for today")
+        for message in ("what's on tomorrow", "show my backlog", "find the dentist task", "show my tasks"):
+            assert fast_path_reply(message, user_id, session) == UNAVAILABLE_REPLY
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi_mcp import server
+
+from app.mcp_server import tools
+from app.routers import recurring_task_router, task_router
+
+def _app(version="0.1.0"):
+    app = FastAPI(title="Test API", version=version)
+    app.include_router(task_router.router)
+    app.include_router(recurring_task_router.router)
+    return app
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    app = _app()
+    path = tmp_path / "mcp_manifest.json"
+    mcp = tools.create_mcp(app, manifest_path=None)
+    path.write_text(json.dumps(tools.manifest_from_mcp(mcp, tools.routes_fingerprint(app))))
+    return str(path)
+
+def test_manifest_is_loaded_without_building_schemas(manifest_path, monkeypatch):
+    schema_routes = []
+    def get_openapi(*args, routes, **kwargs):
+        schema_routes.extend(route for route in routes if isinstance(route, APIRoute))
+        return openapi(*args, routes=routes, **kwargs)
+    openapi = server.get_openapi
+    monkeypatch.setattr(server, "get_openapi", get_openapi)
+
+    mcp = tools.create_mcp(_app(), manifest_path=manifest_path)
+    assert sorted(tool.name for tool in mcp.tools) == sorted(tools.MCP_TOOL_OPERATIONS)
+    assert set(mcp.operation_map) == set(tools.MCP_TOOL_OPERATIONS)
+    assert schema_routes == [] # no route's schema was built
+
+def test_manifest_from_other_routes_is_regenerated(manifest_path):
+    assert tools.load_manifest(manifest_path, tools.routes_fingerprint(_app())) is not None
+    assert tools.load_manifest(manifest_path, tools.routes_fingerprint(_app(version="0.2.0"))) is None
+
+    # A tool route missing from the app
+    app = _app()
+    app.router.routes = [route for route in app.routes if getattr(route, "operation_id", None) != "search_tasks"]
+    assert tools.load_manifest(manifest_path, tools.routes_fingerprint(app)) is None
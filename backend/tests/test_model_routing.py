@@ -0,0 +1,118 @@
+import pytest
+
+from app.services import model_router
+from app.services.agent_trace_service import AgentRunTrace
+
+@pytest.mark.parametrize("message, tier, reason", [
+    ("Thanks!", model_router.FAST_TIER, "small_talk"),
+    ("mark the dentist task as done", model_router.FAST_TIER, "single_intent:complete"),
+    ("what are my tasks today?", model_router.FAST_TIER, "single_intent:list"),
+    ("add buy milk and delete the gym task", model_router.STRONG_TIER, "multiple_intents"),
+    ("plan my week", model_router.STRONG_TIER, "complex_request"),
+    ("delete all completed tasks", model_router.STRONG_TIER, "complex_request"),
+    ("hmm, the usual", model_router.STRONG_TIER, "unclear_intent"),
+    ("add " + "a very long task " * 20, model_router.STRONG_TIER, "long_message"),
+])
+def test_classify_turn(message, tier, reason):
+    assert model_router.classify_turn(message) == model_router.RoutingDecision(tier=tier, reason=reason)
+
+def test_routing_off_uses_the_strong_tier(monkeypatch):
+    monkeypatch.setattr(model_router, "AGENT_MODEL_ROUTING", "off")
+    assert model_router.classify_turn("hi").tier == model_router.STRONG_TIER
+
+# --- Escalation, with LangChain's fake chat models standing in for OpenAI ---
+@pytest.fixture
+def agent(monkeypatch):
+    """Runs agent_service with fake tools and one fake chat model per tier."""
+    pytest.importorskip("langchain")
+    from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+    from langchain_core.tools import StructuredTool
+    from app.services import agent_service
+
+    class FakeToolCallingModel(FakeMessagesListChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    class Agent:
+        def __init__(self):
+            self.models = {}
+            self.calls = []
+
+        def replies(self, tier, *messages):
+            self.models[model_router.model_name(tier)] = FakeToolCallingModel(responses=list(messages))
+
+        async def run(self, message):
+            trace = AgentRunTrace()
+            output = await agent_service.call_agent_on_message(message, trace=trace)
+            return output, trace
+
+    agent = Agent()
+
+    async def list_user_tasks() -> str:
+        agent.calls.append("list_user_tasks")
+        raise ConnectionError("task API unreachable")
+
+    async def create_task(task_description: str) -> str:
+        agent.calls.append("create_task")
+        return f"created {task_description}"
+
+    tools = [
+        StructuredTool.from_function(coroutine=tool, name=tool.__name__, description=tool.__name__)
+        for tool in (list_user_tasks, create_task)
+    ]
+
+    async def get_mcp_tools(auth_token=None):
+        return tools
+
+    monkeypatch.setattr(agent_service, "get_mcp_tools", get_mcp_tools)
+    agent_service.set_model_factory(lambda model_name: agent.models[model_name])
+    yield agent
+    agent_service.set_model_factory(None)
+
+def tool_call(name, **args):
+    from langchain_core.messages import AIMessage
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}"}])
+
+def reply(text):
+    from langchain_core.messages import AIMessage
+    return AIMessage(content=text)
+
+@pytest.mark.anyio
+async def test_empty_fast_answer_is_escalated(agent):
+    agent.replies(model_router.FAST_TIER, reply(""))
+    agent.replies(model_router.STRONG_TIER, reply("You have no tasks today."))
+
+    output, trace = await agent.run("what are my tasks today?")
+
+    assert output == "You have no tasks today."
+    assert trace.escalated and trace.model_tier == model_router.STRONG_TIER
+    assert trace.routing_reason == "single_intent:list"
+
+@pytest.mark.anyio
+async def test_fast_run_with_a_tool_error_is_escalated(agent):
+    agent.replies(model_router.FAST_TIER, tool_call("list_user_tasks"), reply("Here they are."))
+    agent.replies(model_router.STRONG_TIER, reply("I couldn't reach your tasks, please try again."))
+
+    output, trace = await agent.run("what are my tasks today?")
+
+    assert output == "I couldn't reach your tasks, please try again."
+    assert trace.escalated
+
+@pytest.mark.anyio
+async def test_fast_run_that_wrote_is_not_escalated(agent):
+    # An empty answer would be escalated, but rerunning could create the task twice
+    agent.replies(model_router.FAST_TIER, tool_call("create_task", task_description="buy milk"), reply(""))
+
+    output, trace = await agent.run("add buy milk")
+
+    assert output == ""
+    assert not trace.escalated and trace.model_tier == model_router.FAST_TIER
+    assert agent.calls == ["create_task"]
+
+@pytest.mark.anyio
+async def test_strong_tier_runs_once(agent):
+    agent.replies(model_router.STRONG_TIER, reply(""))
+
+    output, trace = await agent.run("plan my week")
+
+    assert output == "" and not trace.escalated
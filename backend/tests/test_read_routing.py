@@ -0,0 +1,46 @@
+import itertools
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import create_engine
+
+from app import database
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def replica(monkeypatch):
+    # A second engine on the same database stands in for a replica
+    replica = create_engine(os.environ["DATABASE_URL"])
+    monkeypatch.setattr(database, "read_engines", [replica])
+    monkeypatch.setattr(database, "_read_engine_cycle", itertools.cycle([replica]))
+    return replica
+
+def test_reads_run_no_query_on_the_primary(client, auth_headers, replica, monkeypatch):
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    params = {"target_date": date.today().isoformat()}
+    with count_statements(database.engine) as on_primary, count_statements(replica) as on_replica:
+        assert client.get("/tasks/", params=params, headers=auth_headers).status_code == 200
+    assert on_primary == []
+    assert on_replica # the user lookup at least
+
+def test_reads_after_a_write_stay_on_the_primary(client, auth_headers, replica, monkeypatch):
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 60)
+    assert client.post("/tasks/", json={"task_description": "file taxes"}, headers=auth_headers).status_code == 201
+    params = {"target_date": date.today().isoformat()}
+    with count_statements(database.engine) as on_primary, count_statements(replica) as on_replica:
+        tasks = client.get("/tasks/", params=params, headers=auth_headers).json()
+    assert [task["task_description"] for task in tasks] == ["file taxes"]
+    assert on_primary and on_replica == []
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+from uuid import uuid4
+
+def _day_tasks(client, auth_headers, day: date):
+    return client.get("/tasks/", params={"target_date": day.isoformat()}, headers=auth_headers).json()
+
+def test_occurrence_is_listed_once_after_it_is_written(client, auth_headers):
+    rule = client.post("/recurring-tasks/", json={"task_description": "standup", "rrule": "FREQ=DAILY"}, headers=auth_headers)
+    assert rule.status_code == 201, rule.text
+    [occurrence] = _day_tasks(client, auth_headers, date.today())
+
+    updated = client.put(f"/tasks/{occurrence['task_id']}", json={"current_status": "completed"}, headers=auth_headers)
+    assert updated.status_code == 200, updated.text
+    [task] = _day_tasks(client, auth_headers, date.today())
+    assert task["task_id"] == occurrence["task_id"]
+    assert task["current_status"] == "completed"
+
+def test_far_occurrence_is_found_by_id(client, auth_headers):
+    client.post("/recurring-tasks/", json={"task_description": "water plants", "rrule": "FREQ=DAILY"}, headers=auth_headers)
+    far_day = date.today() + timedelta(days=3 * 365)
+    [occurrence] = _day_tasks(client, auth_headers, far_day)
+
+    assert client.get(f"/tasks/{occurrence['task_id']}", headers=auth_headers).status_code == 200
+    assert client.delete(f"/tasks/{occurrence['task_id']}", headers=auth_headers).status_code == 204
+    assert _day_tasks(client, auth_headers, far_day) == []
+
+def test_unknown_task_id_is_not_found(client, auth_headers):
+    client.post("/recurring-tasks/", json={"task_description": "stretch", "rrule": "FREQ=DAILY"}, headers=auth_headers)
+    assert client.get(f"/tasks/{uuid4()}", headers=auth_headers).status_code == 404
+
+def test_status_filter_is_case_insensitive(client, auth_headers):
+    client.post("/recurring-tasks/", json={"task_description": "journal", "rrule": "FREQ=DAILY"}, headers=auth_headers)
+    client.post("/tasks/", json={"task_description": "buy milk"}, headers=auth_headers)
+    listed = {}
+    for status in ("active", "Active", "ACTIVE"):
+        params = {"status": status, "target_date": date.today().isoformat()}
+        tasks = client.get("/tasks/", params=params, headers=auth_headers).json()
+        listed[status] = sorted(task["task_description"] for task in tasks)
+    assert listed["active"] == listed["Active"] == listed["ACTIVE"] == ["buy milk", "journal"]
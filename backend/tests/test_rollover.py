@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from sqlmodel import Session
+
+import app.models as models
+from app import database
+from app.services import rollover_service
+from app.services.rollover_service import roll_over_tasks
+
+def _tasks(client, auth_headers, day: date, status=None):
+    params = {"target_date": day.isoformat(), **({"status": status} if status else {})}
+    return client.get("/tasks/", params=params, headers=auth_headers).json()
+
+def _create_rule(client, auth_headers, description: str, start_date: date, created_at: datetime = None) -> UUID:
+    rule = client.post("/recurring-tasks/", json={"task_description": description, "rrule": "FREQ=DAILY", "start_date": start_date.isoformat()}, headers=auth_headers).json()
+    rule_id = UUID(rule["rule_id"])
+    if created_at is not None:
+        with Session(database.engine) as session:
+            db_rule = session.get(models.RecurringTaskRule, rule_id)
+            db_rule.created_at = created_at
+            session.add(db_rule)
+            session.commit()
+    return rule_id
+
+def test_overdue_tasks_and_occurrences_move_to_backlog(client, auth_headers):
+    three_days_ago = date.today() - timedelta(days=3)
+    task = client.post("/tasks/", json={"task_description": "renew passport", "task_date": three_days_ago.isoformat()}, headers=auth_headers).json()
+    _create_rule(client, auth_headers, "standup", three_days_ago, created_at=datetime.combine(three_days_ago, datetime.min.time()))
+
+    roll_over_tasks(database.engine)
+
+    past = _tasks(client, auth_headers, three_days_ago)
+    assert {t["task_description"]: t["current_status"] for t in past} == {"renew passport": "backlog", "standup": "backlog"}
+    backlog = _tasks(client, auth_headers, date.today(), "backlog")
+    assert sum(t["task_description"] == "standup" for t in backlog) == 3
+    assert task["task_id"] in {t["task_id"] for t in backlog}
+    # Today's occurrence is still active, and a second run writes nothing more
+    assert [t["current_status"] for t in _tasks(client, auth_headers, date.today())] == ["active"]
+    assert roll_over_tasks(database.engine) == 0
+
+def test_occurrences_before_the_rule_was_created_are_not_rolled_over(client, auth_headers):
+    # Created today, starting a month ago: none of those days were missed
+    _create_rule(client, auth_headers, "stretch", date.today() - timedelta(days=30))
+    assert roll_over_tasks(database.engine) == 0
+    assert _tasks(client, auth_headers, date.today(), "backlog") == []
+
+def test_occurrences_are_rolled_over_in_bounded_batches(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(rollover_service, "TASK_ROLLOVER_OCCURRENCE_DAYS", 5)
+    long_ago = date.today() - timedelta(days=400)
+    rule_id = _create_rule(client, auth_headers, "journal", long_ago, created_at=datetime.combine(long_ago, datetime.min.time()))
+    commits = []
+    monkeypatch.setattr(rollover_service.invalidation_bus, "publish", lambda topic, user_id: commits.append(user_id))
+
+    # Only the last 5 days, two days per transaction
+    user_id = UUID(client.get("/users/profile", headers=auth_headers).json()["user_id"])
+    assert rollover_service.roll_over_occurrences(database.engine, date.today(), user_id, batch_size=2) == 5
+    assert len(commits) == 3
+    with Session(database.engine) as session:
+        assert session.get(models.RecurringTaskRule, rule_id).rolled_over_until == date.today() - timedelta(days=1)
+    backlog = _tasks(client, auth_headers, date.today(), "backlog")
+    assert sum(t["task_description"] == "journal" for t in backlog) == 5
@@ -0,0 +1,67 @@
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+
+from app.search import ensure_search_index
+
+def _search(client, auth_headers, q):
+    response = client.get("/tasks/search", params={"q": q}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return [task["task_description"] for task in response.json()]
+
+def test_search_follows_inserts_updates_and_deletes(client, auth_headers):
+    dentist = client.post("/tasks/", json={"task_description": "Book the dentist appointment"}, headers=auth_headers).json()
+    client.post("/tasks/", json={"task_description": "Buy dental floss"}, headers=auth_headers)
+
+    assert _search(client, auth_headers, "dentist") == ["Book the dentist appointment"]
+    assert sorted(_search(client, auth_headers, "dent")) == ["Book the dentist appointment", "Buy dental floss"] # prefixes match
+    assert _search(client, auth_headers, "dentist floss") == []
+
+    client.put(f"/tasks/{dentist['task_id']}", json={"task_description": "Book the optician"}, headers=auth_headers)
+    assert _search(client, auth_headers, "dentist") == []
+    assert _search(client, auth_headers, "optician") == ["Book the optician"]
+
+    client.delete(f"/tasks/{dentist['task_id']}", headers=auth_headers)
+    assert _search(client, auth_headers, "optician") == []
+
+def test_search_only_returns_the_users_own_tasks(client, auth_headers):
+    client.post("/tasks/", json={"task_description": "Water the bonsai"}, headers=auth_headers)
+    username = f"user{uuid4().hex[:12]}"
+    client.post("/users/", json={"username": username, "password": "secret1"})
+    token = client.post("/auth/login", data={"username": username, "password": "secret1"}).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/", json={"task_description": "Prune the bonsai"}, headers=other_headers)
+
+    assert _search(client, auth_headers, "bonsai") == ["Water the bonsai"]
+    assert _search(client, other_headers, "bonsai") == ["Prune the bonsai"]
+
+def test_search_ignores_punctuation_only_queries(client, auth_headers):
+    assert _search(client, auth_headers, '"*()') == []
+
+def test_legacy_rowid_index_is_rebuilt(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE tasks (task_id CHAR(32) PRIMARY KEY, task_description VARCHAR)")
+        connection.exec_driver_sql("INSERT INTO tasks VALUES ('a1', 'renew passport'), ('b2', 'pay rent')")
+        # The earlier layout: an external-content table on tasks.rowid
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE tasks_fts USING fts5(task_description, content='tasks', content_rowid='rowid')"
+        )
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+    ensure_search_index(engine)
+    ensure_search_index(engine) # and again, as on every startup
+
+    with engine.begin() as connection:
+        assert "content=" not in connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'tasks_fts'"
+        ).scalar()
+        match = text("SELECT task_id FROM tasks_fts WHERE tasks_fts MATCH :q")
+        assert connection.execute(match, {"q": "passport"}).scalars().all() == ["a1"]
+        # The triggers keep it in sync by task_id
+        connection.exec_driver_sql("UPDATE tasks SET task_description = 'renew visa' WHERE task_id = 'a1'")
+        connection.exec_driver_sql("DELETE FROM tasks WHERE task_id = 'b2'")
+        assert connection.execute(match, {"q": "visa"}).scalars().all() == ["a1"]
+        assert connection.execute(match, {"q": "passport"}).scalars().all() == []
+        assert connection.execute(match, {"q": "rent"}).scalars().all() == []
+        assert connection.exec_driver_sql("SELECT count(*) FROM tasks_fts").scalar() == 1
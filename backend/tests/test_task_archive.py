@@ -0,0 +1,32 @@
+from datetime import date
+
+from sqlmodel import Session
+
+import app.models as models
+from app import database
+from app.services.archive_service import archive_completed_tasks
+
+def _archived_completed_task(client, auth_headers) -> str:
+    task = client.post("/tasks/", json={"task_description": "file taxes"}, headers=auth_headers).json()
+    client.put(f"/tasks/{task['task_id']}", json={"current_status": "completed"}, headers=auth_headers)
+    # A negative age archives every completed task, including the one completed just now
+    assert archive_completed_tasks(database.engine, older_than_days=-1) >= 1
+    with Session(database.engine) as session:
+        assert session.get(models.TaskArchive, task["task_id"]) is not None
+    return task["task_id"]
+
+def test_archived_tasks_are_listed_without_archiving_configured(client, auth_headers):
+    task_id = _archived_completed_task(client, auth_headers)
+
+    listed = client.get("/tasks/", params={"target_date": date.today().isoformat(), "status": "completed"}, headers=auth_headers)
+    assert [task["task_id"] for task in listed.json()] == [task_id]
+
+def test_delete_archived_task(client, auth_headers):
+    task_id = _archived_completed_task(client, auth_headers)
+
+    response = client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 204, response.text
+    with Session(database.engine) as session:
+        assert session.get(models.TaskArchive, task_id) is None
+        assert session.get(models.Task, task_id) is None
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
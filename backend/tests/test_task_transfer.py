@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.routers import task_router
+
+@pytest.fixture
+def other_headers(client):
+    username = f"user{uuid4().hex[:12]}"
+    client.post("/users/", json={"username": username, "password": "secret1"})
+    token = client.post("/auth/login", data={"username": username, "password": "secret1"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _export(client, headers, export_format):
+    response = client.get("/tasks/export", params={"format": export_format}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.text
+
+def _import(client, headers, body, import_format):
+    return client.post("/tasks/import", params={"format": import_format}, content=body.encode(), headers=headers)
+
+def _without_ids(rows):
+    return sorted((row["task_description"], row["current_status"], row["task_date"], row["created_at"]) for row in rows)
+
+def _ndjson_rows(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+def _csv_rows(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+def _make_tasks(client, headers):
+    client.post("/tasks/", json={"task_description": "renew passport", "task_date": (date.today() - timedelta(days=3)).isoformat()}, headers=headers)
+    done = client.post("/tasks/", json={"task_description": 'pay rent, "on time"'}, headers=headers).json()
+    client.put(f"/tasks/{done['task_id']}", json={"current_status": "completed"}, headers=headers)
+
+@pytest.mark.parametrize("transfer_format, parse", [("ndjson", _ndjson_rows), ("csv", _csv_rows)])
+def test_export_then_import_round_trips(client, auth_headers, other_headers, transfer_format, parse):
+    _make_tasks(client, auth_headers)
+    exported = _export(client, auth_headers, transfer_format)
+
+    response = _import(client, other_headers, exported, transfer_format)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+
+    reimported = parse(_export(client, other_headers, transfer_format))
+    assert _without_ids(reimported) == _without_ids(parse(exported))
+    # The imported tasks are new tasks, not the originals
+    assert not {row["task_id"] for row in reimported} & {row["task_id"] for row in parse(exported)}
+
+def test_invalid_rows_are_reported_by_line(client, auth_headers):
+    body = "\n".join([
+        json.dumps({"task_description": "water plants"}),
+        "{not json",
+        json.dumps({"task_description": "walk the dog", "current_status": "someday"}),
+        "",
+        json.dumps(["a", "list"]),
+        json.dumps({"current_status": "active"}),
+        json.dumps({"task_description": "call mom", "current_status": "Completed"}),
+    ])
+    result = _import(client, auth_headers, body, "ndjson").json()
+
+    assert (result["imported"], result["failed"]) == (2, 4)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 5, 6]
+    assert "someday" in result["errors"][1]["error"]
+    assert "task_description" in result["errors"][3]["error"]
+
+def test_csv_rows_are_reported_by_line(client, auth_headers):
+    body = "task_description,current_status\r\nwater plants,active\r\nwalk the dog,someday\r\ntoo,many,fields\r\n"
+    result = _import(client, auth_headers, body, "csv").json()
+    assert (result["imported"], result["failed"]) == (1, 2)
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+
+def test_oversized_or_undecodable_imports_are_refused(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(task_router, "TASK_IMPORT_MAX_BYTES", 100)
+    body = "\n".join(json.dumps({"task_description": f"task {i}"}) for i in range(10))
+    assert _import(client, auth_headers, body, "ndjson").status_code == 413
+
+    response = client.post("/tasks/import", params={"format": "ndjson"}, content=b'{"task_description": "caf\xe9"}', headers=auth_headers)
+    assert response.status_code == 400
+    assert _export(client, auth_headers, "ndjson") == ""
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from app.routers.task_router import MAX_RANGE_DAYS
+
+TODAY = date.today()
+
+def _create(client, auth_headers, description, day=TODAY):
+    response = client.post("/tasks/", json={"task_description": description, "task_date": day.isoformat()}, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def _range(client, auth_headers, start_date, end_date, status=None):
+    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), **({"status": status} if status else {})}
+    return client.get("/tasks/range", params=params, headers=auth_headers)
+
+def _descriptions_by_date(response):
+    assert response.status_code == 200, response.text
+    return {day: sorted(task["task_description"] for task in tasks) for day, tasks in response.json()["tasks_by_date"].items()}
+
+def test_range_groups_tasks_by_date(client, auth_headers):
+    _create(client, auth_headers, "dentist", TODAY + timedelta(days=1))
+    _create(client, auth_headers, "gym", TODAY + timedelta(days=1))
+    done = _create(client, auth_headers, "pay rent")
+    client.put(f"/tasks/{done['task_id']}", json={"current_status": "completed"}, headers=auth_headers)
+
+    by_date = _descriptions_by_date(_range(client, auth_headers, TODAY, TODAY + timedelta(days=2)))
+    assert by_date == {
+        TODAY.isoformat(): ["pay rent"],
+        (TODAY + timedelta(days=1)).isoformat(): ["dentist", "gym"],
+        (TODAY + timedelta(days=2)).isoformat(): [],
+    }
+    completed = _descriptions_by_date(_range(client, auth_headers, TODAY, TODAY + timedelta(days=2), "Completed"))
+    assert completed[TODAY.isoformat()] == ["pay rent"]
+    assert completed[(TODAY + timedelta(days=1)).isoformat()] == []
+
+def test_range_matches_the_day_list(client, auth_headers):
+    _create(client, auth_headers, "stretch", TODAY)
+    by_date = _descriptions_by_date(_range(client, auth_headers, TODAY, TODAY))
+    day = client.get("/tasks/", params={"target_date": TODAY.isoformat()}, headers=auth_headers).json()
+    assert by_date[TODAY.isoformat()] == sorted(task["task_description"] for task in day)
+
+def test_range_is_limited_to_max_range_days(client, auth_headers):
+    last_allowed = TODAY + timedelta(days=MAX_RANGE_DAYS - 1)
+    response = _range(client, auth_headers, TODAY, last_allowed)
+    assert response.status_code == 200 and len(response.json()["tasks_by_date"]) == MAX_RANGE_DAYS
+
+    too_long = _range(client, auth_headers, TODAY, last_allowed + timedelta(days=1))
+    assert too_long.status_code == 400
+    assert str(MAX_RANGE_DAYS) in too_long.json()["detail"]
+
+def test_range_rejects_bad_requests(client, auth_headers):
+    assert _range(client, auth_headers, TODAY, TODAY - timedelta(days=1)).status_code == 400
+    assert _range(client, auth_headers, TODAY, TODAY, "someday").status_code == 400
+
+def test_backlog_tasks_appear_on_every_later_date(client, auth_headers):
+    task = _create(client, auth_headers, "sort photos")
+    client.put(f"/tasks/{task['task_id']}", json={"current_status": "backlog"}, headers=auth_headers)
+
+    by_date = _descriptions_by_date(_range(client, auth_headers, TODAY - timedelta(days=1), TODAY + timedelta(days=2), "backlog"))
+    assert by_date[(TODAY - timedelta(days=1)).isoformat()] == []
+    for offset in range(3):
+        assert by_date[(TODAY + timedelta(days=offset)).isoformat()] == ["sort photos"]
+
+def test_dashboard_matches_the_list_and_count_views(client, auth_headers):
+    _create(client, auth_headers, "buy milk")
+    _create(client, auth_headers, "old task", TODAY - timedelta(days=5))
+    done = _create(client, auth_headers, "pay rent")
+    client.put(f"/tasks/{done['task_id']}", json={"current_status": "completed"}, headers=auth_headers)
+    later = _create(client, auth_headers, "sort photos")
+    client.put(f"/tasks/{later['task_id']}", json={"current_status": "backlog"}, headers=auth_headers)
+    client.post("/recurring-tasks/", json={"task_description": "standup", "rrule": "FREQ=DAILY"}, headers=auth_headers)
+
+    params = {"target_date": TODAY.isoformat()}
+    response = client.get("/tasks/dashboard", params=params, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    dashboard = response.json()
+    for status in ("active", "completed", "backlog"):
+        listed = client.get("/tasks/", params={**params, "status": status}, headers=auth_headers).json()
+        assert sorted(task["task_id"] for task in dashboard[status]) == sorted(task["task_id"] for task in listed), status
+    assert sorted(task["task_description"] for task in dashboard["active"]) == ["buy milk", "standup"]
+
+    counts = client.get("/tasks/user/counts", params=params, headers=auth_headers).json()
+    assert dashboard["counts"] == counts
+    assert (counts["active"], counts["completed"], counts["backlog"]) == (2, 1, 1)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain")
+from langchain_core.tools import StructuredTool
+
+from app.services.agent_service import ToolResultMemo
+
+pytestmark = pytest.mark.anyio
+
+class FakeTaskAPI:
+    """Counts the calls each tool makes to the task API."""
+
+    def __init__(self):
+        self.calls = {"list_user_tasks": 0, "create_task": 0}
+        self.fail_next_list = False
+
+    def tools(self):
+        async def list_user_tasks(task_date: str) -> str:
+            self.calls["list_user_tasks"] += 1
+            await asyncio.sleep(0.01)
+            if self.fail_next_list:
+                self.fail_next_list = False
+                raise ConnectionError("task API unreachable")
+            return f"tasks on {task_date} (call {self.calls['list_user_tasks']})"
+
+        async def create_task(task_description: str) -> str:
+            self.calls["create_task"] += 1
+            return f"created {task_description}"
+
+        return {
+            tool.__name__: StructuredTool.from_function(coroutine=tool, name=tool.__name__, description=tool.__name__)
+            for tool in (list_user_tasks, create_task)
+        }
+
+@pytest.fixture
+def api():
+    return FakeTaskAPI()
+
+@pytest.fixture
+def memo():
+    return ToolResultMemo()
+
+async def test_repeated_reads_are_answered_from_the_memo(api, memo):
+    list_tasks = memo.wrap(api.tools()["list_user_tasks"])
+    first = await list_tasks.ainvoke({"task_date": "2026-10-19"})
+    second = await list_tasks.ainvoke({"task_date": "2026-10-19"})
+    other_day = await list_tasks.ainvoke({"task_date": "2026-10-20"})
+
+    assert first == second != other_day
+    assert api.calls["list_user_tasks"] == 2 and memo.hits == 1
+
+async def test_concurrent_identical_reads_share_one_call(api, memo):
+    list_tasks = memo.wrap(api.tools()["list_user_tasks"])
+    results = await asyncio.gather(*(list_tasks.ainvoke({"task_date": "2026-10-19"}) for _ in range(3)))
+    assert len(set(results)) == 1
+    assert api.calls["list_user_tasks"] == 1 and memo.hits == 2
+
+async def test_a_write_invalidates_earlier_reads(api, memo):
+    tools = {name: memo.wrap(tool) for name, tool in api.tools().items()}
+    before = await tools["list_user_tasks"].ainvoke({"task_date": "2026-10-19"})
+    await tools["create_task"].ainvoke({"task_description": "call mom"})
+    after = await tools["list_user_tasks"].ainvoke({"task_date": "2026-10-19"})
+
+    assert before != after
+    assert api.calls["list_user_tasks"] == 2 and memo.writes == 1 and memo.hits == 0
+
+async def test_failures_are_not_reused(api, memo):
+    list_tasks = memo.wrap(api.tools()["list_user_tasks"])
+    api.fail_next_list = True
+    with pytest.raises(ConnectionError):
+        await list_tasks.ainvoke({"task_date": "2026-10-19"})
+    assert await list_tasks.ainvoke({"task_date": "2026-10-19"})
+    assert api.calls["list_user_tasks"] == 2 and memo.hits == 0
@@ -43,6 +43,15 @@ export const tasks = {
     return authenticatedFetch(url);
   },
 
+  // GET /tasks/dashboard - the day's tasks per status plus counts in one request
+  getDashboard: async (targetDate) => {
+    const params = new URLSearchParams();
+    if (targetDate) params.append('target_date', format(targetDate, 'yyyy-MM-dd'));
+
+    const url = `${API_BASE_URL}/tasks/dashboard?${params.toString()}`;
+    return authenticatedFetch(url);
+  },
+
   // You can add other task API calls here (createTask, deleteTask, etc.)
   createTask: async (task_description) => {
     const url = `${API_BASE_URL}/tasks/`;
@@ -42,17 +42,18 @@ function TodoListPage() {
   const [newTaskInput, setNewTaskInput] = useState('');
   const [isAddingTask, setIsAddingTask] = useState(false);
 
-  // Function to fetch and update tasks
-  const loadTasks = useCallback(async () => {
+  // Function to fetch the day's tasks and counts in one request
+  const loadDashboard = useCallback(async () => {
     if (!user?.username) return; // Ensure user is authenticated
 
     setLoading(true);
     try {
-      const fetchedTasks = await tasksApi.getTasks(
-        activeFilter,
+      const dashboard = await tasksApi.getDashboard(
         selectedDate // Pass selectedDate as targetDate
       );
+      const fetchedTasks = dashboard[activeFilter] || [];
       setTasks(fetchedTasks);
+      setTaskCounts(dashboard.counts);
       
       // Update last task update timestamp for auto-refresh
       if (fetchedTasks.length > 0) {
@@ -64,25 +65,12 @@ function TodoListPage() {
     } catch (error) {
       console.error('Failed to fetch tasks:', error);
       setTasks([]); // Clear tasks on error
+      setTaskCounts({ active: 0, completed: 0, backlog: 0, total: 0 });
     } finally {
       setLoading(false);
     }
   }, [user?.username, activeFilter, selectedDate]);
 
-  // Function to fetch and update counts
-  const loadTaskCounts = useCallback(async () => {
-    if (!user?.username) return;
-    try {
-      const fetchedCounts = await tasksApi.getTaskCounts(
-        selectedDate // Pass selectedDate as targetDate
-      );
-      setTaskCounts(fetchedCounts);
-    } catch (error) {
-      console.error('Failed to fetch task counts:', error);
-      setTaskCounts({ active: 0, completed: 0, backlog: 0, total: 0 });
-    }
-  }, [user?.username, selectedDate]);
-
   // Function to check for task updates from backend
   // const checkForTaskUpdates = useCallback(async () => {
   //   if (!user?.username) return;
@@ -128,8 +116,7 @@ function TodoListPage() {
       setNewTaskDescription('');
       setIsCreateModalOpen(false);
       // Refresh tasks and counts
-      await loadTasks();
-      await loadTaskCounts();
+      await loadDashboard();
     } catch (error) {
       console.error('Failed to create task:', error);
       // You could add a toast notification here
@@ -158,8 +145,7 @@ function TodoListPage() {
       setEditingTask(null);
       setIsEditModalOpen(false);
       // Refresh tasks and counts
-      await loadTasks();
-      await loadTaskCounts();
+      await loadDashboard();
     } catch (error) {
       console.error('Failed to update task:', error);
       // You could add a toast notification here
@@ -193,8 +179,7 @@ function TodoListPage() {
       }
       
       // Refresh tasks and counts
-      await loadTasks();
-      await loadTaskCounts();
+      await loadDashboard();
     } catch (error) {
       console.error('Failed to create task:', error);
       alert(`Failed to create task: ${error.message}`);
@@ -231,9 +216,8 @@ function TodoListPage() {
 
   // Effect to load tasks and counts when date, filter, or user changes
   useEffect(() => {
-    loadTasks();
-    loadTaskCounts();
-  }, [loadTasks, loadTaskCounts]);
+    loadDashboard();
+  }, [loadDashboard]);
 
   // // Set up auto-refresh polling (check every 3 seconds)
   // useEffect(() => {
@@ -265,8 +249,7 @@ function TodoListPage() {
       const result = await tasksApi.updateTask(taskId, { current_status: newStatus });
       console.log('Task update result:', result);
       // Re-fetch all tasks and counts to ensure UI is up-to-date
-      await loadTasks();
-      await loadTaskCounts();
+      await loadDashboard();
     } catch (error) {
       console.error('Failed to update task status:', error);
       // Handle error, maybe show a toast message to user
@@ -464,8 +447,7 @@ function TodoListPage() {
                   setIsDeleteModalOpen(false);
                   setDeletingTask(null);
                   // Refresh tasks and counts
-                  await loadTasks();
-                  await loadTaskCounts();
+                  await loadDashboard();
                 } catch (error) {
                   console.error('Failed to delete task:', error);
                   alert(`Failed to delete task: ${error.message}`);